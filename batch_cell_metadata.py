@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# Batch Cell Metadata v1     #
+#         2026-10-18         #
+# ========================== #
+import os
+import sys
+import csv
+import json
+import time
+import traceback
+import multiprocessing
+from datetime import datetime as dt
+from finishing_stages import pool_executable
+import populate_cell_metadata as pcm
+
+#            _______________________________
+#           | Runs Populate MGCP Metadata   |
+#           | over a whole manifest of      |
+#           | cells. The imagery footprint, |
+#           | DVOF, and Geonames dates get  |
+#           | read once and shared. Each    |
+#           | cell runs on its own worker   |
+#           | and the run ends with one     |
+#           | summary of XMLs and failures. |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+# Manifest columns. A CSV has one row per cell with these headers. A JSON is either a list of these
+# objects or {"sources" : {...}, "jobs" : [...]} with the shared source paths from source_keys.
+required_keys = ['gdb', 'tpc', 'local_date', 'gait_date']
+source_keys = ['img_foot', 'dvof_file', 'dvof_shp', 'geo_file', 'geo_shp']
+true_values = ('1', 'true', 'yes', 'y', 't')
+
+
+
+#-----------------------------------
+def flag(value, default): # Checkbox value out of a manifest cell. Blank keeps the tool's default.
+	if value is None or value == '':
+		return default
+	if isinstance(value, bool):
+		return value
+	return str(value).strip().lower() in true_values
+
+#-----------------------------------
+def metadata_dataset(gdb): # The MGCP_Metadata dataset. The manifest can name the GDB or the dataset itself.
+	if gdb.lower().rstrip('\\/').endswith('.gdb'):
+		return os.path.join(gdb, 'MGCP_Metadata')
+	return gdb
+
+#-----------------------------------
+def load_manifest(path, sources=None): # ([job dict], {shared source paths}) from a CSV or JSON manifest
+	# sources are the defaults. A JSON manifest's own "sources" win over them.
+	sources = dict(sources or {})
+	if path.lower().endswith('.json'):
+		with open(path, 'r') as f:
+			data = json.load(f)
+		if isinstance(data, dict):
+			sources.update(data.get('sources', {}))
+			rows = data.get('jobs', [])
+		else:
+			rows = data
+	else:
+		with open(path, 'r') as f:
+			rows = list(csv.DictReader(f))
+	jobs = []
+	for number, row in enumerate(rows, 1):
+		row = dict((k.strip(), v.strip() if hasattr(v, 'strip') else v) for k, v in row.items() if k)
+		blank = [key for key in required_keys if not row.get(key)]
+		if blank:
+			raise ValueError("Job {0} in {1} is missing {2}".format(number, os.path.basename(path), ", ".join(blank)))
+		jobs.append({'metadata' : metadata_dataset(row['gdb']),
+					'tpc' : row['tpc'].upper(),
+					'local_date' : row['local_date'],
+					'gait_date' : row['gait_date'],
+					'aafif_date' : row.get('aafif_date') or None,
+					'update_edition' : flag(row.get('update_edition'), True),
+					'new_cell' : flag(row.get('new_cell'), True),
+					'img_foot' : row.get('img_foot') or sources.get('img_foot')})
+	check_jobs(jobs)
+	return jobs, sources
+
+#-----------------------------------
+def check_jobs(jobs): # Two workers editing the same GDB or writing the same XML would trample each other
+	seen = {}
+	for job in jobs:
+		for key in (os.path.normcase(os.path.abspath(job['metadata'])), xml_path(job)):
+			if key in seen:
+				raise ValueError("{0} and {1} both write {2}. Give each cell its own GDB.".format(seen[key], job['tpc'], key))
+			seen[key] = job['tpc']
+		if not job['img_foot']:
+			raise ValueError("No imagery footprint for {0}. Put img_foot in the job or in the shared sources.".format(job['tpc']))
+		pcm.check_dates(job['local_date'], job['gait_date'], job['aafif_date'])
+		pcm.parse_tpc(job['tpc'])
+
+#-----------------------------------
+def xml_path(job): # Where populate_cell writes the cell XML: the folder holding the GDB
+	return os.path.normcase(os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(job['metadata'])), job['tpc'] + '.xml')))
+
+#-----------------------------------
+def shared_dates(jobs, sources): # Reads every source once. Returns {imagery footprint : (newest, oldest)} and the DVOF and Geonames dates.
+	imagery = {}
+	for job in jobs:
+		if job['img_foot'] not in imagery:
+			imagery[job['img_foot']] = pcm.imagery_dates(job['img_foot'])
+	dvof = pcm.dvof_dates(sources['dvof_file'], flag(sources.get('dvof_shp'), False)) if sources.get('dvof_file') else None
+	geo = pcm.geonames_date(sources['geo_file'], flag(sources.get('geo_shp'), False)) if sources.get('geo_file') else None
+	return imagery, dvof, geo
+
+#-----------------------------------
+def cell_job(task): # Worker. task = (job, dates, direct_xml). Returns (job, xml path or None, error or None, seconds).
+	job, dates, direct_xml = task
+	start = time.time()
+	try:
+		# populate_cell points ap.env.workspace at this cell's own dataset, and each worker is its own process
+		xml = pcm.populate_cell(job['metadata'], job['tpc'], job['local_date'], job['gait_date'], dates,
+								job['new_cell'], job['update_edition'], direct_xml)
+		return job, xml, None, round(time.time() - start, 3)
+	except Exception:
+		return job, None, traceback.format_exc(), round(time.time() - start, 3)
+
+#-----------------------------------
+def run_batch(jobs, sources, workers=1, direct_xml=True, executable=None): # Populates every cell in jobs. Returns cell_job results in manifest order.
+	imagery, dvof, geo = shared_dates(jobs, sources)
+	tasks = [(job, {'img' : imagery[job['img_foot']], 'aafif' : job['aafif_date'], 'dvof' : dvof, 'geo' : geo}, direct_xml) for job in jobs]
+	if workers > 1 and len(tasks) > 1:
+		if executable:
+			multiprocessing.set_executable(executable)
+		pool = multiprocessing.Pool(min(workers, len(tasks)))
+		try:
+			return pool.map(cell_job, tasks)
+		finally:
+			pool.close()
+			pool.join()
+	return [cell_job(task) for task in tasks]
+
+#-----------------------------------
+def save_summary(results, manifest): # Writes batch_summary_<timestamp>.json next to the manifest. Returns the path.
+	path = os.path.join(os.path.dirname(os.path.abspath(manifest)), 'batch_summary_{0}.json'.format(dt.now().strftime('%Y%m%d_%H%M%S')))
+	cells = [{'tpc' : job['tpc'], 'metadata' : job['metadata'], 'xml' : xml, 'error' : error, 'seconds' : seconds} for job, xml, error, seconds in results]
+	with open(path, 'w') as f:
+		json.dump({'manifest' : os.path.abspath(manifest),
+					'generated' : len([1 for cell in cells if cell['xml']]),
+					'failed' : len([1 for cell in cells if cell['error']]),
+					'cells' : cells}, f, indent=2)
+	return path
+
+#-----------------------------------
+def summary(results): # One message for the whole batch
+	done = [xml for job, xml, error, seconds in results if xml]
+	failed = [job['tpc'] for job, xml, error, seconds in results if error]
+	line = "Generated {0} of {1} cell XML files".format(len(done), len(results))
+	if failed:
+		line += "\n{0} cells failed: {1}".format(len(failed), ", ".join(failed))
+	return line
+
+
+
+if __name__ == '__main__':
+	# python batch_cell_metadata.py <manifest.csv or .json> [workers] [export]
+	# Shared sources for a CSV manifest come from the environment: MGCP_IMG_FOOT, MGCP_DVOF, MGCP_DVOF_SHP, MGCP_GEONAMES, MGCP_GEONAMES_SHP
+	manifest = sys.argv[1]
+	workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+	direct_xml = not (len(sys.argv) > 3 and sys.argv[3].lower() == 'export') # 'export' goes through Defense Mapping instead
+	defaults = dict((key, os.environ[var]) for key, var in zip(source_keys, ['MGCP_IMG_FOOT', 'MGCP_DVOF', 'MGCP_DVOF_SHP', 'MGCP_GEONAMES', 'MGCP_GEONAMES_SHP']) if os.environ.get(var))
+	jobs, sources = load_manifest(manifest, defaults)
+	results = run_batch(jobs, sources, workers, direct_xml, pool_executable())
+	print(summary(results))
+	for job, xml, error, seconds in results:
+		if error:
+			print("{0}:\n{1}".format(job['tpc'], error))
+	print("Summary: {0}".format(save_summary(results, manifest)))
@@ -0,0 +1,969 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# MGCP Cell XML Generator v1 #
+#         2026-10-18         #
+# ========================== #
+import os
+import string
+import sys
+import xml.etree.ElementTree as et
+
+#            _______________________________
+#           | Writes the MGCP cell metadata |
+#           | XML straight from the cell,   |
+#           | subregion, and source         |
+#           | dictionaries. Same layout as  |
+#           | the Defense Export Metadata   |
+#           | output with no license, no    |
+#           | geoprocessing, and no TRD tag |
+#           | fixing afterwards.            |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+trd_code_space = u'MGCP_v4_r5.1' # Written right the first time, so xml_fixer has nothing to do on these
+catalogue_title = u'MGCP Feature Catalogue'
+shapefile_type = u'ESRI SHAPEFILE (.SHP, .DBF, .SHX)'
+gmx = '{http://www.isotc211.org/2005/gmx}'
+gco = '{http://www.isotc211.org/2005/gco}'
+script_folder = os.path.dirname(os.path.abspath(__file__))
+# Where fileDescription text comes from, first hit wins. The TRD feature catalogue if it's next to the scripts, then the archived Defense export.
+definition_sources = [os.path.join(script_folder, 'MGCP_FeatureCatalogue_TRD4.5.1_20190705.xml'),
+					os.path.join(script_folder, '_archive', 'E124N07.xml')]
+
+# Code list labels for the values the dictionaries hold. Anything missing raises so a bad default can't slip into a delivery.
+languages = {'eng' : u'English'}
+agencies = {'NGA' : u'National Geospatial-Intelligence Agency'}
+nations = {'USA' : u'United States'}
+crs_names = {'WGS84E_2D' : u'WGS 84 2D-Geographic East-North'}
+accuracy_methods = {'15' : (u'productSpecification', u'Product Specification')} # SACEMT
+source_types = {'110' : (u'veryHighResCommMonoImage', u'Very High Resolution Commercial Monoscopic Imagery'), # SSRCTY
+				'2' : (u'ngaAutoAirFacInfoFile', u'AAFIF'),
+				'21' : (u'ngaDigitalVertObstruction', u'DVOF'),
+				'25' : (u'ngaGeoNames', u'GeoNames')}
+vertical_source_types = {'3' : (u'noElevations', u'No Elevations')} # SSVCTY
+code_labels = {'CMLANG' : languages, 'CDLANG' : languages, 'SMLANG' : languages,
+				'CMPOCA' : agencies, 'CORIGA' : agencies, 'SORIGA' : agencies,
+				'CMPOCC' : nations, 'CORIGC' : nations, 'SORIGC' : nations,
+				'CCRSID' : crs_names}
+# Values that land inside an attribute and need their quotes escaped too
+attribute_fields = ['CMLANG', 'CDLANG', 'SMLANG', 'CMPOCA', 'CORIGA', 'SORIGA', 'CMPOCC', 'CORIGC', 'SORIGC',
+					'CMCHAR', 'CDCHAR', 'SMCHAR', 'CMSEC', 'CSECCL', 'SMSEC', 'CCRSID', 'SFCATR']
+
+# Feature class suffix to MD_GeometricObjectTypeCode, in the order the export lists them
+geometric_objects = [('P', u'point'), ('L', u'curve'), ('A', u'surface')]
+# MD_TopicCategoryCode by the first two letters of the F_Code. Lined up against the archived E124N07 export, which lists
+# none for the physiography (DA, DB) features it has, so those add nothing.
+topic_categories = {'AA' : u'structure', 'AB' : u'environment', 'AC' : u'structure', 'AD' : u'utilitiesCommunication',
+					'AF' : u'structure', 'AH' : u'intelligenceMilitary', 'AI' : u'society', 'AJ' : u'farming',
+					'AK' : u'society', 'AL' : u'structure', 'AM' : u'structure', 'AN' : u'transportation',
+					'AP' : u'transportation', 'AQ' : u'transportation', 'AT' : u'utilitiesCommunication',
+					'BA' : u'oceans', 'BB' : u'oceans', 'BD' : u'oceans', 'BH' : u'inlandWaters', 'BI' : u'inlandWaters',
+					'BJ' : u'inlandWaters', 'CA' : u'elevation', 'EA' : u'farming', 'EB' : u'biota', 'EC' : u'biota',
+					'ED' : u'biota', 'FA' : u'boundaries', 'FC' : u'boundaries', 'GA' : u'transportation',
+					'GB' : u'transportation', 'SU' : u'structure', 'ZB' : u'location', 'ZD' : u'location'}
+# ISO 19115 enumeration order, which is the order the export writes them in
+topic_order = [u'farming', u'biota', u'boundaries', u'climatologyMeteorologyAtmosphere', u'economy', u'elevation',
+				u'environment', u'geoscientificInformation', u'health', u'imageryBaseMaps', u'intelligenceMilitary',
+				u'inlandWaters', u'location', u'oceans', u'planningCadastre', u'society', u'structure',
+				u'transportation', u'utilitiesCommunication']
+catalogues = [u'resources/Codelist/gmxCodelists.xml', u'mgcp/Codelist/mgcp_gmxCodelists.xml', u'mgcp/crs/mgcp_gmxCrs.xml',
+			u'resources/uom/gmxUom.xml'] # The feature catalogue (SFCATR) goes on the end
+
+
+
+''''''''' Templates '''''''''
+# Laid out line for line like _archive/E124N07.xml. {FIELD} is the value from the metadata dictionaries,
+# {FIELD_label} its code list label, and the lower case names are worked out in cell_values.
+document_template = u'''<?xml version="1.0" encoding="utf-8"?>
+<mgcp:MGCP_Cell xmlns:gmd="http://www.isotc211.org/2005/gmd" xmlns:gml="http://www.opengis.net/gml" xmlns:gco="http://www.isotc211.org/2005/gco" xmlns:gmx="http://www.isotc211.org/2005/gmx" xmlns:xlink="http://www.w3.org/1999/xlink" xmlns:mgcp="http://www.dgiwg.org/2005/mgcp">
+  <gmd:has>
+    <gmd:MD_Metadata>
+      <gmd:language>
+        <mgcp:MGCP_LanguageCode codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_LanguageCode" codeListValue="{CMLANG}">{CMLANG_label}</mgcp:MGCP_LanguageCode>
+      </gmd:language>
+      <gmd:characterSet>
+        <gmd:MD_CharacterSetCode codeList="resources/Codelist/gmxCodelists.xml#MD_CharacterSetCode" codeListValue="{CMCHAR}">{CMCHAR}</gmd:MD_CharacterSetCode>
+      </gmd:characterSet>
+      <gmd:hierarchyLevel>
+        <gmd:MD_ScopeCode codeList="resources/Codelist/gmxCodelists.xml#MD_ScopeCode" codeListValue="dataset">dataset</gmd:MD_ScopeCode>
+      </gmd:hierarchyLevel>
+      <gmd:hierarchyLevelName>
+        <gco:CharacterString>{CMSPLN}</gco:CharacterString>
+      </gmd:hierarchyLevelName>
+      <gmd:contact>
+        <gmd:CI_ResponsibleParty id="cellMetadataPoc">
+          <gmd:organisationName>
+            <mgcp:MGCP_ParticipantAgency codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_ParticipantAgency" codeListValue="{CMPOCA}">{CMPOCA_label}</mgcp:MGCP_ParticipantAgency>
+          </gmd:organisationName>
+          <gmd:contactInfo>
+            <gmd:CI_Contact>
+              <gmd:address>
+                <gmd:CI_Address>
+                  <gmd:country>
+                    <mgcp:MGCP_ParticipantNation codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_ParticipantNation" codeListValue="{CMPOCC}">{CMPOCC_label}</mgcp:MGCP_ParticipantNation>
+                  </gmd:country>
+                </gmd:CI_Address>
+              </gmd:address>
+            </gmd:CI_Contact>
+          </gmd:contactInfo>
+          <gmd:role>
+            <gmd:CI_RoleCode codeList="resources/Codelist/gmxCodelists.xml#CI_RoleCode" codeListValue="originator">originator</gmd:CI_RoleCode>
+          </gmd:role>
+        </gmd:CI_ResponsibleParty>
+      </gmd:contact>
+      <gmd:dateStamp>
+        <gco:Date>{CMDATE}</gco:Date>
+      </gmd:dateStamp>
+      <gmd:metadataStandardName>
+        <gco:CharacterString>{CMSTDN}</gco:CharacterString>
+      </gmd:metadataStandardName>
+      <gmd:metadataStandardVersion>
+        <gco:CharacterString>{CMSTDV}</gco:CharacterString>
+      </gmd:metadataStandardVersion>
+      <gmd:dataSetURI>
+        <gco:CharacterString>{CURI}{CELLID}</gco:CharacterString>
+      </gmd:dataSetURI>
+      <gmd:spatialRepresentationInfo>
+        <gmd:MD_VectorSpatialRepresentation>
+{geometric_objects}        </gmd:MD_VectorSpatialRepresentation>
+      </gmd:spatialRepresentationInfo>
+      <gmd:referenceSystemInfo>
+        <gmd:MD_ReferenceSystem>
+          <gmd:referenceSystemIdentifier>
+            <gmd:RS_Identifier id="cellCrsInfo">
+              <gmd:code>
+                <gmx:Anchor xlink:href="mgcp/crs/mgcp_gmxCrs.xml#{CCRSID}">{CCRSID_label}</gmx:Anchor>
+              </gmd:code>
+              <gmd:codeSpace>
+                <gco:CharacterString>{trd}</gco:CharacterString>
+              </gmd:codeSpace>
+            </gmd:RS_Identifier>
+          </gmd:referenceSystemIdentifier>
+        </gmd:MD_ReferenceSystem>
+      </gmd:referenceSystemInfo>
+      <gmd:identificationInfo>
+        <gmd:MD_DataIdentification>
+          <gmd:citation>
+            <gmd:CI_Citation>
+              <gmd:title>
+                <gco:CharacterString>{CELLID}</gco:CharacterString>
+              </gmd:title>
+              <gmd:date>
+                <gmd:CI_Date>
+                  <gmd:date>
+                    <gco:Date>{CCDATE}</gco:Date>
+                  </gmd:date>
+                  <gmd:dateType>
+                    <gmd:CI_DateTypeCode codeList="resources/Codelist/gmxCodelists.xml#CI_DateTypeCode" codeListValue="creation">creation</gmd:CI_DateTypeCode>
+                  </gmd:dateType>
+                </gmd:CI_Date>
+              </gmd:date>
+              <gmd:editionDate>
+                <gco:Date>{CEDDAT}</gco:Date>
+              </gmd:editionDate>
+              <gmd:identifier>
+                <gmd:RS_Identifier>
+                  <gmd:code>
+                    <gco:CharacterString>{CELLID}</gco:CharacterString>
+                  </gmd:code>
+                  <gmd:codeSpace>
+                    <gco:CharacterString>{trd}</gco:CharacterString>
+                  </gmd:codeSpace>
+                </gmd:RS_Identifier>
+              </gmd:identifier>
+              <gmd:series>
+                <gmd:CI_Series>
+                  <gmd:name>
+                    <gco:CharacterString>{CSERES}</gco:CharacterString>
+                  </gmd:name>
+                </gmd:CI_Series>
+              </gmd:series>
+            </gmd:CI_Citation>
+          </gmd:citation>
+          <gmd:abstract>
+            <gco:CharacterString>{CDESCR}</gco:CharacterString>
+          </gmd:abstract>
+          <gmd:pointOfContact>
+            <gmd:CI_ResponsibleParty>
+              <gmd:organisationName>
+                <mgcp:MGCP_ParticipantAgency codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_ParticipantAgency" codeListValue="{CORIGA}">{CORIGA_label}</mgcp:MGCP_ParticipantAgency>
+              </gmd:organisationName>
+              <gmd:contactInfo>
+                <gmd:CI_Contact>
+                  <gmd:address>
+                    <gmd:CI_Address>
+                      <gmd:country>
+                        <mgcp:MGCP_ParticipantNation codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_ParticipantNation" codeListValue="{CORIGC}">{CORIGC_label}</mgcp:MGCP_ParticipantNation>
+                      </gmd:country>
+                    </gmd:CI_Address>
+                  </gmd:address>
+                </gmd:CI_Contact>
+              </gmd:contactInfo>
+              <gmd:role>
+                <gmd:CI_RoleCode codeList="resources/Codelist/gmxCodelists.xml#CI_RoleCode" codeListValue="originator">originator</gmd:CI_RoleCode>
+              </gmd:role>
+            </gmd:CI_ResponsibleParty>
+          </gmd:pointOfContact>
+          <gmd:resourceFormat>
+            <gmd:MD_Format id="dataFormat">
+              <gmd:name>
+                <gco:CharacterString>{CFFMTN}</gco:CharacterString>
+              </gmd:name>
+              <gmd:version>
+                <gco:CharacterString>{CFFMTV}</gco:CharacterString>
+              </gmd:version>
+              <gmd:specification>
+                <gco:CharacterString>{CFFMTS}</gco:CharacterString>
+              </gmd:specification>
+            </gmd:MD_Format>
+          </gmd:resourceFormat>
+          <gmd:resourceConstraints>
+            <gmd:MD_SecurityConstraints>
+              <gmd:useLimitation>
+                <gco:CharacterString>Military Classification</gco:CharacterString>
+              </gmd:useLimitation>
+              <gmd:classification>
+                <gmd:MD_ClassificationCode codeList="resources/Codelist/gmxCodelists.xml#MD_ClassificationCode" codeListValue="{CSECCL}">{CSECCL}</gmd:MD_ClassificationCode>
+              </gmd:classification>
+              <gmd:handlingDescription>
+                <gco:CharacterString>{CSHNDI}</gco:CharacterString>
+              </gmd:handlingDescription>
+            </gmd:MD_SecurityConstraints>
+          </gmd:resourceConstraints>
+          <gmd:resourceConstraints>
+            <gmd:MD_LegalConstraints>
+              <gmd:useLimitation>
+                <gco:CharacterString>{CCPYRT}</gco:CharacterString>
+              </gmd:useLimitation>
+              <gmd:accessConstraints>
+                <gmd:MD_RestrictionCode codeList="resources/Codelist/gmxCodelists.xml#MD_RestrictionCode" codeListValue="copyright">copyright</gmd:MD_RestrictionCode>
+              </gmd:accessConstraints>
+              <gmd:useConstraints>
+                <gmd:MD_RestrictionCode codeList="resources/Codelist/gmxCodelists.xml#MD_RestrictionCode" codeListValue="copyright">copyright</gmd:MD_RestrictionCode>
+              </gmd:useConstraints>
+            </gmd:MD_LegalConstraints>
+          </gmd:resourceConstraints>
+          <gmd:spatialRepresentationType>
+            <gmd:MD_SpatialRepresentationTypeCode codeList="resources/Codelist/gmxCodelists.xml#MD_SpatialRepresentationTypeCode" codeListValue="vector">vector</gmd:MD_SpatialRepresentationTypeCode>
+          </gmd:spatialRepresentationType>
+          <gmd:language>
+            <mgcp:MGCP_LanguageCode codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_LanguageCode" codeListValue="{CDLANG}">{CDLANG_label}</mgcp:MGCP_LanguageCode>
+          </gmd:language>
+          <gmd:characterSet>
+            <gmd:MD_CharacterSetCode codeList="resources/Codelist/gmxCodelists.xml#MD_CharacterSetCode" codeListValue="{CDCHAR}">{CDCHAR}</gmd:MD_CharacterSetCode>
+          </gmd:characterSet>
+{topic_categories}          <gmd:extent>
+            <gmd:EX_Extent>
+              <gmd:geographicElement>
+                <gmd:EX_GeographicBoundingBox>
+                  <gmd:westBoundLongitude>
+                    <gco:Decimal>{west}</gco:Decimal>
+                  </gmd:westBoundLongitude>
+                  <gmd:eastBoundLongitude>
+                    <gco:Decimal>{east}</gco:Decimal>
+                  </gmd:eastBoundLongitude>
+                  <gmd:southBoundLatitude>
+                    <gco:Decimal>{south}</gco:Decimal>
+                  </gmd:southBoundLatitude>
+                  <gmd:northBoundLatitude>
+                    <gco:Decimal>{north}</gco:Decimal>
+                  </gmd:northBoundLatitude>
+                </gmd:EX_GeographicBoundingBox>
+              </gmd:geographicElement>
+            </gmd:EX_Extent>
+          </gmd:extent>
+          <gmd:supplementalInformation>
+            <gco:CharacterString>{CCMNT}</gco:CharacterString>
+          </gmd:supplementalInformation>
+        </gmd:MD_DataIdentification>
+      </gmd:identificationInfo>
+      <gmd:distributionInfo>
+        <gmd:MD_Distribution>
+          <gmd:distributionFormat xlink:href="#dataFormat" />
+        </gmd:MD_Distribution>
+      </gmd:distributionInfo>
+      <gmd:dataQualityInfo>
+        <gmd:DQ_DataQuality>
+          <gmd:scope>
+            <gmd:DQ_Scope>
+              <gmd:level>
+                <gmd:MD_ScopeCode codeList="resources/Codelist/gmxCodelists.xml#MD_ScopeCode" codeListValue="dataset">dataset</gmd:MD_ScopeCode>
+              </gmd:level>
+            </gmd:DQ_Scope>
+          </gmd:scope>
+          <gmd:lineage>
+            <gmd:LI_Lineage>
+              <gmd:statement>
+                <gco:CharacterString>{CLSTAT}</gco:CharacterString>
+              </gmd:statement>
+              <gmd:source>
+                <gmd:LI_Source>
+                  <gmd:sourceCitation>
+                    <gmd:CI_Citation>
+                      <gmd:title>
+                        <gco:CharacterString>Oldest source</gco:CharacterString>
+                      </gmd:title>
+                      <gmd:date>
+                        <gmd:CI_Date>
+                          <gmd:date>
+                            <gco:Date>{COLDSD}</gco:Date>
+                          </gmd:date>
+                          <gmd:dateType>
+                            <gmd:CI_DateTypeCode codeList="resources/Codelist/gmxCodelists.xml#CI_DateTypeCode" codeListValue="creation">creation</gmd:CI_DateTypeCode>
+                          </gmd:dateType>
+                        </gmd:CI_Date>
+                      </gmd:date>
+                    </gmd:CI_Citation>
+                  </gmd:sourceCitation>
+                </gmd:LI_Source>
+              </gmd:source>
+              <gmd:source>
+                <gmd:LI_Source>
+                  <gmd:sourceCitation>
+                    <gmd:CI_Citation>
+                      <gmd:title>
+                        <gco:CharacterString>Newest source</gco:CharacterString>
+                      </gmd:title>
+                      <gmd:date>
+                        <gmd:CI_Date>
+                          <gmd:date>
+                            <gco:Date>{CNEWSD}</gco:Date>
+                          </gmd:date>
+                          <gmd:dateType>
+                            <gmd:CI_DateTypeCode codeList="resources/Codelist/gmxCodelists.xml#CI_DateTypeCode" codeListValue="creation">creation</gmd:CI_DateTypeCode>
+                          </gmd:dateType>
+                        </gmd:CI_Date>
+                      </gmd:date>
+                    </gmd:CI_Citation>
+                  </gmd:sourceCitation>
+                </gmd:LI_Source>
+              </gmd:source>
+            </gmd:LI_Lineage>
+          </gmd:lineage>
+        </gmd:DQ_DataQuality>
+      </gmd:dataQualityInfo>
+      <gmd:metadataConstraints>
+        <gmd:MD_SecurityConstraints>
+          <gmd:useLimitation>
+            <gco:CharacterString>Military Classification</gco:CharacterString>
+          </gmd:useLimitation>
+          <gmd:classification>
+            <gmd:MD_ClassificationCode codeList="resources/Codelist/gmxCodelists.xml#MD_ClassificationCode" codeListValue="{CMSEC}">{CMSEC}</gmd:MD_ClassificationCode>
+          </gmd:classification>
+          <gmd:handlingDescription>
+            <gco:CharacterString>{CMSHND}</gco:CharacterString>
+          </gmd:handlingDescription>
+        </gmd:MD_SecurityConstraints>
+      </gmd:metadataConstraints>
+    </gmd:MD_Metadata>
+  </gmd:has>
+{data_files}  <mgcp:subregion>
+    <mgcp:MGCP_Subregion>
+      <mgcp:subregionMetadata>
+        <gmd:MD_Metadata>
+          <gmd:language>
+            <mgcp:MGCP_LanguageCode codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_LanguageCode" codeListValue="{SMLANG}">{SMLANG_label}</mgcp:MGCP_LanguageCode>
+          </gmd:language>
+          <gmd:characterSet>
+            <gmd:MD_CharacterSetCode codeList="resources/Codelist/gmxCodelists.xml#MD_CharacterSetCode" codeListValue="{SMCHAR}">{SMCHAR}</gmd:MD_CharacterSetCode>
+          </gmd:characterSet>
+          <gmd:hierarchyLevel>
+            <gmd:MD_ScopeCode codeList="resources/Codelist/gmxCodelists.xml#MD_ScopeCode" codeListValue="tile">tile</gmd:MD_ScopeCode>
+          </gmd:hierarchyLevel>
+          <gmd:hierarchyLevelName>
+            <gco:CharacterString>{SMSPLN}</gco:CharacterString>
+          </gmd:hierarchyLevelName>
+          <gmd:contact xlink:href="#cellMetadataPoc" />
+          <gmd:dateStamp>
+            <gco:Date>{SMDATE}</gco:Date>
+          </gmd:dateStamp>
+          <gmd:metadataStandardName>
+            <gco:CharacterString>{SMSTDN}</gco:CharacterString>
+          </gmd:metadataStandardName>
+          <gmd:metadataStandardVersion>
+            <gco:CharacterString>{SMSTDV}</gco:CharacterString>
+          </gmd:metadataStandardVersion>
+          <gmd:referenceSystemInfo xlink:href="#cellCrsInfo" />
+          <gmd:identificationInfo>
+            <gmd:MD_DataIdentification>
+              <gmd:citation>
+                <gmd:CI_Citation>
+                  <gmd:title>
+                    <gco:CharacterString>{subregion_id}</gco:CharacterString>
+                  </gmd:title>
+                  <gmd:date>
+                    <gmd:CI_Date>
+                      <gmd:date>
+                        <gco:Date>{SCDATE}</gco:Date>
+                      </gmd:date>
+                      <gmd:dateType>
+                        <gmd:CI_DateTypeCode codeList="resources/Codelist/gmxCodelists.xml#CI_DateTypeCode" codeListValue="creation">creation</gmd:CI_DateTypeCode>
+                      </gmd:dateType>
+                    </gmd:CI_Date>
+                  </gmd:date>
+                  <gmd:editionDate>
+                    <gco:Date>{SEDDAT}</gco:Date>
+                  </gmd:editionDate>
+                  <gmd:identifier>
+                    <gmd:RS_Identifier>
+                      <gmd:code>
+                        <gco:CharacterString>{subregion_id}</gco:CharacterString>
+                      </gmd:code>
+                      <gmd:codeSpace>
+                        <gco:CharacterString>{trd}</gco:CharacterString>
+                      </gmd:codeSpace>
+                    </gmd:RS_Identifier>
+                  </gmd:identifier>
+                </gmd:CI_Citation>
+              </gmd:citation>
+              <gmd:abstract>
+                <gco:CharacterString>{SDESCR}</gco:CharacterString>
+              </gmd:abstract>
+              <gmd:pointOfContact>
+                <gmd:CI_ResponsibleParty>
+                  <gmd:organisationName>
+                    <mgcp:MGCP_ParticipantAgency codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_ParticipantAgency" codeListValue="{SORIGA}">{SORIGA_label}</mgcp:MGCP_ParticipantAgency>
+                  </gmd:organisationName>
+                  <gmd:contactInfo>
+                    <gmd:CI_Contact>
+                      <gmd:address>
+                        <gmd:CI_Address>
+                          <gmd:country>
+                            <mgcp:MGCP_ParticipantNation codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_ParticipantNation" codeListValue="{SORIGC}">{SORIGC_label}</mgcp:MGCP_ParticipantNation>
+                          </gmd:country>
+                        </gmd:CI_Address>
+                      </gmd:address>
+                    </gmd:CI_Contact>
+                  </gmd:contactInfo>
+                  <gmd:role>
+                    <gmd:CI_RoleCode codeList="resources/Codelist/gmxCodelists.xml#CI_RoleCode" codeListValue="originator">originator</gmd:CI_RoleCode>
+                  </gmd:role>
+                </gmd:CI_ResponsibleParty>
+              </gmd:pointOfContact>
+              <gmd:resourceConstraints>
+                <gmd:MD_Constraints>
+                  <gmd:useLimitation>
+                    <gco:CharacterString>{SUFONT}</gco:CharacterString>
+                  </gmd:useLimitation>
+                </gmd:MD_Constraints>
+              </gmd:resourceConstraints>
+              <gmd:resourceConstraints>
+                <gmd:MD_LegalConstraints>
+                  <gmd:useLimitation>
+                    <gco:CharacterString>{SCPYRT}</gco:CharacterString>
+                  </gmd:useLimitation>
+                  <gmd:accessConstraints>
+                    <gmd:MD_RestrictionCode codeList="resources/Codelist/gmxCodelists.xml#MD_RestrictionCode" codeListValue="copyright">copyright</gmd:MD_RestrictionCode>
+                  </gmd:accessConstraints>
+                  <gmd:useConstraints>
+                    <gmd:MD_RestrictionCode codeList="resources/Codelist/gmxCodelists.xml#MD_RestrictionCode" codeListValue="copyright">copyright</gmd:MD_RestrictionCode>
+                  </gmd:useConstraints>
+                  <gmd:otherConstraints>
+                    <gco:CharacterString>{STIERN}</gco:CharacterString>
+                  </gmd:otherConstraints>
+                </gmd:MD_LegalConstraints>
+              </gmd:resourceConstraints>
+              <gmd:spatialResolution>
+                <gmd:MD_Resolution>
+                  <gmd:equivalentScale>
+                    <gmd:MD_RepresentativeFraction>
+                      <gmd:denominator>
+                        <gco:Integer>{SSCALE}</gco:Integer>
+                      </gmd:denominator>
+                    </gmd:MD_RepresentativeFraction>
+                  </gmd:equivalentScale>
+                </gmd:MD_Resolution>
+              </gmd:spatialResolution>
+              <gmd:language>
+                <mgcp:MGCP_LanguageCode codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_LanguageCode" codeListValue="{CDLANG}">{CDLANG_label}</mgcp:MGCP_LanguageCode>
+              </gmd:language>
+              <gmd:characterSet>
+                <gmd:MD_CharacterSetCode codeList="resources/Codelist/gmxCodelists.xml#MD_CharacterSetCode" codeListValue="{CDCHAR}">{CDCHAR}</gmd:MD_CharacterSetCode>
+              </gmd:characterSet>
+              <gmd:extent>
+                <gmd:EX_Extent>
+                  <gmd:geographicElement>
+                    <gmd:EX_BoundingPolygon>
+                      <gmd:polygon>
+                        <gml:Polygon gml:id="{subregion_id}_extent">
+                          <gml:exterior>
+                            <gml:LinearRing>
+                              <gml:posList>{pos_list}</gml:posList>
+                            </gml:LinearRing>
+                          </gml:exterior>
+                        </gml:Polygon>
+                      </gmd:polygon>
+                    </gmd:EX_BoundingPolygon>
+                  </gmd:geographicElement>
+                </gmd:EX_Extent>
+              </gmd:extent>
+{update_type}            </gmd:MD_DataIdentification>
+          </gmd:identificationInfo>
+          <gmd:contentInfo>
+            <gmd:MD_FeatureCatalogueDescription>
+              <gmd:complianceCode>
+                <gco:Boolean>true</gco:Boolean>
+              </gmd:complianceCode>
+              <gmd:includedWithDataset>
+                <gco:Boolean>{SFCINC_bool}</gco:Boolean>
+              </gmd:includedWithDataset>
+{feature_types}              <gmd:featureCatalogueCitation>
+                <gmd:CI_Citation>
+                  <gmd:title>
+                    <gmx:Anchor xlink:href="{SFCATR}">{catalogue_title}</gmx:Anchor>
+                  </gmd:title>
+                  <gmd:date>
+                    <gmd:CI_Date>
+                      <gmd:date>
+                        <gco:Date>{SFCDTD}</gco:Date>
+                      </gmd:date>
+                      <gmd:dateType>
+                        <gmd:CI_DateTypeCode codeList="resources/Codelist/gmxCodelists.xml#CI_DateTypeCode" codeListValue="publication">publication</gmd:CI_DateTypeCode>
+                      </gmd:dateType>
+                    </gmd:CI_Date>
+                  </gmd:date>
+                </gmd:CI_Citation>
+              </gmd:featureCatalogueCitation>
+            </gmd:MD_FeatureCatalogueDescription>
+          </gmd:contentInfo>
+          <gmd:dataQualityInfo>
+            <gmd:DQ_DataQuality>
+              <gmd:scope>
+                <gmd:DQ_Scope>
+                  <gmd:level>
+                    <gmd:MD_ScopeCode codeList="resources/Codelist/gmxCodelists.xml#MD_ScopeCode" codeListValue="tile">tile</gmd:MD_ScopeCode>
+                  </gmd:level>
+                </gmd:DQ_Scope>
+              </gmd:scope>
+              <gmd:report>
+                <gmd:DQ_AbsoluteExternalPositionalAccuracy>
+                  <gmd:nameOfMeasure>
+                    <gco:CharacterString>Absolute circular error</gco:CharacterString>
+                  </gmd:nameOfMeasure>
+                  <gmd:measureIdentification>
+                    <gmd:RS_Identifier>
+                      <gmd:code>
+                        <gco:CharacterString>aha</gco:CharacterString>
+                      </gmd:code>
+                      <gmd:codeSpace>
+                        <gco:CharacterString>{trd}</gco:CharacterString>
+                      </gmd:codeSpace>
+                    </gmd:RS_Identifier>
+                  </gmd:measureIdentification>
+                  <gmd:measureDescription>
+                    <gco:CharacterString>absolute horizontal accuracy of the data's coordinates, expressed in terms of circular error in metres at 90% probability</gco:CharacterString>
+                  </gmd:measureDescription>
+                  <gmd:evaluationMethodDescription>
+                    <mgcp:MGCP_AccuracyEvaluationMethod codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#MGCP_AccuracyEvaluationMethod" codeListValue="{SACEMT_code}">{SACEMT_label}</mgcp:MGCP_AccuracyEvaluationMethod>
+                  </gmd:evaluationMethodDescription>
+                  <gmd:result>
+                    <gmd:DQ_QuantitativeResult>
+                      <gmd:valueUnit xlink:href="resources/uom/gmxUom.xml#m" />
+                      <gmd:value>
+                        <gco:Record>{SACEVL}</gco:Record>
+                      </gmd:value>
+                    </gmd:DQ_QuantitativeResult>
+                  </gmd:result>
+                </gmd:DQ_AbsoluteExternalPositionalAccuracy>
+              </gmd:report>
+              <gmd:report>
+                <gmd:DQ_ConceptualConsistency>
+                  <gmd:nameOfMeasure>
+                    <gco:CharacterString>{SVNAME}</gco:CharacterString>
+                  </gmd:nameOfMeasure>
+                  <gmd:measureDescription>
+                    <gco:CharacterString>{SVVERS}</gco:CharacterString>
+                  </gmd:measureDescription>
+                  <gmd:dateTime>
+                    <gco:DateTime>{SVDATE_time}</gco:DateTime>
+                  </gmd:dateTime>
+                  <gmd:result>
+                    <gmd:DQ_ConformanceResult>
+                      <gmd:specification>
+                        <gmd:CI_Citation>
+                          <gmd:title>
+                            <gco:CharacterString>{SVSPCN}</gco:CharacterString>
+                          </gmd:title>
+                          <gmd:date>
+                            <gmd:CI_Date>
+                              <gmd:date>
+                                <gco:DateTime>{SVSPCD}</gco:DateTime>
+                              </gmd:date>
+                              <gmd:dateType>
+                                <gmd:CI_DateTypeCode codeList="resources/Codelist/gmxCodelists.xml#CI_DateTypeCode" codeListValue="publication">publication</gmd:CI_DateTypeCode>
+                              </gmd:dateType>
+                            </gmd:CI_Date>
+                          </gmd:date>
+                        </gmd:CI_Citation>
+                      </gmd:specification>
+                      <gmd:explanation>
+                        <gco:CharacterString>{SVSTMT}</gco:CharacterString>
+                      </gmd:explanation>
+                      <gmd:pass>
+                        <gco:Boolean>{SVVALD_bool}</gco:Boolean>
+                      </gmd:pass>
+                    </gmd:DQ_ConformanceResult>
+                  </gmd:result>
+                </gmd:DQ_ConceptualConsistency>
+              </gmd:report>
+              <gmd:lineage>
+                <gmd:LI_Lineage>
+                  <gmd:statement>
+                    <gco:CharacterString>{SLSTAT}</gco:CharacterString>
+                  </gmd:statement>
+{sources}                </gmd:LI_Lineage>
+              </gmd:lineage>
+            </gmd:DQ_DataQuality>
+          </gmd:dataQualityInfo>
+          <gmd:metadataConstraints>
+            <gmd:MD_SecurityConstraints>
+              <gmd:useLimitation>
+                <gco:CharacterString>Military Classification</gco:CharacterString>
+              </gmd:useLimitation>
+              <gmd:classification>
+                <gmd:MD_ClassificationCode codeList="resources/Codelist/gmxCodelists.xml#MD_ClassificationCode" codeListValue="{SMSEC}">{SMSEC}</gmd:MD_ClassificationCode>
+              </gmd:classification>
+              <gmd:handlingDescription>
+                <gco:CharacterString>{SMSHND}</gco:CharacterString>
+              </gmd:handlingDescription>
+            </gmd:MD_SecurityConstraints>
+          </gmd:metadataConstraints>
+        </gmd:MD_Metadata>
+      </mgcp:subregionMetadata>
+{catalogues}    </mgcp:MGCP_Subregion>
+  </mgcp:subregion>
+</mgcp:MGCP_Cell>''' # The export ends without a newline
+
+geometric_object_template = u'''          <gmd:geometricObjects>
+            <gmd:MD_GeometricObjects>
+              <gmd:geometricObjectType>
+                <gmd:MD_GeometricObjectTypeCode codeList="resources/Codelist/gmxCodelists.xml#MD_GeometricObjectTypeCode" codeListValue="{kind}">{kind}</gmd:MD_GeometricObjectTypeCode>
+              </gmd:geometricObjectType>
+              <gmd:geometricObjectCount>
+                <gco:Integer>{count}</gco:Integer>
+              </gmd:geometricObjectCount>
+            </gmd:MD_GeometricObjects>
+          </gmd:geometricObjects>
+'''
+
+topic_template = u'''          <gmd:topicCategory>
+            <gmd:MD_TopicCategoryCode>{topic}</gmd:MD_TopicCategoryCode>
+          </gmd:topicCategory>
+'''
+
+data_file_template = u'''  <gmx:dataFile>
+    <gmx:MX_DataFile>
+      <gmx:fileName>
+        <gmx:FileName src="./{shapefile}.SHP">{shapefile}</gmx:FileName>
+      </gmx:fileName>
+      <gmx:fileDescription>
+        <gco:CharacterString>{description}</gco:CharacterString>
+      </gmx:fileDescription>
+      <gmx:fileType>
+        <gmx:MimeFileType type="octet-stream">{file_type}</gmx:MimeFileType>
+      </gmx:fileType>
+      <gmx:featureTypes>
+        <gco:LocalName>{local_name}</gco:LocalName>
+      </gmx:featureTypes>
+      <gmx:fileFormat xlink:href="#dataFormat" />
+    </gmx:MX_DataFile>
+  </gmx:dataFile>
+'''
+
+feature_type_template = u'''              <gmd:featureTypes>
+                <gco:LocalName>{local_name}</gco:LocalName>
+              </gmd:featureTypes>
+'''
+
+update_type_template = u'''              <gmd:supplementalInformation>
+                <gco:CharacterString>{STYPEU}</gco:CharacterString>
+              </gmd:supplementalInformation>
+'''
+
+scale_template = u'''                      <gmd:scaleDenominator>
+                        <gmd:MD_RepresentativeFraction>
+                          <gmd:denominator>
+                            <gco:Integer>{scale}</gco:Integer>
+                          </gmd:denominator>
+                        </gmd:MD_RepresentativeFraction>
+                      </gmd:scaleDenominator>
+'''
+
+source_template = u'''                  <gmd:source>
+                    <gmd:LI_Source>
+{scale_denominator}                      <gmd:sourceCitation>
+                        <gmd:CI_Citation>
+                          <gmd:title>
+                            <gco:CharacterString>{title}</gco:CharacterString>
+                          </gmd:title>
+                          <gmd:date>
+                            <gmd:CI_Date>
+                              <gmd:date>
+                                <gco:Date>{date}</gco:Date>
+                              </gmd:date>
+                              <gmd:dateType>
+                                <gmd:CI_DateTypeCode codeList="resources/Codelist/gmxCodelists.xml#CI_DateTypeCode" codeListValue="creation">creation</gmd:CI_DateTypeCode>
+                              </gmd:dateType>
+                            </gmd:CI_Date>
+                          </gmd:date>
+                          <gmd:identifier>
+                            <gmd:RS_Identifier>
+                              <gmd:code>
+                                <gco:CharacterString>{code}</gco:CharacterString>
+                              </gmd:code>
+                            </gmd:RS_Identifier>
+                          </gmd:identifier>
+                          <gmd:series>
+                            <gmd:CI_Series>
+                              <gmd:name>
+                                <mgcp:{code_list} codeList="mgcp/Codelist/mgcp_gmxCodelists.xml#{code_list}" codeListValue="{code}">{label}</mgcp:{code_list}>
+                              </gmd:name>
+                            </gmd:CI_Series>
+                          </gmd:series>
+                        </gmd:CI_Citation>
+                      </gmd:sourceCitation>
+                      <gmd:sourceExtent>
+                        <gmd:EX_Extent>
+                          <gmd:geographicElement>
+                            <gmd:EX_BoundingPolygon>
+                              <gmd:polygon>
+                                <gml:Polygon gml:id="{polygon_id}">
+                                  <gml:exterior>
+                                    <gml:LinearRing>
+                                      <gml:posList>{pos_list}</gml:posList>
+                                    </gml:LinearRing>
+                                  </gml:exterior>
+                                </gml:Polygon>
+                              </gmd:polygon>
+                            </gmd:EX_BoundingPolygon>
+                          </gmd:geographicElement>
+                        </gmd:EX_Extent>
+                      </gmd:sourceExtent>
+                    </gmd:LI_Source>
+                  </gmd:source>
+'''
+
+catalogue_template = u'''      <mgcp:subregionCatalogue xlink:href="{href}" />
+'''
+
+
+
+''''''''' Functions '''''''''
+#-----------------------------------
+def compile_template(text): # [(literal text, field name or None)] so filling in a cell is a join instead of a parse
+	return [(literal, field) for literal, field, spec, conversion in string.Formatter().parse(text)]
+
+#-----------------------------------
+def fill(compiled, values): # Compiled template with its fields taken from values
+	parts = []
+	for literal, field in compiled:
+		parts.append(literal)
+		if field is not None:
+			parts.append(values[field])
+	return u''.join(parts)
+
+#-----------------------------------
+def to_text(value): # Unicode for whatever the dictionaries hold. Byte strings are taken as UTF-8.
+	if value is None:
+		return u''
+	if isinstance(value, bytes):
+		return value.decode('utf-8')
+	return u'{0}'.format(value)
+
+#-----------------------------------
+def escape(value, attribute=False): # XML escaped text, quotes too when it goes in an attribute
+	text = to_text(value).replace(u'&', u'&amp;').replace(u'<', u'&lt;').replace(u'>', u'&gt;')
+	if attribute:
+		text = text.replace(u'"', u'&quot;')
+	return text
+
+#-----------------------------------
+def number(value): # 124 instead of 124.0, same as the export writes coordinates
+	return u'{0:.15g}'.format(float(value))
+
+#-----------------------------------
+def pos_list(ring): # gml:posList of a ring of (lon, lat) pairs
+	return u' '.join(u'{0} {1}'.format(number(x), number(y)) for x, y in ring)
+
+#-----------------------------------
+def cell_ring(west, south): # The 1x1 degree cell with its southwest corner at (west, south), in the order the cell polygon is drawn
+	return [(west, south), (west, south + 1), (west + 1, south + 1), (west + 1, south), (west, south)]
+
+#-----------------------------------
+def code_label(table, code, field): # Label for a code list value. A value with no label is an error, not a blank in the delivery.
+	try:
+		return table[to_text(code)]
+	except KeyError:
+		raise ValueError("{0} '{1}' isn't in the cell XML code lists. Add it to cell_metadata_xml.py.".format(field, code))
+
+#-----------------------------------
+def boolean(value): # 'TRUE', 'True', True -> 'true'
+	return u'true' if to_text(value).strip().lower() in (u'true', u'1', u'yes') else u'false'
+
+#-----------------------------------
+def load_definitions(paths=None): # {F_Code: definition} from the TRD feature catalogue or earlier Defense exports, first hit wins
+	definitions = {}
+	for path in (paths if paths is not None else definition_sources):
+		if not os.path.exists(path):
+			continue
+		for event, element in et.iterparse(path):
+			tag = element.tag.rsplit('}', 1)[-1]
+			if tag == 'MX_DataFile': # Defense export. The file name is the geometry letter and the F_Code.
+				name = element.find('{0}fileName/{0}FileName'.format(gmx))
+				text = element.find('{0}fileDescription/{1}CharacterString'.format(gmx, gco))
+				if name is not None and text is not None and name.text and text.text:
+					definitions.setdefault(name.text.strip()[1:], text.text.strip())
+				element.clear()
+			elif tag == 'FC_FeatureType': # ISO 19110 feature catalogue
+				found = {}
+				for child in element:
+					key = child.tag.rsplit('}', 1)[-1]
+					if key in ('code', 'definition'):
+						found[key] = u''.join(child.itertext()).strip()
+				if found.get('code') and found.get('definition'):
+					definitions.setdefault(found['code'], found['definition'])
+				element.clear()
+	return definitions
+
+#-----------------------------------
+def feature_entries(present, catalogue, definitions): # [(shapefile, local name, description)] for the (fc, subtype) pairs that have features
+	# Returns (entries, F_Codes with no definition). Those get their local name as the description so the file still validates.
+	entries = []
+	missing = []
+	seen = set()
+	for fc, subtype in present:
+		fcode = catalogue.fcode(fc, subtype)
+		shapefile = fc[-1] + fcode
+		if shapefile in seen:
+			continue
+		seen.add(shapefile)
+		local_name = u'{0} Feature'.format(catalogue.name(fc, subtype))
+		description = definitions.get(fcode)
+		if description is None:
+			missing.append(fcode)
+			description = local_name
+		entries.append((shapefile, local_name, description))
+	return entries, missing
+
+#-----------------------------------
+def source_entries(sources, subregion): # [(scale or None, title, date, code list, code, label)] for the LI_Source blocks in export order
+	entries = []
+	for source in sources:
+		code, label = code_label(source_types, source['SSRCTY'], 'SSRCTY')
+		# The export only writes a scale for sources that differ from the subregion scale
+		scale = source.get('SSRCSC') if to_text(source.get('SSRCSC')) != to_text(subregion['SSCALE']) else None
+		entries.append((scale, source['SSRCID'], source['SSRCDT'], u'MGCP_SourceTypeId', code, label))
+	# The vertical source comes from the subregion itself and always goes last
+	code, label = code_label(vertical_source_types, subregion['SSVCTY'], 'SSVCTY')
+	entries.append((None, subregion['SSVRTI'], subregion['SSVCDT'], u'MGCP_VerticalSourceTypeId', subregion['SSVCID'] or code, label))
+	return entries
+
+#-----------------------------------
+def cell_values(cell, subregion, ring): # Every field the document template needs, escaped and ready to join
+	values = {}
+	for table in (cell, subregion):
+		for key, value in table.items():
+			values[key] = escape(value, key in attribute_fields)
+	for key, table in code_labels.items():
+		values[key + '_label'] = escape(code_label(table, cell.get(key, subregion.get(key)), key))
+	method = code_label(accuracy_methods, subregion['SACEMT'], 'SACEMT')
+	values['SACEMT_code'] = escape(method[0], True)
+	values['SACEMT_label'] = escape(method[1])
+	values['SFCINC_bool'] = boolean(subregion['SFCINC'])
+	values['SVVALD_bool'] = boolean(subregion['SVVALD'])
+	values['SVDATE_time'] = escape(u'{0}T00:00:00Z'.format(to_text(subregion['SVDATE'])))
+	values['subregion_id'] = escape(to_text(cell['CELLID']) + to_text(subregion['SUBRID']), True)
+	values['trd'] = trd_code_space
+	values['catalogue_title'] = catalogue_title
+	xs = [x for x, y in ring]
+	ys = [y for x, y in ring]
+	values['west'], values['east'] = number(min(xs)), number(max(xs))
+	values['south'], values['north'] = number(min(ys)), number(max(ys))
+	values['pos_list'] = pos_list(ring)
+	return values
+
+
+#-----------------------------------
+class CellTemplate(object):
+	# Compiled once, then render() per cell
+	# xml = CellTemplate().render(cell_default, subregion_default, [new_imagery, old_imagery, ...], ring, features, counts)
+	def __init__(self):
+		self.document = compile_template(document_template)
+		self.geometric_object = compile_template(geometric_object_template)
+		self.topic = compile_template(topic_template)
+		self.data_file = compile_template(data_file_template)
+		self.feature_type = compile_template(feature_type_template)
+		self.update_type = compile_template(update_type_template)
+		self.scale = compile_template(scale_template)
+		self.source = compile_template(source_template)
+		self.catalogue = compile_template(catalogue_template)
+
+	def render(self, cell, subregion, sources, ring, features, counts):
+		# cell, subregion  - cell_default and subregion_default with the per run dates filled in
+		# sources          - the source dictionaries used, in the order they go in the lineage
+		# ring             - the cell polygon as [(lon, lat), ...], closed
+		# features         - [(shapefile, local name, description)] from feature_entries
+		# counts           - {'P': points, 'L': lines, 'A': areas} across the MGCP dataset
+		values = cell_values(cell, subregion, ring)
+		values['geometric_objects'] = u''.join(fill(self.geometric_object, {'kind' : kind, 'count' : to_text(counts[letter])})
+												for letter, kind in geometric_objects if counts.get(letter))
+		topics = set(topic_categories.get(shapefile[1:3]) for shapefile, local_name, description in features)
+		values['topic_categories'] = u''.join(fill(self.topic, {'topic' : topic}) for topic in topic_order if topic in topics)
+		values['data_files'] = u''.join(fill(self.data_file, {'shapefile' : escape(shapefile, True), 'description' : escape(description),
+															'file_type' : shapefile_type, 'local_name' : escape(local_name)})
+										for shapefile, local_name, description in features)
+		values['feature_types'] = u''.join(fill(self.feature_type, {'local_name' : escape(local_name)}) for shapefile, local_name, description in features)
+		values['update_type'] = fill(self.update_type, values) if to_text(subregion.get('STYPEU')).strip() else u'' # Left off for Edition 1
+		blocks = []
+		for n, (scale, title, date, code_list, code, label) in enumerate(source_entries(sources, subregion), 1):
+			blocks.append(fill(self.source, {'scale_denominator' : fill(self.scale, {'scale' : escape(scale)}) if scale else u'',
+											'title' : escape(title), 'date' : escape(date), 'code_list' : code_list,
+											'code' : escape(code, True), 'label' : escape(label),
+											'polygon_id' : u'{0}_source{1}'.format(values['subregion_id'], n), 'pos_list' : values['pos_list']}))
+		values['sources'] = u''.join(blocks)
+		values['catalogues'] = u''.join(fill(self.catalogue, {'href' : escape(href, True)}) for href in catalogues + [to_text(subregion['SFCATR'])])
+		return fill(self.document, values)
+
+	def write(self, path, *args): # render() straight to path as UTF-8 with the BOM the export has. Returns bytes written.
+		data = (u'\ufeff' + self.render(*args)).encode('utf-8')
+		with open(path, 'wb') as f:
+			f.write(data)
+		return len(data)
+
+
+#-----------------------------------
+def element_paths(path): # [(element path, sorted attribute names, has text)] in document order, for comparing two cell XMLs by structure
+	paths = []
+	stack = [] # (tag, entry) for each open element
+	for event, element in et.iterparse(path, events=('start', 'end')):
+		if event == 'start':
+			entry = ['/'.join([tag for tag, open_entry in stack] + [element.tag]), tuple(sorted(element.attrib.keys())), None]
+			paths.append(entry)
+			stack.append((element.tag, entry))
+		else:
+			stack.pop()[1][2] = bool(element.text and element.text.strip())
+	return [tuple(entry) for entry in paths]
+
+#-----------------------------------
+def structure_diff(expected, actual): # Lines describing where actual's element structure differs from expected's. Empty when they match.
+	a = element_paths(expected)
+	b = element_paths(actual)
+	problems = []
+	for i, (x, y) in enumerate(zip(a, b)):
+		if x != y:
+			problems.append(u"element {0}: expected {1} got {2}".format(i, x, y))
+			if len(problems) >= 20:
+				break
+	if len(a) != len(b):
+		problems.append(u"expected {0} elements, got {1}".format(len(a), len(b)))
+	return problems
+
+
+
+if __name__ == '__main__':
+	# python cell_metadata_xml.py <Defense export XML> <generated XML>
+	problems = structure_diff(sys.argv[1], sys.argv[2])
+	print("\n".join(problems) if problems else "Same structure")
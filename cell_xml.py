@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# Cell XML Writer v1         #
+#         2026-10-18         #
+# ========================== #
+import re
+import sys
+import xml.etree.ElementTree as et
+
+#            _______________________________
+#           | Streams an ElementTree out to |
+#           | a file in one walk of the     |
+#           | tree. Writes the same layout  |
+#           | as xml_render without ever    |
+#           | building the whole document   |
+#           | up as one string.             |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+strip_ns = re.compile(r'({[^}]+}\s*)*')
+find_ns = re.compile(r'{[^}]+}')
+
+
+
+#-----------------------------------
+def collect_namespaces(root, encoding='utf-8'): # {uri: prefix} for the whole tree, same prefixes ElementTree would write
+	if sys.version_info[0] < 3:
+		return et._namespaces(root, encoding)[1]
+	return et._namespaces(root)[1]
+
+#-----------------------------------
+def stream_xml(root, out, indent_size=2, encoding='utf-8'): # Writes root to the binary file handle out, one element at a time. Returns bytes written.
+	# Same output as xml_render: namespace prefixes dropped from the tags, each namespace declared on the first element
+	# that uses it, text stripped, children indented under their parent. Every element is visited exactly once.
+	if isinstance(root, et.ElementTree):
+		root = root.getroot()
+	namespaces = collect_namespaces(root, encoding) # Collected once. Entries get used up as they are declared.
+	tags = {} # {qualified tag: bare tag}. The same few hundred tags repeat all through a cell document.
+	written = [0]
+
+	def emit(parts):
+		chunk = ''.join(parts)
+		if not isinstance(chunk, bytes):
+			chunk = chunk.encode(encoding)
+		out.write(chunk)
+		written[0] += len(chunk)
+
+	emit(['<?xml version="1.0" encoding="{0}"?>\n'.format(encoding)])
+	# Depth first with an explicit stack so deep documents don't run into the recursion limit.
+	# ('open', element, level) writes the start tag, ('close', tag, level) writes the end tag after the children.
+	stack = [('open', root, 0)]
+	while stack:
+		step, item, level = stack.pop()
+		indent = ' ' * indent_size * level
+		if step == 'close':
+			emit([indent, '</', item, '>\n'])
+			continue
+		tag = tags.get(item.tag)
+		if tag is None:
+			tag = tags[item.tag] = strip_ns.sub('', item.tag)
+		parts = [indent, '<', tag]
+		for ns in find_ns.findall(item.tag):
+			ns_key = ns[1:-1]
+			if ns_key not in namespaces: continue
+			if namespaces[ns_key] != '':
+				parts.append(' xmlns:{0}="{1}"'.format(namespaces[ns_key], ns_key))
+			else:
+				parts.append(' xmlns="{0}"'.format(ns_key))
+			del namespaces[ns_key]
+		for k, v in item.attrib.items():
+			parts.append(' {0}="{1}"'.format(k, v))
+		parts.append('>')
+		if item.text:
+			parts.append(item.text.strip())
+		children = list(item)
+		if children:
+			parts.append('\n')
+			emit(parts)
+			stack.append(('close', tag, level))
+			for child in reversed(children):
+				stack.append(('open', child, level + 1))
+		else:
+			parts.extend(['</', tag, '>\n'])
+			emit(parts)
+	return written[0]
+
+#-----------------------------------
+def write_xml(root, path, indent_size=2, encoding='utf-8'): # stream_xml straight to a file on disk. Returns bytes written.
+	with open(path, 'wb') as out:
+		return stream_xml(root, out, indent_size, encoding)
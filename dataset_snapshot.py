@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# MGCP Dataset Snapshot v1   #
+#         2026-10-18         #
+# ========================== #
+from collections import namedtuple
+
+#            _______________________________
+#           | One Describe of the whole     |
+#           | feature dataset per run. Keeps|
+#           | the feature class list,       |
+#           | fields, geometry types, and   |
+#           | editor tracking state so the  |
+#           | tools stop calling Describe,  |
+#           | ListFields, and GetCount over |
+#           | and over for the same thing.  |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+# Plain values only so a snapshot can be handed to worker processes
+FieldInfo = namedtuple('FieldInfo', ['name', 'type', 'length', 'editable'])
+FeatureClassInfo = namedtuple('FeatureClassInfo', ['name', 'shape_type', 'has_z', 'has_m', 'oid_field', 'shape_field',
+													'editor_tracking', 'sr_type', 'xy_tolerance', 'fields', 'sr_text'])
+
+_snapshots = {} # {workspace: DatasetSnapshot} shared by every tool running in this process
+
+
+
+#-----------------------------------
+def fc_info(desc): # FeatureClassInfo from a Describe object of a feature class
+	sr = desc.spatialReference
+	fields = tuple(FieldInfo(f.name, f.type, f.length, f.editable) for f in desc.fields)
+	return FeatureClassInfo(desc.baseName, desc.shapeType, bool(desc.hasZ), bool(desc.hasM), desc.OIDFieldName, desc.shapeFieldName,
+							bool(getattr(desc, 'editorTrackingEnabled', False)), sr.type, sr.XYTolerance or 0.0, fields, sr.exportToString())
+
+#-----------------------------------
+def spatial_reference(info): # arcpy SpatialReference of a FeatureClassInfo. Rebuilt from its string so the info itself stays picklable.
+	import arcpy as ap
+	sr = ap.SpatialReference()
+	sr.loadFromString(info.sr_text)
+	return sr
+
+
+#-----------------------------------
+class DatasetSnapshot(object):
+	# snap = dataset_snapshot(MGCP, refresh=True)   <- once at the top of a tool
+	# snap.featureclass, snap.info(fc).shape_type, snap.field_names(fc), snap.count(fc)
+	# snap.wrote(fc) after rows are added, deleted, or rewritten and snap.schema_changed(fc) after fields or settings change
+	def __init__(self, workspace):
+		self.workspace = workspace
+		self.infos = {}
+		self.counts = {}
+		self.featureclass = []
+		self.take()
+
+	def take(self): # Describing the dataset describes every child with it, so this is one call instead of one per feature class
+		import arcpy as ap
+		self.infos = {}
+		self.counts = {}
+		for child in ap.Describe(self.workspace).children:
+			if child.dataType == 'FeatureClass':
+				self.infos[child.baseName] = fc_info(child)
+		self.featureclass = sorted(self.infos.keys())
+
+	def info(self, fc): # FeatureClassInfo for fc. Anything outside the dataset gets described on its own and kept.
+		if fc not in self.infos:
+			import arcpy as ap
+			self.infos[fc] = fc_info(ap.Describe(fc))
+		return self.infos[fc]
+
+	def fields(self, fc):
+		return self.info(fc).fields
+
+	def field_names(self, fc, lower=False):
+		return [f.name.lower() if lower else f.name for f in self.info(fc).fields]
+
+	def count(self, fc): # Row count. GetCount only runs the first time, or again after a write.
+		if fc not in self.counts:
+			import arcpy as ap
+			self.counts[fc] = int(ap.GetCount_management(fc).getOutput(0))
+		return self.counts[fc]
+
+	def set_count(self, fc, count): # For tools that already read every row of fc and know the count for free
+		self.counts[fc] = count
+
+	def wrote(self, fc=None, count=None): # Rows in fc (or everything) changed. count is the new row count if it is known.
+		if fc is None:
+			self.counts = {}
+		elif count is None:
+			self.counts.pop(fc, None)
+		else:
+			self.counts[fc] = count
+
+	def schema_changed(self, fc=None): # Fields or editor tracking changed on fc. With no fc the whole dataset is taken again.
+		if fc is None:
+			self.take()
+			return
+		self.infos.pop(fc, None)
+		self.counts.pop(fc, None)
+
+
+#-----------------------------------
+def dataset_snapshot(workspace, refresh=False): # The shared snapshot of workspace. Tools pass refresh=True once per run since the data may have changed in between.
+	if refresh or workspace not in _snapshots:
+		_snapshots[workspace] = DatasetSnapshot(workspace)
+	return _snapshots[workspace]
+
+#-----------------------------------
+def forget(workspace=None): # Drops the cached snapshot of workspace, or all of them
+	if workspace is None:
+		_snapshots.clear()
+	else:
+		_snapshots.pop(workspace, None)
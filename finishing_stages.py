@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# MGCP Finishing Stages v1   #
+#         2026-10-18         #
+# ========================== #
+import os
+import sys
+import traceback
+import uuid
+import multiprocessing
+import arcpy as ap
+import numpy as np
+from mgcp_catalogue import load_catalogue
+from geometry_check import check_fc, repair_oids, describe
+from run_report import snapshot, elapsed, combine
+from dataset_snapshot import dataset_snapshot, spatial_reference
+from geodesic_metrics import populate_metrics
+
+#            _______________________________
+#           | The per feature class stages  |
+#           | of the finishing tool. The    |
+#           | reads can spread over a pool  |
+#           | of worker processes. The      |
+#           | edits all happen back in the  |
+#           | parent, one at a time, since  |
+#           | a file GDB only takes one     |
+#           | editor per feature dataset.   |
+#           | Workers can't talk to the     |
+#           | geoprocessing window so their |
+#           | messages come back with the   |
+#           | results.                      |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+catalogue = load_catalogue()
+
+
+
+#-----------------------------------
+def oid_where_clauses(fc, oids, chunk=1000): # Where clauses selecting the given OIDs, split up so no single IN list gets too long
+	oid_field = ap.AddFieldDelimiters(fc, dataset_snapshot(ap.env.workspace).info(fc).oid_field)
+	oids = sorted(oids)
+	return ["{0} IN ({1})".format(oid_field, ",".join(str(o) for o in oids[i:i+chunk])) for i in range(0, len(oids), chunk)]
+
+#-----------------------------------
+def fcode_lut(subtypes, dtype): # Lookup table of F_Codes indexed by FCSubtype code and a mask of which subtype codes are defined
+	lut = np.zeros(max(subtypes.keys()) + 1, dtype=dtype) # Zeros are '' for string arrays
+	defined = np.zeros(len(lut), dtype=bool)
+	for code, fcode in subtypes.items():
+		lut[code] = fcode
+		defined[code] = True
+	return lut, defined
+
+#-----------------------------------
+def fcode_fixes(fc, subtypes, rows=None): # Read only. Returns ({OID : F_Code} for the F_Codes that don't match their FCSubtype, rows with an unknown subtype).
+	# One bulk read of the two fields and the comparison happens in NumPy
+	# rows, if given, counts the rows 'read' and 'written' for the run report
+	rows = rows if rows is not None else {'read' : 0, 'written' : 0}
+	arr = ap.da.FeatureClassToNumPyArray(fc, ["OID@", "f_code", "fcsubtype"], null_value={"f_code" : "", "fcsubtype" : -1})
+	rows['read'] += len(arr)
+	if not len(arr):
+		return {}, 0
+	codes = arr["f_code"]
+	sub = arr["fcsubtype"].astype(np.int64)
+	lut, defined = fcode_lut(subtypes, codes.dtype)
+	in_range = (sub >= 0) & (sub < len(lut))
+	expected = lut[np.where(in_range, sub, 0)]
+	known = in_range & defined[np.where(in_range, sub, 0)]
+	bad = known & (codes != expected)
+	unknown = int((~known).sum())
+	if not bad.any():
+		return {}, unknown
+	return dict(zip(arr["OID@"][bad].tolist(), expected[bad].tolist())), unknown
+
+#-----------------------------------
+def write_fcodes(fc, fixes, rows=None): # Writes the fcode_fixes. Only the mismatched OIDs get touched. Returns the number written.
+	rows = rows if rows is not None else {'read' : 0, 'written' : 0}
+	fixed = 0
+	for where in oid_where_clauses(fc, fixes.keys()):
+		with ap.da.UpdateCursor(fc, ["OID@", "f_code"], where) as ucursor:
+			for urow in ucursor:
+				if urow[0] in fixes:
+					urow[1] = str(fixes[urow[0]])
+					ucursor.updateRow(urow)
+					fixed += 1
+	rows['written'] += fixed
+	return fixed
+
+#-----------------------------------
+def reconcile_fcodes(fc, subtypes, rows=None): # Fixes F_Codes that don't match their FCSubtype. Returns (mismatches fixed, rows with an unknown subtype).
+	fixes, unknown = fcode_fixes(fc, subtypes, rows)
+	return (write_fcodes(fc, fixes, rows) if fixes else 0), unknown
+
+#-----------------------------------
+def multipart_oids(fc, info, rows=None): # Read only. OIDs of the multipart features. A feature class without any costs this one read and nothing else.
+	# info is the FeatureClassInfo of fc from the dataset snapshot
+	rows = rows if rows is not None else {'read' : 0, 'written' : 0}
+	if info.shape_type not in ('Polygon', 'Polyline'):
+		return []
+	multi = []
+	with ap.da.SearchCursor(fc, ['OID@', 'SHAPE@']) as scursor:
+		for srow in scursor:
+			rows['read'] += 1
+			if srow[1] is not None and srow[1].partCount > 1:
+				multi.append(srow[0])
+	return multi
+
+#-----------------------------------
+def explode_oids(fc, info, multi, rows=None): # Splits the given multipart features in place. Returns (multipart features, new features inserted).
+	rows = rows if rows is not None else {'read' : 0, 'written' : 0}
+	# Every editable attribute gets copied to the new parts. Shape length and area get recalculated by the geodatabase.
+	skip = [info.oid_field.lower(), info.shape_field.lower()]
+	fields = [f.name for f in info.fields if f.editable and f.type not in ('OID', 'Geometry', 'GlobalID') and f.name.lower() not in skip]
+	lower = [f.lower() for f in fields]
+	uid_i = lower.index('uid') if 'uid' in lower else None
+	gfid_i = lower.index('gfid') if 'gfid' in lower else None
+	geom = ap.Polygon if info.shape_type == 'Polygon' else ap.Polyline
+	sr = spatial_reference(info)
+
+	exploded = 0
+	new_rows = []
+	for where in oid_where_clauses(fc, multi):
+		with ap.da.UpdateCursor(fc, fields + ['SHAPE@'], where) as ucursor:
+			for urow in ucursor:
+				shape = urow[-1]
+				if shape is None or shape.partCount < 2: # Changed since the scan
+					continue
+				parts = [geom(shape.getPart(i), sr, info.has_z, info.has_m) for i in range(shape.partCount)]
+				# The original feature keeps its OID and UID as the first part
+				urow[-1] = parts[0]
+				ucursor.updateRow(urow)
+				exploded += 1
+				for part in parts[1:]:
+					row = list(urow)
+					row[-1] = part
+					if uid_i is not None: # Fresh UID so the explode doesn't hand out duplicates
+						new = uuid.uuid4()
+						row[uid_i] = str(new)
+						if gfid_i is not None:
+							row[gfid_i] = '{' + str(new).upper() + '}'
+					new_rows.append(row)
+	with ap.da.InsertCursor(fc, fields + ['SHAPE@']) as icursor:
+		for row in new_rows:
+			icursor.insertRow(row)
+	rows['written'] += exploded + len(new_rows)
+	return exploded, len(new_rows)
+
+#-----------------------------------
+def explode_multiparts(fc, rows=None): # Splits only the multipart features. Returns (multipart features, new features inserted).
+	info = dataset_snapshot(ap.env.workspace).info(fc)
+	multi = multipart_oids(fc, info, rows)
+	if not multi:
+		return 0, 0
+	return explode_oids(fc, info, multi, rows)
+
+#-----------------------------------
+def fcode_scan(fc, info, log, rows): # Populate F_Code for one feature class, the read
+	fixes, unknown = fcode_fixes(fc, catalogue.subtypes(fc), rows)
+	if unknown:
+		log.append(('warning', "{0} features in {1} have an FCSubtype that isn't in the MGCP catalogue. Their F_Codes were left alone.".format(unknown, fc)))
+	return fixes or None
+
+def fcode_apply(fc, info, fixes, log, rows): # Populate F_Code for one feature class, the writes
+	fixed = write_fcodes(fc, fixes, rows)
+	if fixed:
+		log.append(('message', "{0} F_Codes updated in {1}".format(fixed, fc)))
+	return fixed
+
+#-----------------------------------
+def explode_scan(fc, info, log, rows): # Explode the multipart features of one feature class, the read
+	return multipart_oids(fc, info, rows) or None
+
+def explode_apply(fc, info, multi, log, rows): # Explode the multipart features of one feature class, the writes
+	exploded, inserted = explode_oids(fc, info, multi, rows)
+	if exploded:
+		log.append(('message', "Exploded {0} multipart features in {1} into {2} new features".format(exploded, fc, inserted)))
+	return inserted
+
+#-----------------------------------
+def repair_scan(fc, info, log, rows): # Checks the geometry of one feature class. Returns the flagged OIDs.
+	flagged, totals = check_fc(fc, info.xy_tolerance)
+	rows['read'] += totals['features']
+	if not flagged:
+		return None
+	log.append(('message', describe(fc, totals)))
+	return sorted(flagged.keys())
+
+def repair_apply(fc, info, flagged, log, rows): # Runs Repair Geometry on only the flagged features
+	repair_oids(fc, flagged, oid_where_clauses)
+	rows['written'] += len(flagged)
+	log.append(('message', "Repaired {0} features in {1}".format(len(flagged), fc)))
+	return len(flagged)
+
+#-----------------------------------
+def metrics_apply(fc, info, plan, log, rows): # Geodesic LZN, ARA, and WID for one feature class, written only where they changed
+	written, field_counts = populate_metrics(fc, [f.name.lower() for f in info.fields], rows)
+	if written:
+		log.append(('message', "Updated metrics on {0} features in {1} ({2})".format(written, fc, ", ".join("{0} {1}".format(name.upper(), n) for name, n in sorted(field_counts.items()) if n))))
+	return written
+
+# name : (scan, apply). Both take the FeatureClassInfo of the feature class from the dataset snapshot. A file GDB only lets one process edit a feature dataset at a time, so every stage is split in two.
+# scan only reads and can run on a worker. It returns the plan for apply, or None when there's nothing to do.
+# apply makes the edits and always runs in the parent, one feature class at a time. A stage with no scan does all its work in apply.
+stages = {'fcode' : (fcode_scan, fcode_apply),
+		'explode' : (explode_scan, explode_apply),
+		'repair' : (repair_scan, repair_apply),
+		'metrics' : (None, metrics_apply)}
+
+#-----------------------------------
+def stage_error(name, fc, log, failed, metrics): # Records the exception being handled as a failure of the stage, not just a message
+	failed[name] = traceback.format_exc()
+	log.append(('error', "{0} failed on {1}:\n{2}".format(name, fc, failed[name])))
+	metrics['error'] = failed[name].strip().splitlines()[-1]
+	return metrics
+
+#-----------------------------------
+def run_fc_stages(job): # Worker entry point. job = (workspace, [stage names], fc, FeatureClassInfo). Only runs the read only scans.
+	# Returns (fc, {stage: plan}, messages, {stage: run report metrics}, {stage: traceback}). Metrics are measured in the worker.
+	# The FeatureClassInfo comes from the parent's dataset snapshot so workers never describe the dataset themselves.
+	workspace, names, fc, info = job
+	log = []
+	plans = {}
+	metrics = {}
+	failed = {}
+	try:
+		ap.env.workspace = workspace
+		ap.env.overwriteOutput = True
+	except Exception:
+		for name in names:
+			stage_error(name, fc, log, failed, {})
+		return fc, plans, log, metrics, failed
+	for name in names:
+		scan = stages[name][0]
+		if scan is None:
+			continue
+		rows = {'read' : 0, 'written' : 0}
+		start = snapshot()
+		try:
+			plans[name] = scan(fc, info, log, rows)
+			metrics[name] = elapsed(start, rows)
+		except Exception:
+			metrics[name] = stage_error(name, fc, log, failed, elapsed(start, rows))
+	return fc, plans, log, metrics, failed
+
+#-----------------------------------
+def apply_fc_stages(names, info, scanned): # Makes the edits for one feature class in this process. Returns (fc, {stage: result}, messages, {stage: metrics}, {stage: traceback}).
+	fc, plans, log, metrics, failed = scanned
+	results = {}
+	for name in names:
+		if name in failed:
+			continue
+		scan, apply = stages[name]
+		plan = plans.get(name)
+		if scan is not None and plan is None:
+			results[name] = 0 # The scan found nothing to do
+			continue
+		rows = {'read' : 0, 'written' : 0}
+		start = snapshot()
+		try:
+			results[name] = apply(fc, info, plan, log, rows)
+			applied = elapsed(start, rows)
+		except Exception:
+			applied = stage_error(name, fc, log, failed, elapsed(start, rows))
+		metrics[name] = combine(metrics[name], applied) if name in metrics else applied
+	return fc, results, log, metrics, failed
+
+#-----------------------------------
+def pool_executable(): # ArcMap and ArcGIS Pro run the tool inside their own exe, so point the workers at the Python next to it
+	if sys.platform != 'win32':
+		return None
+	for exe in ('pythonw.exe', 'python.exe'):
+		path = os.path.join(sys.exec_prefix, exe)
+		if os.path.isfile(path):
+			return path
+	return None
+
+#-----------------------------------
+def run_stages(names, workspace, featureclass, workers=1, needs=None): # Runs the named stages over every feature class. Yields apply_fc_stages results in feature class order.
+	# needs(fc, stage) can veto a stage for a feature class, e.g. PreflightReport.needs. Feature classes left with nothing to do are skipped.
+	# The scans go out to the pool. Each result gets its edits applied here as it comes back, so only this process ever writes.
+	snap = dataset_snapshot(workspace)
+	jobs = []
+	for fc in featureclass:
+		todo = [name for name in names if needs is None or needs(fc, name)]
+		if todo:
+			jobs.append((workspace, todo, fc, snap.info(fc)))
+	if not jobs:
+		return
+	if workers <= 1 or len(jobs) <= 1 or all(stages[name][0] is None for name in names):
+		for job in jobs:
+			yield apply_fc_stages(job[1], job[3], run_fc_stages(job))
+		return
+	exe = pool_executable()
+	if exe:
+		multiprocessing.set_executable(exe)
+	pool = multiprocessing.Pool(min(workers, len(jobs)))
+	try:
+		for job, scanned in zip(jobs, pool.imap(run_fc_stages, jobs)):
+			yield apply_fc_stages(job[1], job[3], scanned)
+	finally:
+		pool.close()
+		pool.join()
+
+#-----------------------------------
+def relay(log, write, warn, error): # Replays worker messages in the geoprocessing window
+	emit = {'message' : write, 'warning' : warn, 'error' : error}
+	for level, text in log:
+		emit[level](text)
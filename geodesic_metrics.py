@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# Geodesic Metrics v1        #
+#         2026-10-18         #
+# ========================== #
+import math
+import time
+import numpy as np
+from geometry_check import wkb_layout, run_xy
+
+#            _______________________________
+#           | Native stand in for the       |
+#           | Defense Calculate Metrics     |
+#           | tool. Geodesic LZN, ARA, and  |
+#           | WID on WGS84 worked out from  |
+#           | the vertex arrays of a whole  |
+#           | feature class at once, and    |
+#           | only written where the field  |
+#           | exists and the value changed. |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+# WGS84
+wgs84_a = 6378137.0
+wgs84_f = 1 / 298.257223563
+wgs84_b = wgs84_a * (1 - wgs84_f)
+wgs84_e2 = wgs84_f * (2 - wgs84_f)
+wgs84_wkid = 4326
+
+# Field each metric goes in. Lines get LZN. Polygons get ARA plus LZN and WID from their minimum bounding rectangle, same as the Defense tool.
+metric_fields = ['lzn', 'ara', 'wid']
+decimals = 3 # Values are compared and written at this many decimals so float noise doesn't count as a change
+
+
+
+#-----------------------------------
+def wrap_radians(d): # Longitude differences into [-pi, pi] so segments across the antimeridian stay short
+	return (d + math.pi) % (2 * math.pi) - math.pi
+
+#-----------------------------------
+def geodesic_lengths(lon1, lat1, lon2, lat2, iterations=50): # Vincenty inverse on WGS84 for arrays of segments in degrees. Returns meters.
+	# Segments in a cell are short so it converges in a handful of passes. The nearly antipodal pairs where Vincenty
+	# struggles never show up in MGCP data, but anything still unconverged keeps its last estimate instead of failing.
+	a, b, f = wgs84_a, wgs84_b, wgs84_f
+	L = wrap_radians(np.radians(lon2 - lon1))
+	U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+	U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+	sinU1, cosU1 = np.sin(U1), np.cos(U1)
+	sinU2, cosU2 = np.sin(U2), np.cos(U2)
+	lam = L.copy()
+	with np.errstate(invalid='ignore', divide='ignore'):
+		for i in range(iterations):
+			sinLam, cosLam = np.sin(lam), np.cos(lam)
+			sinSigma = np.hypot(cosU2 * sinLam, cosU1 * sinU2 - sinU1 * cosU2 * cosLam)
+			cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLam
+			sigma = np.arctan2(sinSigma, cosSigma)
+			sinAlpha = np.where(sinSigma == 0, 0.0, cosU1 * cosU2 * sinLam / sinSigma)
+			cos2Alpha = 1 - sinAlpha ** 2
+			cos2SigmaM = np.where(cos2Alpha == 0, 0.0, cosSigma - 2 * sinU1 * sinU2 / cos2Alpha) # Equatorial lines
+			C = f / 16 * cos2Alpha * (4 + f * (4 - 3 * cos2Alpha))
+			last = lam
+			lam = L + (1 - C) * f * sinAlpha * (sigma + C * sinSigma * (cos2SigmaM + C * cosSigma * (-1 + 2 * cos2SigmaM ** 2)))
+			if (np.abs(lam - last) < 1e-12).all():
+				break
+	u2 = cos2Alpha * (a * a - b * b) / (b * b)
+	A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+	B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+	dSigma = B * sinSigma * (cos2SigmaM + B / 4 * (cosSigma * (-1 + 2 * cos2SigmaM ** 2) - B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) * (-3 + 4 * cos2SigmaM ** 2)))
+	return b * A * (sigma - dSigma)
+
+#-----------------------------------
+def authalic_latitude(lat): # Latitude on the sphere with the same surface area as WGS84, in radians. Areas there match the ellipsoid.
+	e = math.sqrt(wgs84_e2)
+	q = lambda s: (1 - wgs84_e2) * (s / (1 - wgs84_e2 * s * s) - np.log((1 - e * s) / (1 + e * s)) / (2 * e))
+	qp = q(1.0)
+	return np.arcsin(np.clip(q(np.sin(np.radians(lat))) / qp, -1.0, 1.0)), qp
+
+#-----------------------------------
+def edge_excess(lon1, beta1, lon2, beta2): # Signed spherical excess between each edge and the equator, radians in, steradians out
+	dlon = wrap_radians(np.radians(lon2 - lon1))
+	return 2 * np.arctan2(np.tan(dlon / 2) * np.sin((beta1 + beta2) / 2), np.cos((beta1 - beta2) / 2))
+
+#-----------------------------------
+def local_xy(lon, lat, bounds): # Meters on the plane tangent at the middle of each feature, using the WGS84 radii of curvature there
+	# bounds[k]:bounds[k + 1] are the vertices of feature k. Every feature gets its own plane in one pass.
+	starts = bounds[:-1][bounds[:-1] < bounds[1:]]
+	sizes = np.diff(np.r_[starts, len(lon)])
+	lat0 = np.radians(np.repeat((np.minimum.reduceat(lat, starts) + np.maximum.reduceat(lat, starts)) / 2.0, sizes))
+	lon0 = np.repeat((np.minimum.reduceat(lon, starts) + np.maximum.reduceat(lon, starts)) / 2.0, sizes)
+	w = np.sqrt(1 - wgs84_e2 * np.sin(lat0) ** 2)
+	N = wgs84_a / w
+	M = wgs84_a * (1 - wgs84_e2) / w ** 3
+	return np.radians(((lon - lon0 + 180) % 360) - 180) * N * np.cos(lat0), (np.radians(lat) - lat0) * M
+
+#-----------------------------------
+def convex_hull(x, y): # Monotone chain over plain lists of floats. Returns the hull vertex indices counter clockwise.
+	pts = sorted(range(len(x)), key=lambda i: (x[i], y[i]))
+	if len(pts) < 3:
+		return pts
+	hull = []
+	for chain in (pts, pts[::-1]):
+		half = []
+		for p in chain:
+			while len(half) > 1:
+				o, q = half[-2], half[-1]
+				if (x[q] - x[o]) * (y[p] - y[o]) - (y[q] - y[o]) * (x[p] - x[o]) > 0:
+					break
+				half.pop()
+			half.append(p)
+		hull += half[:-1]
+	return hull
+
+#-----------------------------------
+def min_rectangle(x, y): # (long side, short side) of the minimum area rectangle around a convex hull given counter clockwise
+	# Rotating calipers. One side of the rectangle always lies along a hull edge, and as that edge turns the
+	# far side, the top, and the near side only ever move forward, so the whole hull takes one lap of each.
+	h = len(x)
+	best = None
+	right = top = left = None
+	for i in range(h):
+		j = (i + 1) % h
+		dx, dy = x[j] - x[i], y[j] - y[i]
+		norm = math.hypot(dx, dy)
+		if not norm:
+			continue
+		ux, uy = dx / norm, dy / norm
+		along = lambda k: x[k] * ux + y[k] * uy
+		up = lambda k: y[k] * ux - x[k] * uy # Distance to the left of the edge, where the hull is
+		if right is None:
+			right = j
+		while along((right + 1) % h) > along(right):
+			right = (right + 1) % h
+		if top is None:
+			top = right
+		while up((top + 1) % h) > up(top):
+			top = (top + 1) % h
+		if left is None:
+			left = top
+		while along((left + 1) % h) < along(left):
+			left = (left + 1) % h
+		length = along(right) - along(left)
+		width = up(top) - up(i)
+		if best is None or length * width < best[0]:
+			best = (length * width, max(length, width), min(length, width))
+	return best[1:] if best else (0.0, 0.0)
+
+#-----------------------------------
+def bounding_rectangles(x, y, bounds): # (long sides, short sides) of every feature's minimum area bounding rectangle
+	# bounds[k]:bounds[k + 1] are the vertices of feature k. Linear per feature after its hull.
+	count = len(bounds) - 1
+	long_side = np.zeros(count)
+	short_side = np.zeros(count)
+	# Degenerate features (a point or a straight line) have no area. Their length is the diagonal of their extent.
+	filled = np.nonzero(bounds[:-1] < bounds[1:])[0]
+	if len(filled):
+		starts = bounds[filled]
+		long_side[filled] = np.hypot(np.maximum.reduceat(x, starts) - np.minimum.reduceat(x, starts),
+									np.maximum.reduceat(y, starts) - np.minimum.reduceat(y, starts))
+	xs, ys = x.tolist(), y.tolist()
+	for k in filled:
+		fx, fy = xs[bounds[k]:bounds[k + 1]], ys[bounds[k]:bounds[k + 1]]
+		h = convex_hull(fx, fy)
+		if len(h) >= 3:
+			long_side[k], short_side[k] = min_rectangle([fx[i] for i in h], [fy[i] for i in h])
+	return long_side, short_side
+
+#-----------------------------------
+def read_vertices(fc, where=None): # Every feature's vertices in WGS84 from one cursor. Returns (oids, kind, lon, lat, run ids, run owners).
+	import arcpy as ap
+	oids = []
+	lons = []
+	lats = []
+	run_ids = []
+	owners = []
+	kind = None
+	sr = ap.SpatialReference(wgs84_wkid) # The cursor projects on the fly if the data isn't in WGS84 already
+	with ap.da.SearchCursor(fc, ['OID@', 'SHAPE@WKB'], where, sr) as scursor:
+		for oid, wkb in scursor:
+			if wkb is None:
+				continue
+			buf = bytes(wkb)
+			kind, runs = wkb_layout(buf)
+			for run in runs:
+				xy = run_xy(buf, run)
+				lons.append(xy[:, 0])
+				lats.append(xy[:, 1])
+				run_ids.append(np.full(len(xy), len(owners), dtype=np.int64))
+				owners.append(len(oids))
+			oids.append(oid)
+	cat = lambda arrays, dtype: np.concatenate(arrays).astype(dtype) if arrays else np.zeros(0, dtype)
+	return oids, kind, cat(lons, np.float64), cat(lats, np.float64), cat(run_ids, np.int64), np.array(owners, dtype=np.int64)
+
+#-----------------------------------
+def compute_metrics(kind, lon, lat, run_ids, owners, count): # {field: array of values per feature}. Runs without arcpy.
+	metrics = {}
+	if kind not in ('line', 'polygon') or not len(lon):
+		return metrics
+	# Segments are consecutive vertices of the same run. Rings come closed so their closing edge is already in there.
+	same = run_ids[1:] == run_ids[:-1]
+	seg_run = run_ids[1:][same]
+	seg_owner = owners[seg_run]
+	if kind == 'line':
+		lengths = geodesic_lengths(lon[:-1][same], lat[:-1][same], lon[1:][same], lat[1:][same])
+		metrics['lzn'] = np.bincount(seg_owner, lengths, count)
+		return metrics
+
+	# Area on the authalic sphere. Exterior rings and holes wind opposite ways, so the signed sum per feature nets out the holes.
+	beta, qp = authalic_latitude(lat)
+	excess = edge_excess(lon[:-1][same], beta[:-1][same], lon[1:][same], beta[1:][same])
+	radius2 = wgs84_a * wgs84_a * qp / 2.0
+	metrics['ara'] = np.abs(np.bincount(seg_owner, excess, count)) * radius2
+
+	# LZN and WID come from each feature's minimum bounding rectangle on the local tangent plane
+	bounds = np.searchsorted(owners[run_ids], np.arange(count + 1))
+	x, y = local_xy(lon, lat, bounds)
+	metrics['lzn'], metrics['wid'] = bounding_rectangles(x, y, bounds)
+	return metrics
+
+#-----------------------------------
+def fc_metrics(fc, where=None): # (oids, {field: values}) for fc without writing anything
+	oids, kind, lon, lat, run_ids, owners = read_vertices(fc, where)
+	return oids, compute_metrics(kind, lon, lat, run_ids, owners, len(oids))
+
+#-----------------------------------
+def changed_value(old, new): # True if new rounded to the stored precision differs from what is there
+	if old is None:
+		return True
+	try:
+		return round(float(old), decimals) != round(float(new), decimals)
+	except (TypeError, ValueError):
+		return True
+
+#-----------------------------------
+def populate_metrics(fc, field_names, rows=None): # Writes LZN, ARA, and WID where the field exists and the value changed. Returns (features changed, {field: values changed}).
+	# field_names is the list of lowercase fields in fc. The geometry is read once for the metrics, then one
+	# UpdateCursor pass compares every row and only writes the ones that changed.
+	import arcpy as ap
+	rows = rows if rows is not None else {'read' : 0, 'written' : 0}
+	oids, metrics = fc_metrics(fc)
+	rows['read'] += len(oids)
+	fields = [name for name in metric_fields if name in field_names and name in metrics]
+	if not fields:
+		return 0, {}
+	new = dict((oid, [round(float(metrics[name][k]), decimals) for name in fields]) for k, oid in enumerate(oids))
+	field_counts = dict((name, 0) for name in fields)
+	written = 0
+	with ap.da.UpdateCursor(fc, ['OID@'] + fields) as ucursor:
+		for urow in ucursor:
+			values = new.get(urow[0])
+			if values is None:
+				continue
+			diff = [i for i in range(len(fields)) if changed_value(urow[i + 1], values[i])]
+			if diff:
+				ucursor.updateRow([urow[0]] + values)
+				written += 1
+				for i in diff:
+					field_counts[fields[i]] += 1
+	rows['written'] += written
+	return written, field_counts
+
+#-----------------------------------
+def benchmark_defense(fc, scratch="in_memory"): # Times the native metrics against CalculateMetrics_defense on a scratch copy of fc and compares the values
+	# Needs the Defense Mapping license checked out. Nothing in fc itself gets written.
+	import arcpy as ap
+	tmp = "{0}\\metrics_{1}".format(scratch, fc)
+	ap.CopyFeatures_management(fc, tmp)
+	try:
+		start = time.time()
+		oids, native = fc_metrics(tmp)
+		native_s = time.time() - start
+		start = time.time()
+		ap.CalculateMetrics_defense(tmp, "LENGTH;WIDTH;AREA", "LZN", "WID", "ARA", "#", "#", "#")
+		defense_s = time.time() - start
+		fields = [name for name in metric_fields if name in native]
+		with ap.da.SearchCursor(tmp, ['OID@'] + fields) as scursor:
+			defense = dict((srow[0], srow[1:]) for srow in scursor)
+		result = {'features' : len(oids), 'native_s' : native_s, 'defense_s' : defense_s}
+		for i, name in enumerate(fields):
+			theirs = np.array([defense[oid][i] if oid in defense and defense[oid][i] is not None else np.nan for oid in oids], dtype=np.float64)
+			diff = np.abs(native[name] - theirs)
+			rel = diff / np.maximum(np.abs(theirs), 1e-9)
+			known = ~np.isnan(diff)
+			result[name] = {'max_abs' : float(diff[known].max()) if known.any() else None,
+							'median_rel' : float(np.median(rel[known])) if known.any() else None}
+		return result
+	finally:
+		ap.Delete_management(tmp)
+
+#-----------------------------------
+def describe_benchmark(fc, result): # One line summary of benchmark_defense
+	parts = ["{0}: {1} features, native {2:.2f} s vs Defense {3:.2f} s".format(fc, result['features'], result['native_s'], result['defense_s'])]
+	for name in metric_fields:
+		if name in result and result[name]['max_abs'] is not None:
+			parts.append("{0} max diff {1:.3f} m, median {2:.4%}".format(name.upper(), result[name]['max_abs'], result[name]['median_rel']))
+	return ", ".join(parts)
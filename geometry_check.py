@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# Geometry Validity Check v1 #
+#         2026-10-18         #
+# ========================== #
+import struct
+from collections import Counter
+import numpy as np
+
+#            _______________________________
+#           | Finds the features that       |
+#           | actually need Repair Geometry |
+#           | instead of running it on      |
+#           | everything. Reads the shapes  |
+#           | as WKB and checks each ring   |
+#           | or line with NumPy.           |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+# What the checker counts, in report order
+issues = [('null', "NULL or empty geometry"),
+		('unclosed', "Unclosed rings"),
+		('duplicate', "Duplicate consecutive vertices"),
+		('zero_length', "Zero length segments"),
+		('self_intersection', "Self intersecting rings")]
+
+pair_block = 1000000 # Segment pairs compared at once in the self intersection test
+
+
+
+#-----------------------------------
+def wkb_layout(wkb): # Walks WKB. Returns (kind, [(byte offset, vertex count, dims, byte order)]) for every point run.
+	# kind is 'point', 'line', or 'polygon'. Polygon runs are rings.
+	buf = bytes(wkb)
+	runs = []
+	kinds = set()
+
+	def read(offset):
+		order = '<' if struct.unpack_from('B', buf, offset)[0] == 1 else '>'
+		raw = struct.unpack_from(order + 'I', buf, offset + 1)[0]
+		dims = 2 + bool(raw & 0x80000000) + bool(raw & 0x40000000) # EWKB Z and M flags
+		base = raw & 0xFFFF
+		if base >= 1000: # ISO Z, M, and ZM codes
+			dims = {1 : 3, 2 : 3, 3 : 4}.get(base // 1000, 2)
+			base = base % 1000
+		offset += 5
+		if base == 1:
+			kinds.add('point')
+			runs.append((offset, 1, dims, order))
+			return offset + 8 * dims
+		if base == 2:
+			kinds.add('line')
+			return read_points(offset, order, dims)
+		if base == 3:
+			kinds.add('polygon')
+			count = struct.unpack_from(order + 'I', buf, offset)[0]
+			offset += 4
+			for i in range(count):
+				offset = read_points(offset, order, dims)
+			return offset
+		# Multi types and collections are just a list of the above
+		count = struct.unpack_from(order + 'I', buf, offset)[0]
+		offset += 4
+		for i in range(count):
+			offset = read(offset)
+		return offset
+
+	def read_points(offset, order, dims):
+		n = struct.unpack_from(order + 'I', buf, offset)[0]
+		runs.append((offset + 4, n, dims, order))
+		return offset + 4 + 8 * n * dims
+
+	read(0)
+	kind = 'polygon' if 'polygon' in kinds else 'line' if 'line' in kinds else 'point'
+	return kind, runs
+
+#-----------------------------------
+def run_xy(buf, run): # (n, 2) view of the x, y columns of one point run. Writable if buf is a bytearray.
+	offset, n, dims, order = run
+	return np.frombuffer(buf, order + 'f8', n * dims, offset).reshape(n, dims)[:, :2]
+
+#-----------------------------------
+def wkb_parts(wkb): # Splits WKB into (kind, [(n, 2) vertex arrays]). Polygon parts are rings.
+	buf = bytes(wkb)
+	kind, runs = wkb_layout(buf)
+	return kind, [run_xy(buf, run) for run in runs]
+
+#-----------------------------------
+def segments_cross(p): # True if any two non-adjacent segments of the closed ring p touch or cross
+	a = p[:-1]
+	b = p[1:]
+	n = len(a)
+	if n < 4:
+		return False
+	lo = np.minimum(a, b)
+	hi = np.maximum(a, b)
+	# Sweep along x: sorted by their left end, segment k can only meet the segments after it that start before it ends
+	order = np.argsort(lo[:, 0], kind='mergesort')
+	start_x = lo[order, 0]
+	end = np.searchsorted(start_x, hi[order, 0], side='right')
+	count = end - np.arange(n) - 1
+	first = 0
+	while first < n:
+		# Take as many segments as fit in one block of candidate pairs
+		last = first + max(1, int(np.searchsorted(np.cumsum(count[first:]), pair_block, side='right')))
+		last = min(last, n)
+		reps = count[first:last]
+		if reps.sum():
+			k = np.repeat(np.arange(first, last), reps)
+			offset = np.arange(len(k)) - np.repeat(np.cumsum(reps) - reps, reps)
+			ii = order[k]
+			jj = order[k + 1 + offset]
+			gap = np.abs(ii - jj)
+			# Neighbouring segments share a vertex. So do the first and last segments through the closing vertex.
+			near = (gap > 1) & (gap != n - 1) & (lo[ii, 1] <= hi[jj, 1]) & (lo[jj, 1] <= hi[ii, 1])
+			ii = ii[near]
+			jj = jj[near]
+			if len(ii):
+				a0, a1, b0, b1 = a[ii], b[ii], a[jj], b[jj]
+				o1 = orient(a0, a1, b0)
+				o2 = orient(a0, a1, b1)
+				o3 = orient(b0, b1, a0)
+				o4 = orient(b0, b1, a1)
+				if ((o1 * o2 <= 0) & (o3 * o4 <= 0)).any():
+					return True
+		first = last
+	return False
+
+#-----------------------------------
+def orient(p, q, r): # Sign of the cross product (q - p) x (r - p) for rows of points
+	return np.sign((q[:, 0] - p[:, 0]) * (r[:, 1] - p[:, 1]) - (q[:, 1] - p[:, 1]) * (r[:, 0] - p[:, 0]))
+
+#-----------------------------------
+def check_parts(kind, parts, tolerance=0.0): # Counter of the issues found in one feature
+	found = Counter()
+	if not parts or not any(len(p) for p in parts):
+		found['null'] += 1
+		return found
+	if kind == 'point':
+		return found
+	for p in parts:
+		if len(p) < 2:
+			continue
+		step = np.diff(p, axis=0)
+		length = np.hypot(step[:, 0], step[:, 1])
+		if (length == 0).any():
+			found['duplicate'] += 1
+		if ((length > 0) & (length <= tolerance)).any():
+			found['zero_length'] += 1
+		if kind == 'polygon':
+			if (p[0] != p[-1]).any():
+				found['unclosed'] += 1
+			elif segments_cross(p[np.r_[True, length > 0]]): # Duplicates would look like touching segments
+				found['self_intersection'] += 1
+	return found
+
+#-----------------------------------
+def check_fc(fc, tolerance=None): # Checks every feature in fc. Returns ({oid: Counter of issues} for the flagged features, Counter totals plus 'features' checked).
+	import arcpy as ap
+	if tolerance is None:
+		tolerance = ap.Describe(fc).spatialReference.XYTolerance or 0.0
+	flagged = {}
+	totals = Counter()
+	with ap.da.SearchCursor(fc, ['OID@', 'SHAPE@WKB']) as scursor:
+		for oid, wkb in scursor:
+			totals['features'] += 1
+			if wkb is None:
+				found = Counter(null=1)
+			else:
+				kind, parts = wkb_parts(wkb)
+				found = check_parts(kind, parts, tolerance)
+			if found:
+				flagged[oid] = found
+				totals.update(found)
+	return flagged, totals
+
+#-----------------------------------
+def repair_oids(fc, oids, where_clauses): # Repair Geometry on only the given OIDs through a feature layer with a definition query
+	import arcpy as ap
+	lyr = "repair_" + fc
+	for where in where_clauses(fc, oids):
+		ap.MakeFeatureLayer_management(fc, lyr, where)
+		ap.RepairGeometry_management(lyr, "DELETE_NULL")
+		ap.Delete_management(lyr)
+
+#-----------------------------------
+def describe(fc, totals): # One line summary of the issues found in fc
+	found = ["{0} {1}".format(totals[key], label.lower()) for key, label in issues if totals[key]]
+	return "{0}: {1}".format(fc, ", ".join(found) if found else "no geometry issues")
@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# Imagery Footprint Index v1 #
+#         2026-10-18         #
+# ========================== #
+import hashlib
+import math
+import os
+import time
+from datetime import datetime as dt
+import numpy as np
+
+#            _______________________________
+#           | Loads the imagery footprint   |
+#           | polygons once and keeps them  |
+#           | in a uniform grid over their  |
+#           | bounding boxes so each feature|
+#           | only gets tested against the  |
+#           | footprints that could hold it.|
+#           | Also has a pure NumPy point   |
+#           | in polygon engine that runs   |
+#           | without arcpy.                |
+#           | The parsed footprints get     |
+#           | cached next to the shapefile  |
+#           | so later runs skip the read.  |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+img_fields = ['Acquisitio', 'SHAPE@'] # Acquisition date for the imagery footprint polygons and the shape token for comparisons
+shp_parts = ['.shp', '.shx', '.dbf', '.prj'] # Shapefile sidecars that change the footprint polygons or dates
+cache_suffix = '.footprint_cache.npz'
+cache_version = 2 # Bump when the cache layout changes
+
+
+
+#-----------------------------------
+def shape_extent(shape): # (xmin, ymin, xmax, ymax) of an arcpy geometry
+	ext = shape.extent
+	return (ext.XMin, ext.YMin, ext.XMax, ext.YMax)
+
+#-----------------------------------
+def polygon_rings(shape): # Splits an arcpy polygon into a list of (n, 2) vertex arrays, one per ring. Interior rings are separated by None points.
+	rings = []
+	for part in shape:
+		ring = []
+		for pnt in part:
+			if pnt is None:
+				if ring:
+					rings.append(np.array(ring, dtype=np.float64))
+				ring = []
+				continue
+			ring.append((pnt.X, pnt.Y))
+		if ring:
+			rings.append(np.array(ring, dtype=np.float64))
+	return rings
+
+#-----------------------------------
+def polygon_parts(shape): # Number of rings in each part of an arcpy polygon, so the flat polygon_rings list can be grouped back into parts
+	parts = []
+	for part in shape:
+		count = 0
+		started = False
+		for pnt in part:
+			if pnt is None:
+				started = False
+				continue
+			if not started:
+				count += 1
+				started = True
+		if count:
+			parts.append(count)
+	return parts
+
+#-----------------------------------
+def rings_extent(rings): # (xmin, ymin, xmax, ymax) of a list of vertex arrays
+	allv = np.concatenate(rings)
+	return (allv[:,0].min(), allv[:,1].min(), allv[:,0].max(), allv[:,1].max())
+
+#-----------------------------------
+def points_in_rings(x, y, rings): # Vectorized even-odd ray casting. Returns a boolean array of which points fall inside the polygon.
+	# Holes fall out of the even-odd rule on their own since every ring is crossed the same way.
+	inside = np.zeros(x.shape, dtype=bool)
+	for ring in rings:
+		xj = ring[:,0]
+		yj = ring[:,1]
+		xk = np.roll(xj, -1)
+		yk = np.roll(yj, -1)
+		for j in range(len(ring)): # Loops over the handful of footprint edges and stays vectorized over the points
+			if yj[j] == yk[j]:
+				continue
+			crosses = (yj[j] > y) != (yk[j] > y)
+			if not crosses.any():
+				continue
+			x_int = (xk[j] - xj[j]) * (y[crosses] - yj[j]) / (yk[j] - yj[j]) + xj[j]
+			hit = np.zeros(x.shape, dtype=bool)
+			hit[crosses] = x[crosses] < x_int
+			inside ^= hit
+	return inside
+
+#-----------------------------------
+def iter_footprint_hits(x, y, polygons, extents=None): # Yields (footprint index, indices of the points inside it) for each footprint in cursor order
+	x = np.asarray(x, dtype=np.float64)
+	y = np.asarray(y, dtype=np.float64)
+	for i, rings in enumerate(polygons):
+		if not rings:
+			continue
+		e = extents[i] if extents is not None else rings_extent(rings)
+		# Bounding box prefilter before the ray casting
+		cand = np.nonzero((x >= e[0]) & (x <= e[2]) & (y >= e[1]) & (y <= e[3]))[0]
+		if not len(cand):
+			continue
+		inside = points_in_rings(x[cand], y[cand], rings)
+		if inside.any():
+			yield i, cand[inside]
+
+#-----------------------------------
+def assign_footprints(x, y, polygons, extents=None): # Returns the index of the matching footprint for every point, -1 where none match
+	# Footprints are applied in cursor order so overlapping strips resolve to the last one, same as the cursor loop
+	match = np.full(len(x), -1, dtype=np.int64)
+	for i, hits in iter_footprint_hits(x, y, polygons, extents):
+		match[hits] = i
+	return match
+
+#-----------------------------------
+def benchmark(n_points=100000, n_footprints=200, n_vertices=12, seed=0): # Times assign_footprints on random strips. Runs without arcpy.
+	rng = np.random.RandomState(seed)
+	polygons = []
+	for i in range(n_footprints):
+		cx, cy = rng.uniform(0, 1, 2)
+		ang = np.sort(rng.uniform(0, 2 * np.pi, n_vertices))
+		rad = rng.uniform(0.02, 0.1, n_vertices)
+		ring = np.column_stack((cx + rad * np.cos(ang), cy + rad * np.sin(ang)))
+		polygons.append([np.vstack((ring, ring[:1]))])
+	extents = [rings_extent(rings) for rings in polygons]
+	x = rng.uniform(0, 1, n_points)
+	y = rng.uniform(0, 1, n_points)
+	start = time.time()
+	match = assign_footprints(x, y, polygons, extents)
+	elapsed = time.time() - start
+	print("{0} points x {1} footprints: {2:.3f} s, {3} points matched".format(n_points, n_footprints, elapsed, int((match >= 0).sum())))
+	return elapsed
+
+
+#-----------------------------------
+def source_files(img_foot): # Files on disk that make up the imagery footprint. Empty if it lives inside a geodatabase.
+	base, ext = os.path.splitext(img_foot)
+	if ext.lower() != '.shp' or not os.path.isfile(img_foot):
+		return []
+	return [base + part for part in shp_parts if os.path.isfile(base + part)]
+
+#-----------------------------------
+def fingerprint(img_foot): # (path, size, mtime, content hash) of the footprint files or None if they can't be fingerprinted
+	files = source_files(img_foot)
+	if not files:
+		return None
+	md5 = hashlib.md5()
+	size = 0
+	mtime = 0.0
+	for path in files:
+		stat = os.stat(path)
+		size += stat.st_size
+		mtime = max(mtime, stat.st_mtime)
+		with open(path, 'rb') as f:
+			for chunk in iter(lambda: f.read(1 << 20), b''):
+				md5.update(chunk)
+	return (os.path.normcase(os.path.abspath(img_foot)), size, mtime, md5.hexdigest())
+
+#-----------------------------------
+def cache_path(img_foot): # Sidecar cache file next to the footprint shapefile
+	return os.path.splitext(img_foot)[0] + cache_suffix
+
+#-----------------------------------
+def date_text(value): # Acquisition value as a string the cache can hold without pickling
+	if value is None:
+		return ''
+	if isinstance(value, dt):
+		return 'd:' + value.strftime('%Y-%m-%dT%H:%M:%S')
+	return 's:' + str(value)
+
+#-----------------------------------
+def text_date(text): # Inverse of date_text
+	if not text:
+		return None
+	if text[:2] == 'd:':
+		return dt.strptime(text[2:], '%Y-%m-%dT%H:%M:%S')
+	return text[2:]
+
+
+#-----------------------------------
+class FootprintSet(object):
+	# The imagery footprint polygons as NumPy rings, bounding boxes, and acquisition dates.
+	# Indexing gives (acquisition, arcpy polygon) like the old list of cursor rows. The arcpy polygons
+	# are only built when something asks for them so the NumPy backend never touches arcpy geometry.
+	def __init__(self, dates, rings, extents, all_dates, sr_text='', shapes=None, parts=None):
+		self.dates = dates # Acquisition for each footprint with a shape, cursor order
+		self.rings = rings # List of (n, 2) vertex arrays for each footprint
+		self.extents = extents # (xmin, ymin, xmax, ymax) for each footprint
+		self.all_dates = all_dates # Every Acquisition value in the shapefile, including rows without a shape
+		self.sr_text = sr_text
+		self.shapes = shapes if shapes is not None else [None] * len(dates)
+		self.parts = parts if parts is not None else [[1] * len(r) for r in rings] # Rings in each part for each footprint
+		self.cached = False
+
+	def __len__(self):
+		return len(self.dates)
+
+	def __getitem__(self, i):
+		return (self.dates[i], self.shape(i))
+
+	def __iter__(self):
+		for i in range(len(self.dates)):
+			yield self[i]
+
+	def shape(self, i): # arcpy polygon for footprint i, rebuilt from the rings if it came from the cache
+		if self.shapes[i] is None:
+			import arcpy as ap
+			sr = None
+			if self.sr_text:
+				sr = ap.SpatialReference()
+				sr.loadFromString(self.sr_text)
+			# Each part is its exterior ring followed by its interior rings, split by None points the same way arcpy hands them out
+			parts = ap.Array()
+			rings = iter(self.rings[i])
+			for count in self.parts[i]:
+				part = ap.Array()
+				for r in range(count):
+					if r:
+						part.add(None)
+					for x, y in next(rings):
+						part.add(ap.Point(x, y))
+				parts.add(part)
+			self.shapes[i] = ap.Polygon(parts, sr)
+		return self.shapes[i]
+
+	def save(self, path, key): # Writes the cache. Goes through a temp file so a half written cache never gets loaded.
+		ring_list = [ring for rings in self.rings for ring in rings]
+		vertices = np.concatenate(ring_list) if ring_list else np.zeros((0, 2), dtype=np.float64)
+		ring_start = np.cumsum([0] + [len(ring) for ring in ring_list])
+		foot_start = np.cumsum([0] + [len(rings) for rings in self.rings])
+		part_list = [count for parts in self.parts for count in parts]
+		part_start = np.cumsum([0] + [len(parts) for parts in self.parts])
+		temp = path + '.tmp.npz'
+		np.savez(temp,
+			version=np.array([cache_version]),
+			key=np.array([key[0], str(key[1]), repr(key[2]), key[3]]),
+			dates=np.array([date_text(d) for d in self.dates] + ['']), # Trailing '' keeps the dtype a string when empty
+			all_dates=np.array([date_text(d) for d in self.all_dates] + ['']),
+			extents=np.array(self.extents, dtype=np.float64).reshape(-1, 4),
+			vertices=vertices,
+			ring_start=ring_start,
+			foot_start=foot_start,
+			part_rings=np.array(part_list, dtype=np.int64),
+			part_start=part_start,
+			sr_text=np.array([self.sr_text]))
+		if os.path.exists(path):
+			os.remove(path) # os.rename won't replace on Windows
+		os.rename(temp, path)
+
+	@classmethod
+	def load(cls, path, key): # Returns the cached footprints or None if the cache is missing, stale, or unreadable
+		if not os.path.isfile(path):
+			return None
+		try:
+			data = np.load(path)
+			try:
+				if int(data['version'][0]) != cache_version:
+					return None
+				if list(data['key']) != [key[0], str(key[1]), repr(key[2]), key[3]]:
+					return None
+				vertices = data['vertices']
+				ring_start = data['ring_start']
+				foot_start = data['foot_start']
+				rings = [[vertices[ring_start[r]:ring_start[r+1]] for r in range(foot_start[i], foot_start[i+1])] for i in range(len(foot_start) - 1)]
+				part_rings = data['part_rings']
+				part_start = data['part_start']
+				parts = [[int(c) for c in part_rings[part_start[i]:part_start[i+1]]] for i in range(len(part_start) - 1)]
+				dates = [text_date(t) for t in data['dates'][:-1]]
+				all_dates = [text_date(t) for t in data['all_dates'][:-1]]
+				extents = [tuple(e) for e in data['extents']]
+				sr_text = str(data['sr_text'][0])
+			finally:
+				if hasattr(data, 'close'):
+					data.close()
+		except Exception:
+			return None
+		footprints = cls(dates, rings, extents, all_dates, sr_text, parts=parts)
+		footprints.cached = True
+		return footprints
+
+#-----------------------------------
+def read_footprints(img_foot): # Reads the imagery footprint shapefile with arcpy into a FootprintSet
+	import arcpy as ap
+	dates = []
+	rings = []
+	extents = []
+	shapes = []
+	parts = []
+	all_dates = []
+	with ap.da.SearchCursor(img_foot, img_fields) as scursor: # ['Acquisitio', 'SHAPE@']
+		for srow in scursor:
+			all_dates.append(srow[0])
+			if srow[-1] is None: # A footprint without a shape can't hold anything
+				continue
+			dates.append(srow[0])
+			shapes.append(srow[-1])
+			rings.append(polygon_rings(srow[-1]))
+			parts.append(polygon_parts(srow[-1]))
+			extents.append(shape_extent(srow[-1]))
+	sr = ap.Describe(img_foot).spatialReference
+	sr_text = sr.exportToString() if sr is not None else ''
+	return FootprintSet(dates, rings, extents, all_dates, sr_text, shapes, parts)
+
+#-----------------------------------
+def load_footprints(img_foot, use_cache=True): # Footprints from the sidecar cache when it matches the source files, otherwise read and cache them
+	key = fingerprint(img_foot) if use_cache else None
+	if key is not None:
+		footprints = FootprintSet.load(cache_path(img_foot), key)
+		if footprints is not None:
+			return footprints
+	footprints = read_footprints(img_foot)
+	if key is not None:
+		try:
+			footprints.save(cache_path(img_foot), key)
+		except (IOError, OSError):
+			pass # Read only folder. Still works, just without the cache next time.
+	return footprints
+
+
+#-----------------------------------
+class FootprintIndex(object):
+	# Uniform grid over the footprint bounding boxes.
+	# Every grid cell keeps the indices of the footprints whose extent touches it. Candidates always come back
+	# sorted in the original cursor order so the SDV logic sees the footprints in the same sequence as a full scan.
+	def __init__(self, extents, cell_size=None):
+		self.extents = [tuple(float(v) for v in e) for e in extents]
+		self.grid = {}
+		if not self.extents:
+			self.cell_size = 1.0
+			self.origin = (0.0, 0.0)
+			self.limit = (-1, -1)
+			return
+		xmin = min(e[0] for e in self.extents)
+		ymin = min(e[1] for e in self.extents)
+		xmax = max(e[2] for e in self.extents)
+		ymax = max(e[3] for e in self.extents)
+		if not cell_size:
+			# Roughly one footprint per grid cell over the full extent
+			cell_size = math.sqrt(max((xmax - xmin) * (ymax - ymin), 0.0) / len(self.extents))
+			if cell_size <= 0:
+				cell_size = max(xmax - xmin, ymax - ymin, 1.0)
+		self.cell_size = float(cell_size)
+		self.origin = (xmin, ymin)
+		self.limit = self._cell(xmax, ymax)
+		for i, e in enumerate(self.extents):
+			for key in self._keys(e[0], e[1], e[2], e[3]):
+				self.grid.setdefault(key, []).append(i)
+
+	def __len__(self):
+		return len(self.extents)
+
+	def _cell(self, x, y):
+		return (int(math.floor((x - self.origin[0]) / self.cell_size)), int(math.floor((y - self.origin[1]) / self.cell_size)))
+
+	def _keys(self, xmin, ymin, xmax, ymax):
+		# Clamped to the grid so a huge extent doesn't walk thousands of empty cells
+		c0 = self._cell(xmin, ymin)
+		c1 = self._cell(xmax, ymax)
+		for i in range(max(c0[0], 0), min(c1[0], self.limit[0]) + 1):
+			for j in range(max(c0[1], 0), min(c1[1], self.limit[1]) + 1):
+				yield (i, j)
+
+	def candidates(self, x, y): # Indices of the footprints whose bounding box holds the point (x, y)
+		hits = []
+		for i in self.grid.get(self._cell(x, y), ()):
+			e = self.extents[i]
+			if e[0] <= x <= e[2] and e[1] <= y <= e[3]:
+				hits.append(i)
+		return hits
+
+	def candidates_extent(self, xmin, ymin, xmax, ymax): # Indices of the footprints whose bounding box touches the given extent
+		found = set()
+		for key in self._keys(xmin, ymin, xmax, ymax):
+			for i in self.grid.get(key, ()):
+				if i in found:
+					continue
+				e = self.extents[i]
+				if e[0] <= xmax and e[2] >= xmin and e[1] <= ymax and e[3] >= ymin:
+					found.add(i)
+		return sorted(found)
+
+
+
+if __name__ == '__main__':
+	benchmark()
@@ -48,6 +48,7 @@ import re
 # System Modules
 import os
 import sys
+from dataset_snapshot import dataset_snapshot
 
 
 
@@ -69,13 +70,14 @@ def MGCP_check(MGCP):
 		sys.exit(0)
 
 #-----------------------------------
-def disable_editor_tracking(featureclass): # Automatically disables editor tracking for each feature class that doesn't already have it disabled
+def disable_editor_tracking(featureclass, snap): # Automatically disables editor tracking for each feature class that doesn't already have it disabled
 	write("Disabling Editor Tracking")
 	firstl = False
 	for fc in featureclass:
-		if ap.Describe(fc).editorTrackingEnabled:
+		if snap.info(fc).editor_tracking:
 			try:
 				ap.DisableEditorTracking_management(fc)
+				snap.schema_changed(fc)
 				if not firstl:
 					write("\n")
 					firstl = True
@@ -126,13 +128,13 @@ def main(*argv):
 	topo_xml = argv[1]
 	### [2] Disable Editor Tracking - Boolean
 	disable = ap.GetParameter(2)
-	featureclass = ap.ListFeatureClasses()
-	featureclass.sort()
+	snap = dataset_snapshot(MGCP, refresh=True) # Feature classes and editor tracking state from one Describe
+	featureclass = list(snap.featureclass)
 	topo_path = os.path.join(MGCP, 'MGCP_Topology')
 	out_path = os.path.join(os.path.dirname(os.path.dirname(MGCP)), 'topology_errors')
 	write("\n\n~ Import and Validate Topology ~\n")
 
-	if disable: disable_editor_tracking(featureclass)
+	if disable: disable_editor_tracking(featureclass, snap)
 	check_defense('out')
 
 	write("\nImporting Defense Mapping TRDv4.5 Topology file...")
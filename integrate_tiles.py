@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# Tiled Utility Integrate v1 #
+#         2026-10-18         #
+# ========================== #
+import math
+import os
+import shutil
+import tempfile
+import traceback
+import multiprocessing
+import numpy as np
+from geometry_check import wkb_parts
+from dataset_snapshot import dataset_snapshot, spatial_reference
+
+#            _______________________________
+#           | Integrates the utility group  |
+#           | tile by tile instead of the   |
+#           | whole cell at once. Each tile |
+#           | gets its features plus a      |
+#           | margin copied to its own      |
+#           | scratch GDB so the tiles can  |
+#           | run in parallel without       |
+#           | fighting over locks. A serial |
+#           | pass over the tile seams      |
+#           | stitches them back together.  |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+# Utility feature classes and the Integrate ranks the finishing tool has always used. Points 2, lines 1, areas 3.
+utility_ranks = [('PowerP', 2), ('SubstatP', 2), ('UtilP', 2),
+				('PipeL', 1), ('PowerL', 1), ('TeleL', 1),
+				('PowerA', 3), ('SubstatA', 3)]
+meters_per_degree = 111320.0
+
+
+
+#-----------------------------------
+def feature_extents(fc): # (OIDs, (n, 4) array of xmin, ymin, xmax, ymax) for every feature with a shape
+	import arcpy as ap
+	oids = []
+	extents = []
+	with ap.da.SearchCursor(fc, ['OID@', 'SHAPE@WKB']) as scursor:
+		for oid, wkb in scursor:
+			if wkb is None:
+				continue
+			kind, parts = wkb_parts(wkb)
+			parts = [p for p in parts if len(p)]
+			if not parts:
+				continue
+			allv = np.concatenate(parts)
+			oids.append(oid)
+			extents.append((allv[:, 0].min(), allv[:, 1].min(), allv[:, 0].max(), allv[:, 1].max()))
+	return np.array(oids, dtype=np.int64), np.array(extents, dtype=np.float64).reshape(-1, 4)
+
+#-----------------------------------
+def map_units(sr, meters, extent): # Converts a distance in meters to the units of sr. Geographic takes the worst case longitude scale over the extent.
+	if sr.type != 'Geographic':
+		return meters / (sr.metersPerUnit or 1.0)
+	lat = min(max(abs(extent[1]), abs(extent[3])), 89.0)
+	return meters / (meters_per_degree * math.cos(math.radians(lat)))
+
+#-----------------------------------
+def tile_grid(extent, tiles): # tiles x tiles cores over extent. The last row and column reach the edge exactly.
+	xs = np.linspace(extent[0], extent[2], tiles + 1)
+	ys = np.linspace(extent[1], extent[3], tiles + 1)
+	return [(xs[i], ys[j], xs[i+1], ys[j+1]) for j in range(tiles) for i in range(tiles)]
+
+#-----------------------------------
+def touching(extents, box): # Mask of the extents that touch box
+	return (extents[:, 0] <= box[2]) & (extents[:, 2] >= box[0]) & (extents[:, 1] <= box[3]) & (extents[:, 3] >= box[1])
+
+#-----------------------------------
+def layers_extent(layers): # Combined extent of every feature in layers = {fc: (oids, extents)}, None if there aren't any
+	everything = np.concatenate([e for oids, e in layers.values() if len(e)] or [np.zeros((0, 4))])
+	if not len(everything):
+		return None
+	return (everything[:, 0].min(), everything[:, 1].min(), everything[:, 2].max(), everything[:, 3].max())
+
+#-----------------------------------
+def plan_tiles(layers, extent, cores, margin): # One job per tile that owns features. Tiles without utility features are dropped.
+	# Each feature is owned by the tile holding the center of its extent so it gets written back exactly once.
+	# The tile also gets every feature within margin of its core so snapping across the edge still sees its neighbours.
+	jobs = []
+	for n, core in enumerate(cores):
+		last_x = core[2] == extent[2]
+		last_y = core[3] == extent[3]
+		grown = (core[0] - margin, core[1] - margin, core[2] + margin, core[3] + margin)
+		owned = {}
+		members = {}
+		for fc, (oids, extents) in layers.items():
+			if not len(oids):
+				continue
+			cx = (extents[:, 0] + extents[:, 2]) / 2.0
+			cy = (extents[:, 1] + extents[:, 3]) / 2.0
+			own = (cx >= core[0]) & ((cx <= core[2]) if last_x else (cx < core[2])) & (cy >= core[1]) & ((cy <= core[3]) if last_y else (cy < core[3]))
+			if own.any():
+				owned[fc] = oids[own].tolist()
+			near = touching(extents, grown)
+			if near.any():
+				members[fc] = oids[near].tolist()
+		if owned:
+			jobs.append({'tile' : n, 'members' : members, 'owned' : owned})
+	return jobs
+
+#-----------------------------------
+def where_oids(fc, oids, oid_field=None): # Single where clause for the OIDs. MakeFeatureLayer only takes one.
+	# Workers pass the OID field name from the FeatureClassInfo they were handed instead of describing the dataset again
+	import arcpy as ap
+	oid_field = ap.AddFieldDelimiters(fc, oid_field or dataset_snapshot(ap.env.workspace).info(fc).oid_field)
+	oids = sorted(oids)
+	return " OR ".join("{0} IN ({1})".format(oid_field, ",".join(str(o) for o in oids[i:i+1000])) for i in range(0, len(oids), 1000))
+
+#-----------------------------------
+def integrate_tile(job): # Worker. Copies the tile's features to a scratch GDB, integrates them there, and returns the owned shapes that moved.
+	# job = (workspace, tolerance, tile, {fc: FeatureClassInfo}) so the worker never has to describe anything
+	import arcpy as ap
+	workspace, tolerance, tile, infos = job
+	scratch = tempfile.mkdtemp(prefix='integrate_tile_')
+	moved = {}
+	log = []
+	try:
+		ap.env.workspace = workspace
+		ap.env.overwriteOutput = True
+		gdb = ap.CreateFileGDB_management(scratch, 'tile.gdb').getOutput(0)
+		inputs = []
+		before = {}
+		for fc, rank in utility_ranks:
+			oids = tile['members'].get(fc)
+			if not oids:
+				continue
+			info = infos[fc]
+			out = ap.CreateFeatureclass_management(gdb, fc, info.shape_type.upper(), spatial_reference=spatial_reference(info),
+				has_z='ENABLED' if info.has_z else 'DISABLED', has_m='ENABLED' if info.has_m else 'DISABLED').getOutput(0)
+			ap.AddField_management(out, 'orig_oid', 'LONG')
+			with ap.da.SearchCursor(fc, ['OID@', 'SHAPE@'], where_oids(fc, oids, info.oid_field)) as scursor:
+				with ap.da.InsertCursor(out, ['orig_oid', 'SHAPE@']) as icursor:
+					for srow in scursor:
+						icursor.insertRow(srow)
+			with ap.da.SearchCursor(out, ['orig_oid', 'SHAPE@WKB']) as scursor:
+				before[fc] = dict((oid, bytes(wkb)) for oid, wkb in scursor if wkb is not None)
+			inputs.append("'{0}' {1}".format(out, rank))
+		ap.Integrate_management(";".join(inputs), tolerance)
+		for fc, rank in utility_ranks:
+			owned = set(tile['owned'].get(fc, ()))
+			if not owned or fc not in before:
+				continue
+			with ap.da.SearchCursor(os.path.join(gdb, fc), ['orig_oid', 'SHAPE@WKB']) as scursor:
+				changed = dict((oid, bytes(wkb)) for oid, wkb in scursor if oid in owned and wkb is not None and bytes(wkb) != before[fc].get(oid))
+			if changed:
+				moved[fc] = changed
+	except Exception:
+		log.append(('error', "Integrate failed on tile {0}:\n{1}".format(tile['tile'], traceback.format_exc())))
+	finally:
+		ap.ClearWorkspaceCache_management()
+		shutil.rmtree(scratch, ignore_errors=True)
+	return tile['tile'], moved, log
+
+#-----------------------------------
+def write_back(fc, shapes): # Writes the integrated shapes over the originals by OID
+	import arcpy as ap
+	written = 0
+	with ap.da.UpdateCursor(fc, ['OID@', 'SHAPE@WKB'], where_oids(fc, shapes.keys())) as ucursor:
+		for urow in ucursor:
+			if urow[0] in shapes:
+				urow[1] = bytearray(shapes[urow[0]])
+				ucursor.updateRow(urow)
+				written += 1
+	return written
+
+#-----------------------------------
+def seam_bands(extent, cores, margin): # Strips along the interior tile edges, margin wide on both sides
+	bands = []
+	for x in sorted(set(c[2] for c in cores if c[2] < extent[2])):
+		bands.append((x - margin, extent[1], x + margin, extent[3]))
+	for y in sorted(set(c[3] for c in cores if c[3] < extent[3])):
+		bands.append((extent[0], y - margin, extent[2], y + margin))
+	return bands
+
+#-----------------------------------
+def integrate_seams(layers, bands, tolerance): # Serial Integrate on the real data, limited to features along the seams
+	import arcpy as ap
+	inputs = []
+	count = 0
+	for fc, rank in utility_ranks:
+		if fc not in layers:
+			continue
+		oids, extents = layers[fc]
+		if not len(oids):
+			continue
+		mask = np.zeros(len(oids), dtype=bool)
+		for band in bands:
+			mask |= touching(extents, band)
+		if not mask.any():
+			continue
+		lyr = "seam_" + fc
+		ap.MakeFeatureLayer_management(fc, lyr, where_oids(fc, oids[mask].tolist()))
+		inputs.append("{0} {1}".format(lyr, rank))
+		count += int(mask.sum())
+	if inputs:
+		ap.Integrate_management(";".join(inputs), tolerance)
+		for item in inputs:
+			ap.Delete_management(item.split(' ')[0])
+	return count
+
+#-----------------------------------
+def integrate_tiled(workspace, tiles, tolerance="0.03 Meters", margin_m=1.0, workers=1, executable=None): # Tiled Integrate of the utility group. Returns (stats, messages).
+	import arcpy as ap
+	log = []
+	meters = float(tolerance.split()[0])
+	if margin_m <= meters:
+		margin_m = meters * 10 # The margin has to be wider than the tolerance or features across the tile edge never see each other
+	snap = dataset_snapshot(workspace)
+	layers = {}
+	infos = {}
+	sr = None
+	for fc, rank in utility_ranks:
+		if fc in snap.infos:
+			layers[fc] = feature_extents(fc)
+			infos[fc] = snap.info(fc)
+			sr = sr or spatial_reference(infos[fc])
+	stats = {'tiles' : tiles * tiles, 'tiles_run' : 0, 'features_moved' : 0, 'seam_features' : 0}
+	extent = layers_extent(layers)
+	if extent is None:
+		log.append(('message', "No utility features to integrate."))
+		return stats, log
+	cores = tile_grid(extent, tiles)
+	margin = map_units(sr, margin_m, extent)
+	jobs = plan_tiles(layers, extent, cores, margin)
+	stats['tiles_run'] = len(jobs)
+	log.append(('message', "Integrating {0} of {1} tiles with a {2} m margin".format(len(jobs), tiles * tiles, margin_m)))
+
+	work = [(workspace, tolerance, job, infos) for job in jobs]
+	if workers > 1 and len(work) > 1:
+		if executable:
+			multiprocessing.set_executable(executable)
+		pool = multiprocessing.Pool(min(workers, len(work)))
+		try:
+			results = pool.map(integrate_tile, work)
+		finally:
+			pool.close()
+			pool.join()
+	else:
+		results = [integrate_tile(item) for item in work]
+
+	failed = False
+	for tile, moved, messages in results:
+		log.extend(messages)
+		failed = failed or bool(messages)
+		for fc, shapes in moved.items():
+			stats['features_moved'] += write_back(fc, shapes)
+	if failed:
+		# A tile didn't finish. Fall back to the whole cell so nothing is left half integrated.
+		log.append(('warning', "Falling back to a full Integrate since a tile failed."))
+		ap.Integrate_management(";".join("{0} {1}".format(fc, rank) for fc, rank in utility_ranks if fc in layers), tolerance)
+		return stats, log
+
+	# Stitch the seams. Features there were integrated by different tiles against each other's old positions.
+	layers = dict((fc, feature_extents(fc)) for fc in layers)
+	stats['seam_features'] = integrate_seams(layers, seam_bands(extent, cores, margin), tolerance)
+	log.append(('message', "Integrated {0} moved features and {1} features along the tile seams".format(stats['features_moved'], stats['seam_features'])))
+	return stats, log
@@ -0,0 +1,579 @@
+# -*- coding: utf-8 -*-
+# ============================ #
+# MGCP Feature Catalogue v1    #
+#         2026-10-18           #
+# ============================ #
+import marshal
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+from xml_fixer import atomic_replace
+
+#            _______________________________
+#           | TRD 4.5.1 feature catalogue.  |
+#           | Every feature class subtype   |
+#           | with its F_Code and name in   |
+#           | one list, checked once and    |
+#           | indexed both ways:            |
+#           | (fc, subtype) -> F_Code and   |
+#           | F_Code -> [(fc, subtype)].    |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+trd_catalogue = 'MGCP_FeatureCatalogue_TRD4.5.1_20190705.xml' # SFCATR in the cell metadata
+fcode_pattern = re.compile(r'[A-Z]{2}[0-9]{3}')
+# Feature class suffix to geometry type. The name of each subtype ends with the matching word.
+geometry_types = {'A' : ('Polygon', 'Area'),
+				'L' : ('Polyline', 'Line'),
+				'P' : ('Point', 'Point')}
+cache_name = 'mgcp_catalogue.cache'
+
+# (feature class, FCSubtype, F_Code, name)
+# The old fcode_dict and fcsub_dict literals keyed on F_Code and FCSubtype, which repeat across
+# feature classes, so most of their entries silently overwrote each other. Keep this as a list.
+catalogue_rows = [
+	('AerofacA', 0, 'GB005', 'Land Aerodrome Area'),
+	('AerofacA', 1, 'GB035', 'Heliport Area'),
+	('AerofacA', 2, 'GB065', 'Water Aerodrome Area'),
+	('AerofacA', 3, 'GB230', 'Aircraft Hangar Area'),
+
+	('AerofacP', 0, 'GB030', 'Helipad Point'),
+	('AerofacP', 2, 'GB065', 'Water Aerodrome Point'),
+	('AerofacP', 3, 'GB230', 'Aircraft Hangar Point'),
+
+	('AgristrA', 0, 'AM020', 'Grain Storage Structure Area'),
+	('AgristrA', 1, 'AM030', 'Grain Elevator Area'),
+
+	('AgristrP', 0, 'AM020', 'Grain Storage Structure Point'),
+	('AgristrP', 1, 'AM030', 'Grain Elevator Point'),
+
+	('AquedctA', 0, 'BH010', 'Aqueduct Area'),
+
+	('AquedctL', 0, 'BH010', 'Aqueduct Line'),
+
+	('AquedctP', 0, 'BH010', 'Aqueduct Point'),
+
+	('BarrierL', 0, 'AL070', 'Fence Line'),
+	('BarrierL', 1, 'AL260', 'Wall Line'),
+
+	('BluffL', 0, 'DB010', 'Steep Terrain Face Line'),
+
+	('BridgeA', 0, 'AQ040', 'Bridge Area'),
+
+	('BridgeL', 0, 'AQ040', 'Bridge Line'),
+
+	('BuildA', 0, 'AL015', 'General Building Area'),
+
+	('BuildP', 0, 'AL015', 'General Building Point'),
+
+	('BuiltupA', 0, 'AL020', 'Built-Up Area Area'),
+	('BuiltupA', 1, 'AL208', 'Shanty Town Area'),
+
+	('BuiltupP', 0, 'AL020', 'Built-Up Area Point'),
+
+	('CisternP', 0, 'BI010', 'Cistern Point'),
+
+	('CoastA', 0, 'BA030', 'Island Area'),
+	('CoastA', 1, 'BA040', 'Tidal Water Area'),
+	('CoastA', 2, 'BA050', 'Beach Area'),
+
+	('CoastL', 0, 'BA010', 'Land Water Boundary Line'),
+
+	('CoastP', 0, 'BA050', 'Beach Point'),
+
+	('CommA', 0, 'AT050', 'Communication Station Area'),
+
+	('CommP', 0, 'AT010', 'Dish Aerial Point'),
+	('CommP', 1, 'AT045', 'Radar Station Point'),
+
+	('CropA', 0, 'BH135', 'Rice Field Area'),
+	('CropA', 1, 'EA010', 'Crop Land Area'),
+	('CropA', 2, 'EA040', 'Orchard Area'),
+	('CropA', 3, 'EA050', 'Vineyard Area'),
+	('CropA', 4, 'EA055', 'Hop Field Area'),
+
+	('DamA', 0, 'BI020', 'Dam Area'),
+	('DamA', 1, 'BH165', 'Spillway Area'),
+
+	('DamL', 0, 'BI020', 'Dam Line'),
+	('DamL', 1, 'BH165', 'Spillway Line'),
+
+	('DamP', 0, 'BI020', 'Dam Point'),
+
+	('DangerA', 0, 'BD100', 'Structural Pile Area'),
+	('DangerA', 1, 'BD120', 'Reef Area'),
+
+	('DangerL', 0, 'BD120', 'Reef Line'),
+
+	('DangerP', 0, 'BD100', 'Structural Pile Point'),
+	('DangerP', 1, 'BD110', 'Offshore Platform Point'),
+	('DangerP', 2, 'BD130', 'Hazardous Rock Point'),
+	('DangerP', 3, 'BD180', 'Wreck Point'),
+
+	('DisposeA', 0, 'AB000', 'Disposal Site Area'),
+	('DisposeA', 1, 'AB010', 'Recycling Site Area'),
+
+	('EmbankA', 0, 'DB090', 'Embankment Area'),
+
+	('EmbankL', 0, 'AQ063', 'Causeway Structure Line'),
+	('EmbankL', 1, 'DB070', 'Cut Line'),
+	('EmbankL', 2, 'DB090', 'Embankment Line'),
+	('EmbankL', 3, 'DB071', 'Cut Line Line'),
+
+	('ExtractA', 0, 'AA010', 'Extraction Mine Area'),
+	('ExtractA', 1, 'AA012', 'Quarry Area'),
+	('ExtractA', 2, 'BH155', 'Salt Evaporator Area'),
+	('ExtractA', 3, 'BH150', 'Salt Flat Area'),
+
+	('ExtractP', 0, 'AA010', 'Extraction Mine Point'),
+	('ExtractP', 1, 'AA012', 'Quarry Point'),
+
+	('FerryL', 0, 'AQ070', 'Ferry Crossing Line'),
+
+	('FerryP', 0, 'AQ070', 'Ferry Crossing Point'),
+
+	('FirebrkA', 0, 'EC040', 'Cleared Way Area'),
+	('FirebrkA', 1, 'EC060', 'Forest Clearing Area'),
+
+	('FordL', 0, 'BH070', 'Ford Line'),
+
+	('FordP', 0, 'BH070', 'Ford Point'),
+
+	('FortA', 0, 'AH050', 'Fortification Area'),
+
+	('FortP', 0, 'AH050', 'Fortification Point'),
+
+	('GrassA', 0, 'EB010', 'Grassland Area'),
+	('GrassA', 1, 'EB020', 'Thicket Area'),
+	('GrassA', 2, 'EC010', 'Cane Area'),
+
+	('GroundA', 0, 'DA010', 'Soil Surface Region Area'),
+
+	('HarborA', 0, 'BB005', 'Harbour Area'),
+	('HarborA', 2, 'BB090', 'Dry Dock Area'),
+
+	('HarborP', 0, 'BB155', 'Maritime Signal Station Point'),
+
+	('IndL', 0, 'AF020', 'Conveyor Line'),
+	('IndL', 1, 'BH060', 'Flume Line'),
+	('IndL', 2, 'FA090', 'Geophysical Prospecting Grid Line'),
+
+	('InundA', 0, 'BH090', 'Land Subject to Inundation Area'),
+
+	('LakeresA', 0, 'BH080', 'Lake Area'),
+	('LakeresA', 1, 'BH130', 'Reservoir Area'),
+
+	('Landfrm1A', 0, 'BH160', 'Sabkha Area'),
+	('Landfrm1A', 1, 'DB170', 'Sand Dunes Area'),
+
+	('Landfrm2A', 0, 'BJ020', 'Moraine Area'),
+	('Landfrm2A', 1, 'DB160', 'Rock Formation Area'),
+
+	('LandfrmA', 0, 'DB200', 'Gully Area'),
+	('LandfrmA', 1, 'BJ031', 'Crevasse Area'),
+	('LandfrmA', 2, 'DB061', 'Crevice Area'),
+
+	('LandfrmL', 0, 'BJ040', 'Ice Cliff Line'),
+	('LandfrmL', 1, 'DB110', 'Geologic Fault Line'),
+	('LandfrmL', 2, 'DB200', 'Gully Line'),
+	('LandfrmL', 3, 'BJ031', 'Crevasse Line'),
+	('LandfrmL', 4, 'DB061', 'Crevice Line'),
+	('LandfrmL', 5, 'DB100', 'Esker Line'),
+	('LandfrmL', 6, 'DB160', 'Rock Formation Line'),
+
+	('LandfrmP', 0, 'BJ060', 'Ice Peak Point'),
+	('LandfrmP', 1, 'DB160', 'Rock Formation Point'),
+
+	('LandIceA', 0, 'BJ030', 'Glacier Area'),
+	('LandIceA', 1, 'BJ100', 'Snow Field and/or Ice-field Area'),
+
+	('LandmrkA', 0, 'AJ010', 'Circular Irrigation System Area'),
+	('LandmrkA', 1, 'AK030', 'Amusement Park Area'),
+	('LandmrkA', 2, 'AK060', 'Camp-site Area'),
+	('LandmrkA', 3, 'AK120', 'Park Area'),
+	('LandmrkA', 4, 'AK160', 'Stadium Area'),
+	('LandmrkA', 5, 'AK180', 'Zoo Area'),
+	('LandmrkA', 6, 'AL030', 'Cemetery Area'),
+	('LandmrkA', 7, 'AK040', 'Sports Ground Area'),
+	('LandmrkA', 8, 'FA015', 'Firing Range Area'),
+	('LandmrkA', 9, 'AI030', 'Camp Area'),
+	('LandmrkA', 10, 'AK170', 'Swimming Pool Area'),
+
+	('LandmrkL', 0, 'AK130', 'Racetrack Line'),
+	('LandmrkL', 1, 'AQ075', 'Ice Route Line'),
+	('LandmrkL', 2, 'AK150', 'Ski-jump Line'),
+
+	('LandmrkP', 0, 'AH070', 'Checkpoint Point'),
+	('LandmrkP', 1, 'AK160', 'Stadium Point'),
+	('LandmrkP', 2, 'AL030', 'Cemetery Point'),
+	('LandmrkP', 3, 'AL130', 'Memorial Monument Point'),
+	('LandmrkP', 4, 'AK040', 'Sports Ground Point'),
+	('LandmrkP', 5, 'AK150', 'Ski-jump Point'),
+	('LandmrkP', 6, 'AK170', 'Swimming Pool Point'),
+
+	('LockA', 0, 'BI030', 'Lock Area'),
+
+	('LockL', 0, 'BI030', 'Lock Line'),
+	('LockL', 1, 'BI040', 'Sluice Gate Line'),
+
+	('LockP', 0, 'BI030', 'Lock Point'),
+	('LockP', 1, 'BI040', 'Sluice Gate Point'),
+
+	('MarkersP', 0, 'AL025', 'Cairn Point'),
+
+	('MilA', 0, 'SU001', 'Military Installation Area'),
+
+	('MilL', 0, 'AH025', 'Engineered Earthwork Line'),
+
+	('MilP', 0, 'SU001', 'Military Installation Point'),
+
+	('MiscaeroP', 1, 'AQ110', 'Mooring Mast Point'),
+	('MiscaeroP', 2, 'GA034', 'Aeronautical Radio Navigation Service Point'),
+	('MiscaeroP', 3, 'GB485', 'Approach Lighting System Point'),
+	('MiscaeroP', 4, 'GB040', 'Launch Pad Point'),
+	('MiscaeroP', 5, 'GB220', 'Aeronautical Obstacle Point'),
+
+	('MiscL', 0, 'BH110', 'Penstock Line'),
+	('MiscL', 1, 'BI041', 'Water Gate Line'),
+
+	('MiscP', 0, 'BI041', 'Water Gate Point'),
+	('MiscP', 1, 'BI050', 'Water Intake Tower Point'),
+
+	('MiscpopA', 0, 'AL012', 'Archeological Site Area'),
+	('MiscpopA', 1, 'AL105', 'Settlement Area'),
+	('MiscpopA', 2, 'AL010', 'Facility Area'),
+	('MiscpopA', 3, 'AL019', 'Shed Area'),
+	('MiscpopA', 4, 'AJ110', 'Greenhouse Area'),
+
+	('MiscpopP', 0, 'AL012', 'Archeological Site Point'),
+	('MiscpopP', 1, 'AL105', 'Settlement Point'),
+	('MiscpopP', 2, 'AL099', 'Hut Point'),
+	('MiscpopP', 3, 'AJ110', 'Greenhouse Point'),
+	('MiscpopP', 4, 'AL019', 'Shed Point'),
+
+	('MtnP', 0, 'DB029', 'Cave Mouth Point'),
+	('MtnP', 1, 'DB150', 'Mountain Pass Point'),
+
+	('NuclearA', 0, 'AL140', 'Particle Accelerator Area'),
+
+	('OasisA', 0, 'EC020', 'Oasis Area'),
+
+	('ObstrP', 0, 'AF010', 'Smokestack Point'),
+	('ObstrP', 2, 'AF040', 'Crane Point'),
+	('ObstrP', 3, 'AF070', 'Flare Pipe Point'),
+	('ObstrP', 4, 'AJ050', 'Windmill Point'),
+
+	('PhysA', 0, 'DB180', 'Volcano Area'),
+
+	('PierA', 0, 'AK190', 'Recreational Pier Area'),
+	('PierA', 1, 'BB190', 'Berthing Structure Area'),
+
+	('PierL', 0, 'AK190', 'Recreational Pier Line'),
+	('PierL', 1, 'BB190', 'Berthing Structure Line'),
+
+	('PipeL', 0, 'AQ113', 'Pipeline Line'),
+
+	('PlazaA', 0, 'AL170', 'Public Square Area'),
+
+	('PowerA', 0, 'AD010', 'Electric Power Station Area'),
+	('PowerA', 1, 'AD050', 'Heating Facility Area'),
+
+	('PowerL', 0, 'AT030', 'Power Line Line'),
+	('PowerL', 1, 'AT041', 'Cableway Line'),
+
+	('PowerP', 0, 'AD010', 'Electric Power Station Point'),
+	('PowerP', 1, 'AD020', 'Solar Panel Point'),
+	('PowerP', 2, 'AD050', 'Heating Facility Point'),
+
+	('ProcessA', 0, 'AC000', 'Processing Facility Area'),
+
+	('ProcessP', 0, 'AC000', 'Processing Facility Point'),
+
+	('PumpingA', 0, 'AA052', 'Hydrocarbons Field Area'),
+	('PumpingA', 1, 'AQ116', 'Pumping Station Area'),
+
+	('PumpingP', 0, 'AQ116', 'Pumping Station Point'),
+
+	('RailrdL', 0, 'AN010', 'Railway Line'),
+	('RailrdL', 1, 'AN050', 'Railway Sidetrack Line'),
+
+	('RampA', 0, 'BB240', 'Slipway Area'),
+
+	('RapidsA', 0, 'BH120', 'Rapids Area'),
+
+	('RapidsL', 0, 'BH120', 'Rapids Line'),
+	('RapidsL', 1, 'BH180', 'Waterfall Line'),
+
+	('RapidsP', 0, 'BH120', 'Rapids Point'),
+	('RapidsP', 1, 'BH145', 'Vanishing Point Point'),
+	('RapidsP', 2, 'BH180', 'Waterfall Point'),
+
+	('RigwellP', 0, 'AA040', 'Rig Point'),
+	('RigwellP', 1, 'AC020', 'Catalytic Cracker Point'),
+
+	('RoadL', 0, 'AP030', 'Road Line'),
+
+	('RrturnP', 0, 'AN075', 'Railway Turntable Point'),
+
+	('RryardA', 0, 'AN060', 'Railway Yard Area'),
+
+	('RuinsA', 0, 'AL200', 'Ruins Area'),
+
+	('RunwayA', 0, 'GB015', 'Apron Area'),
+	('RunwayA', 1, 'GB045', 'Stopway Area'),
+	('RunwayA', 2, 'GB055', 'Runway Area'),
+	('RunwayA', 3, 'GB075', 'Taxiway Area'),
+
+	('RunwayL', 0, 'GB050', 'Aircraft Revetment Line'),
+
+	('RunwayP', 0, 'GB050', 'Aircraft Revetment Point'),
+
+	('SeastrtA', 0, 'BB041', 'Breakwater Area'),
+	('SeastrtA', 1, 'BB043', 'Groin Area'),
+	('SeastrtA', 2, 'BB140', 'Training Wall Area'),
+
+	('SeastrtL', 0, 'BB041', 'Breakwater Line'),
+	('SeastrtL', 1, 'BB043', 'Groin Line'),
+	('SeastrtL', 2, 'BB140', 'Training Wall Line'),
+	('SeastrtL', 3, 'BB230', 'Seawall Line'),
+
+	('ShedL', 0, 'AL210', 'Protection Shed Line'),
+
+	('ShedP', 0, 'AL210', 'Protection Shed Point'),
+
+	('SportA', 0, 'AK090', 'Fairground Area'),
+	('SportA', 1, 'AK100', 'Golf Course Area'),
+
+	('StorageA', 0, 'AM010', 'Storage Depot Area'),
+	('StorageA', 1, 'AM040', 'Mineral Pile Area'),
+	('StorageA', 2, 'AM060', 'Surface Bunker Area'),
+	('StorageA', 3, 'AM070', 'Storage Tank Area'),
+
+	('StorageP', 0, 'AM040', 'Mineral Pile Point'),
+	('StorageP', 1, 'AM060', 'Surface Bunker Point'),
+	('StorageP', 2, 'AM070', 'Storage Tank Point'),
+
+	('SubstatA', 0, 'AD030', 'Power Substation Area'),
+
+	('SubstatP', 0, 'AD030', 'Power Substation Point'),
+
+	('SwampA', 0, 'BH015', 'Bog Area'),
+	('SwampA', 1, 'ED010', 'Marsh Area'),
+	('SwampA', 2, 'ED020', 'Swamp Area'),
+	('SwampA', 3, 'ED030', 'Mangrove Swamp Area'),
+
+	('TeleL', 0, 'AT060', 'Communication Line Line'),
+
+	('TestA', 0, 'FA100', 'Test Site Area'),
+
+	('TextP', 0, 'ZD040', 'Named Location Point'),
+
+	('ThermalA', 0, 'DB115', 'Geothermal Outlet Area'),
+
+	('ThermalP', 0, 'DB115', 'Geothermal Outlet Point'),
+	('ThermalP', 1, 'DB180', 'Volcano Point'),
+
+	('TowerP', 0, 'AL241', 'Tower Point'),
+
+	('TrackL', 0, 'AP010', 'Cart Track Line'),
+
+	('TrailL', 0, 'AP050', 'Trail Line'),
+
+	('TransA', 0, 'AQ125', 'Transportation Station Area'),
+	('TransA', 1, 'AQ135', 'Roadside Rest Area Area'),
+	('TransA', 2, 'AQ140', 'Vehicle Lot Area'),
+	('TransA', 3, 'AL060', 'Dragon\'s Teeth Area'),
+	('TransA', 4, 'AN076', 'Roundhouse Area'),
+
+	('TransL', 0, 'AL060', 'Dragon\'s Teeth Line'),
+
+	('TransP', 0, 'AQ090', 'Entrance and/or Exit Point'),
+	('TransP', 1, 'AQ125', 'Transportation Station Point'),
+	('TransP', 2, 'AQ065', 'Culvert Point'),
+	('TransP', 3, 'AN076', 'Roundhouse Point'),
+
+	('TreatA', 0, 'AC030', 'Settling Pond Area'),
+	('TreatA', 1, 'AJ030', 'Holding Pen Area'),
+	('TreatA', 2, 'BH040', 'Water Treatment Bed Area'),
+	('TreatA', 3, 'BH050', 'Mariculture Site Area'),
+	('TreatA', 4, 'BH051', 'Fish Farm Facility Area'),
+
+	('TreatP', 0, 'AC030', 'Settling Pond Point'),
+	('TreatP', 1, 'AJ030', 'Holding Pen Point'),
+
+	('TreesA', 0, 'EC030', 'Wood Area'),
+
+	('TreesL', 0, 'EA020', 'Hedgerow Line'),
+	('TreesL', 1, 'EC030', 'Wood Line'),
+
+	('TreesP', 0, 'EC030', 'Wood Point'),
+
+	('TundraA', 0, 'BJ110', 'Tundra Area'),
+
+	('TunnelA', 0, 'AQ130', 'Tunnel Area'),
+
+	('TunnelL', 0, 'AQ130', 'Tunnel Line'),
+
+	('UtilP', 0, 'AJ051', 'Wind Turbine Point'),
+	('UtilP', 1, 'AT042', 'Pylon Point'),
+
+	('VoidA', 0, 'ZD020', 'Void Collection Area Area'),
+
+	('WatrcrsA', 0, 'BH020', 'Canal Area'),
+	('WatrcrsA', 1, 'BH030', 'Ditch Area'),
+	('WatrcrsA', 2, 'BH140', 'River Area'),
+
+	('WatrcrsL', 0, 'BH020', 'Canal Line'),
+	('WatrcrsL', 1, 'BH030', 'Ditch Line'),
+	('WatrcrsL', 2, 'BH140', 'River Line'),
+
+	('WellsprP', 0, 'AA050', 'Well Point'),
+	('WellsprP', 1, 'BH170', 'Natural Pool Point'),
+
+	('AnnoL', 0, 'ZD040', 'Named Location Line'),
+	('AnnoL', 1, 'ZD045', 'Annotated Location Line'),
+
+	('AnnoP', 0, 'ZD045', 'Annotated Location Point'),
+	('AnnoP', 1, 'ZD040', 'Named Location Point'),
+
+	('ContourL', 0, 'CA010', 'Elevation Contour Line'),
+
+	('ElevP', 0, 'CA030', 'Spot Elevation Point'),
+	('ElevP', 1, 'CA035', 'Inland Water Elevation Point'),
+	('ElevP', 2, 'ZB050', 'Survey Point'),
+
+	('PolbndA', 0, 'FA002', 'Geopolitical Entity Area'),
+	('PolbndA', 1, 'FA003', 'Administrative Division Area'),
+
+	('PolbndL', 0, 'FA000', 'Administrative Boundary Line'),
+	('PolbndL', 1, 'FA110', 'International Date Line Line'),
+	('PolbndL', 2, 'FC021', 'Maritime Limit Boundary Line'),
+]
+
+
+
+#-----------------------------------
+class CatalogueError(Exception):
+	pass
+
+
+#-----------------------------------
+class FeatureCatalogue(object):
+	# Bidirectional index over catalogue_rows
+	#   fcode(fc, subtype)   -> F_Code
+	#   subtypes(fc)         -> {subtype : F_Code}
+	#   lookup(f_code)       -> [(fc, subtype), ...]
+	#   geometry(fc)         -> 'Polygon', 'Polyline', or 'Point'
+	#   name(fc, subtype)    -> 'Land Aerodrome Area'
+	def __init__(self, by_fc, by_fcode, names):
+		self.by_fc = by_fc
+		self.by_fcode = by_fcode
+		self.names = names
+
+	@classmethod
+	def build(cls, rows): # Checks the rows and builds the indexes. Raises CatalogueError listing everything wrong.
+		problems = verify_rows(rows)
+		if problems:
+			raise CatalogueError("MGCP feature catalogue failed verification:\n" + "\n".join(problems))
+		by_fc = {}
+		by_fcode = {}
+		names = {}
+		for fc, subtype, fcode, name in rows:
+			by_fc.setdefault(fc, {})[subtype] = fcode
+			by_fcode.setdefault(fcode, []).append((fc, subtype))
+			names[(fc, subtype)] = name
+		return cls(by_fc, by_fcode, names)
+
+	def fcode(self, fc, subtype):
+		return self.by_fc[fc][subtype]
+
+	def subtypes(self, fc):
+		return self.by_fc[fc]
+
+	def lookup(self, fcode):
+		return self.by_fcode.get(fcode, [])
+
+	def geometry(self, fc):
+		return geometry_types[fc[-1]][0]
+
+	def name(self, fc, subtype):
+		return self.names[(fc, subtype)]
+
+	def feature_classes(self):
+		return sorted(self.by_fc.keys())
+
+	def verify_trd(self, xml_path=None): # F_Codes in the catalogue that don't show up anywhere in the TRD feature catalogue XML
+		if xml_path is None:
+			xml_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), trd_catalogue)
+		with open(xml_path, 'rb') as f:
+			trd_codes = set(code.decode('ascii') for code in re.findall(br'[A-Z]{2}[0-9]{3}', f.read()))
+		return sorted(code for code in self.by_fcode if code not in trd_codes)
+
+
+#-----------------------------------
+def verify_rows(rows): # Returns a list of problems with the catalogue rows, empty if it checks out
+	problems = []
+	seen = {}
+	for fc, subtype, fcode, name in rows:
+		if (fc, subtype) in seen:
+			problems.append("{0} subtype {1} is defined twice ({2} and {3})".format(fc, subtype, seen[(fc, subtype)], fcode))
+		seen[(fc, subtype)] = fcode
+		if not fcode_pattern.match(fcode) or len(fcode) != 5:
+			problems.append("{0} subtype {1} has a malformed F_Code '{2}'".format(fc, subtype, fcode))
+		if fc[-1] not in geometry_types:
+			problems.append("{0} doesn't end in A, L, or P so its geometry is unknown".format(fc))
+		elif not name.endswith(geometry_types[fc[-1]][1]):
+			problems.append("{0} subtype {1} '{2}' doesn't match the {3} geometry".format(fc, subtype, name, geometry_types[fc[-1]][0]))
+	return problems
+
+#-----------------------------------
+def source_key(): # Ties the cache to this version of the module and of Python since marshal formats differ between them
+	# Hashing the rows themselves costs more than building the indexes, so go off the module file instead
+	stat = os.stat(os.path.splitext(os.path.abspath(__file__))[0] + '.py')
+	return "{0}.{1}|{2}|{3!r}".format(sys.version_info[0], sys.version_info[1], stat.st_size, stat.st_mtime)
+
+#-----------------------------------
+def load_catalogue(cache_dir=None): # Loads the verified indexes from the marshal cache, building and caching them when the catalogue changed
+	if cache_dir is None:
+		cache_dir = os.path.dirname(os.path.abspath(__file__))
+	path = os.path.join(cache_dir, cache_name)
+	key = source_key()
+	try:
+		with open(path, 'rb') as f:
+			data = marshal.loads(f.read())
+		if data[0] == key:
+			by_fcode = dict((fcode, [tuple(pair) for pair in pairs]) for fcode, pairs in data[2].items())
+			names = dict((tuple(k), v) for k, v in data[3])
+			return FeatureCatalogue(data[1], by_fcode, names)
+	except (IOError, OSError, EOFError, ValueError, TypeError, IndexError):
+		pass
+	catalogue = FeatureCatalogue.build(catalogue_rows)
+	if multiprocessing.current_process().name != 'MainProcess':
+		return catalogue # Pool workers import this too. Only the parent writes the cache so they can't trample each other.
+	tmp = None
+	try:
+		# Same folder so the replace never crosses drives. A half written cache never sits under the real name.
+		handle, tmp = tempfile.mkstemp(prefix='.mgcp_catalogue_', suffix='.tmp', dir=cache_dir)
+		with os.fdopen(handle, 'wb') as f:
+			f.write(marshal.dumps((key, catalogue.by_fc, catalogue.by_fcode, list(catalogue.names.items()))))
+		atomic_replace(tmp, path)
+	except (IOError, OSError):
+		if tmp and os.path.exists(tmp):
+			os.remove(tmp)
+		# Read only install. Verifying on every start still works, it just doesn't get cached.
+	return catalogue
+
+
+
+if __name__ == '__main__':
+	catalogue = FeatureCatalogue.build(catalogue_rows)
+	write_out = sys.stdout.write
+	write_out("{0} feature classes, {1} subtypes, {2} F_Codes\n".format(len(catalogue.by_fc), len(catalogue_rows), len(catalogue.by_fcode)))
+	if len(sys.argv) > 1:
+		missing = catalogue.verify_trd(sys.argv[1])
+		write_out("F_Codes missing from {0}: {1}\n".format(sys.argv[1], ", ".join(missing) if missing else "none"))
@@ -10,11 +10,19 @@ from arcpy import AddMessage as write
 import arcpy as ap
 from datetime import datetime as dt
 import decimal
+import io
 import os
 import re
 import uuid
 import traceback
 import xml.etree.ElementTree as et
+from collections import Counter
+from imagery_footprint import load_footprints
+from cell_xml import stream_xml
+from xml_fixer import fix_job, trd_rules, summary
+from cell_metadata_xml import CellTemplate, cell_ring, feature_entries, load_definitions
+from mgcp_catalogue import load_catalogue, trd_catalogue
+from dataset_snapshot import dataset_snapshot
 
 #            _______________________________
 #           | Populates the Metadata fields |
@@ -175,142 +183,61 @@ def add_namespace(root, prefix, uri):
 # https://stackoverflow.com/users/1375025/giova
 # https://github.com/GiovaLomba
 # Refactored for Python 2.7 and modified by Nat Cagle 2022-09-28
+# The rendering now lives in cell_xml.stream_xml, which writes the same bytes in one walk of the tree.
+# The old version walked every subtree again at each level with getiterator() and built the string up with +=.
 def xml_render(root, buffer='', namespaces=None, level=0, indent_size=2, encoding='utf-8'):
-	if not level:
-		buffer += '<?xml version="1.0" encoding="{0}"?>\n'.format(encoding)
-	else:
-		buffer += ''
-	if isinstance(root, et.ElementTree):
-		root = root.getroot()
-	else:
-		root = root
-	if not level:
-		_, namespaces = et._namespaces(root, 'utf-8') #[0] #et._namespaces(root)
-	else:
-		_, namespaces = (None, namespaces)
-	print(root)
-	for element in root.getiterator():
-		indent = ' ' * indent_size * level
-		tag = re.sub(r'({[^}]+}\s*)*', '', element.tag)
-		buffer += '{0}<{1}'.format(indent, tag)
-		for ns in re.findall(r'{[^}]+}', element.tag):
-			ns_key = ns[1:-1]
-			if ns_key not in namespaces: continue
-			if namespaces[ns_key] != '':
-				buffer += ' xmlns' + ':{0}'.format(namespaces[ns_key]) + '="{0}"'.format(ns_key)
-			else:
-				buffer += ' xmlns' + '="{0}"'.format(ns_key)
-			del namespaces[ns_key]
-		for k, v in element.attrib.items():
-			buffer += ' {0}="{1}"'.format(k, v)
-		if element.text:
-			buffer += '>' + element.text.strip()
-		else:
-			buffer += '>'
-		children = list(element)
-		for child in children:
-			if buffer[-1] != '\n':
-				sep = '\n'
-			else:
-				sep = ''
-			buffer += sep + xml_render(child, level=level+1, indent_size=indent_size, namespaces=namespaces)
-		if 0 != len(children):
-			buffer += '{0}</{1}>\n'.format(indent, tag)
-		else:
-			buffer += '</{0}>\n'.format(tag)
-	return buffer
+	out = io.BytesIO()
+	stream_xml(root, out, indent_size, encoding)
+	return buffer + out.getvalue().decode(encoding)
 
+#-----------------------------------
+def dataset_features(dataset, catalogue): # ([(fc, subtype)] that have features, {'P' : points, 'L' : lines, 'A' : areas}) for the cell XML
+	# One read of FCSubtype per feature class. The Defense export gets the same thing out of the data when it runs.
+	snap = dataset_snapshot(dataset, refresh=True)
+	present = []
+	counts = {'P' : 0, 'L' : 0, 'A' : 0}
+	for fc in snap.featureclass:
+		if fc not in catalogue.by_fc:
+			continue
+		with ap.da.SearchCursor(os.path.join(dataset, fc), ['FCSubtype']) as scursor:
+			subtypes = Counter(row[0] for row in scursor)
+		snap.set_count(fc, sum(subtypes.values()))
+		counts[fc[-1]] += sum(subtypes.values())
+		present.extend((fc, subtype) for subtype in sorted(subtypes) if subtype in catalogue.subtypes(fc))
+	return present, counts
 
 
-''''''''' User Parameters '''''''''
-## [0] MGCP_Metadata Dataset - Feature Dataset
-MGCP = ap.GetParameterAsText(0)
-ap.env.workspace = MGCP
-ap.env.overwriteOutput = True
-## [1] Generate Cell Polygon? - Boolean # Default: True
-new_cell = ap.GetParameter(1)
-## [2] Imagery Footprint (Original) - Shapefile
-img_foot = ap.GetParameterAsText(2)
-## [3] TPC Coordinates (Cell ID - i.e. E018S07) - String
-TPC = ap.GetParameterAsText(3)
-## [4] Edition 1 Update? - Boolean # Default: True
-# "Leave attribute field blank for Edition 1. Populate with 'Complete Update' for Edition 2, 3, etc."
-update_edition = ap.GetParameter(4)
-## [5] Date the database was pulled local (Format as YYYY-MM-DD) - String
-local_date = ap.GetParameterAsText(5) # Date TPC was pulled local for finishing YYYY-MM-DD (for latest extraction date)
-## [6] Delivery Date (Format as YYYY-MM-DD) - String
-gait_date = ap.GetParameterAsText(6) # Delivery date (for date of final GAIT run)
-### Ancillary Sources
-# AAFIF
-## [7] Was an AAFIF source used? - Boolean # Default: False
-aafif_check = ap.GetParameter(7) # There is absolutely too much miscellaneous nonsense with this junk. Just find the date yourself and input it.
-## [8] Newest AAFIF Date (Format as YYYY-MM-DD) (Optional) - String
-aafif_date = ap.GetParameterAsText(8) # YYYY-MM-DD
-# DVOF
-## [9] Was a DVOF source used? - Boolean # Default: False
-dvof_check = ap.GetParameter(9) # Did you use DVOF checkbox
-## [10] Was the DVOF source a shapefile? (Optional) - Boolean # Default: False
-dvof_shp_check = ap.GetParameter(10) # Why can nothing ever be consistent. This is for if you only have a DVOF source shapefile (point only)
-## [11] DVOF Point Feature Class (or shapefile if necessary) (Optional) - Feature Class
-dvof_file = ap.GetParameterAsText(11)
-# Geonames
-## [12] Was a Geonames source used? - Boolean # Default: False
-geo_check = ap.GetParameter(12) # Did you use geonames checkbox
-## [13] Was the Geonames source a shapefile? (Optional) - Boolean # Default: False
-geo_shp_check = ap.GetParameter(13) # Do you only have access to a Geonames shapefile in stead of a FC for some incredibly inconvenient reason?
-## [14] Geonames Point Feature Class (or shapefile if necessary) (Optional) - Feature Class
-geo_file = ap.GetParameterAsText(14)
-
-
-
-''''''''' Feature Class List '''''''''
-# List and sort feature classes and give them their own variable for the later update cursors
-featureclass = ap.ListFeatureClasses()
-featureclass.sort()
-fc_cell = featureclass[0]
-fc_subregion = featureclass[2]
-fc_source = featureclass[1]
-# Sets path for the XML metadata export as the folder containing the GDB and sets the location of the cell feature class
-export_path = os.path.dirname(os.path.dirname(MGCP))
-cell_path = os.path.join(MGCP, fc_cell)
-
-
-
-''''''''' User Error Handling '''''''''
-if len(featureclass) != 3:
-	ap.AddError("There should be 3 feature classes in the MGCP_Metadata dataset: Cell, Subregion, and Source.\nPlease repair the dataset and try again.")
-	sys.exit(0)
-elif len(featureclass) == 3:
-	write("\nPopulating metadata feature classes " + str(fc_cell) + ", " + str(fc_subregion) + ", and " + str(fc_source) + " with default values.\nIf you wish to update the default values, edit the default dictionaries in the script.\n")
-# Checks for proper format of user input dates
-try:
-	write("Validating input date fields...")
-	temp1 = dt.strptime(local_date, '%Y-%m-%d')
-	temp2 = dt.strptime(gait_date, '%Y-%m-%d')
-	if aafif_check:
-		temp3 = dt.strptime(aafif_date, '%Y-%m-%d')
-except ValueError:
-		raise ValueError("Incorrect date format, should be YYYY-MM-DD")
-
+#-----------------------------------
+class CellMetadataError(Exception): # Bad input for a cell. The toolbox shows it as an error, the batch records it as a failure.
+	pass
 
+#-----------------------------------
+def check_dates(local_date, gait_date, aafif_date=None): # Raises ValueError unless every date is YYYY-MM-DD
+	try:
+		dt.strptime(local_date, '%Y-%m-%d')
+		dt.strptime(gait_date, '%Y-%m-%d')
+		if aafif_date is not None:
+			dt.strptime(aafif_date, '%Y-%m-%d')
+	except ValueError:
+			raise ValueError("Incorrect date format, should be YYYY-MM-DD")
 
-''''''''' Dates ''''''''' # SANITIZE ALL THEIR STUPID INCONSISTENT INPUTS
-ex_year = dt.strptime(gait_date, '%Y-%m-%d')
-curr_year = ex_year.strftime("%Y")
-write('Year of data production: {0}'.format(curr_year))
-img_dates = []
-# Searches through Imagery Footprint dates and creates a list in the YYYY-MM-DD format
-with ap.da.SearchCursor(img_foot, 'Acquisitio') as img:
-	for row in img:
-		date = row[0].strftime("%Y-%m-%d")
+#-----------------------------------
+def imagery_dates(img_foot): # (newest, oldest) acquisition dates in the imagery footprint as YYYY-MM-DD
+	img_dates = []
+	# Searches through Imagery Footprint dates and creates a list in the YYYY-MM-DD format
+	# Pulled from the imagery footprint sidecar cache when the shapefile hasn't changed since the last run
+	for acquisition in load_footprints(img_foot).all_dates:
+		date = acquisition.strftime("%Y-%m-%d")
 		img_dates.append(date)
-# Get newest and oldest imagery footprint dates
-img_date_new = max(img_dates)
-img_date_old = min(img_dates)
-write("\nNewest acquisition date from imagery footprint: {0}".format(img_date_new))
-write("Oldest acquisition date from imagery footprint: {0}".format(img_date_old))
+	# Get newest and oldest imagery footprint dates
+	img_date_new = max(img_dates)
+	img_date_old = min(img_dates)
+	write("\nNewest acquisition date from imagery footprint: {0}".format(img_date_new))
+	write("Oldest acquisition date from imagery footprint: {0}".format(img_date_old))
+	return img_date_new, img_date_old
 
-if dvof_check:
+#-----------------------------------
+def dvof_dates(dvof_file, dvof_shp_check): # (newest, oldest) SOURCEDT in the DVOF source as YYYY-MM-DD
 	dvof_dates = []
 	# Searches through the DVOF file modify dates and creates a list in the YYYY-MM-DD format
 	dvof_field = 'SOURCEDT'
@@ -334,8 +261,10 @@ if dvof_check:
 	dvof_date_old = min(dvof_dates)
 	write("Latest DVOF source date: {0}".format(dvof_date_new))
 	write("Earliest DVOF source date: {0}".format(dvof_date_old))
+	return dvof_date_new, dvof_date_old
 
-if geo_check:
+#-----------------------------------
+def geonames_date(geo_file, geo_shp_check): # Newest modify date in the Geonames source as YYYY-MM-DD
 	write("\nImporting Geonames Source data...")
 	geo_dates = []
 	# Searches through the Geonames file modify dates and creates a list in the YYYY-MM-DD format
@@ -393,47 +322,65 @@ if geo_check:
 	#geo_date_old = min(geo_dates)
 	write("Latest NGA GEOnet Names Server (GNS) database update date in Geonames source: {0}".format(geo_date_new))
 	#write("Earliest NGA GEOnet Names Server (GNS) database update date in Geonames source: {0}".format(geo_date_old))
+	return geo_date_new
 
+#-----------------------------------
+def source_dates(img_foot, aafif_date=None, dvof_file=None, dvof_shp_check=False, geo_file=None, geo_shp_check=False): # Dates from every source used
+	# {'img' : (newest, oldest), 'aafif' : date, 'dvof' : (newest, oldest), 'geo' : newest}. Sources that weren't used are None.
+	# Reading them is the slow part of a run, so the batch does this once and hands the result to every cell.
+	return {'img' : imagery_dates(img_foot),
+			'aafif' : aafif_date or None,
+			'dvof' : dvof_dates(dvof_file, dvof_shp_check) if dvof_file else None,
+			'geo' : geonames_date(geo_file, geo_shp_check) if geo_file else None}
+
+#-----------------------------------
+def parse_tpc(TPC): # (west longitude, south latitude) of the cell. E018S07 -> (18, -7)
+	# Creates list of letters and numbers from TPC variable. ex: E018S07 -> ['E', '018', 'S', '07']
+	start = re.findall('(\d+|[A-Za-z]+)', TPC)
+	# Error handling for user input
+	if len(start) != 4:
+		raise CellMetadataError("Incorrect format for TPC coordinates. Please ignore negative coordinates. Example: E018S07")
+	# Edits values for correct coordinate grid quadrant
+	# Sanitizes inputs for capital or lowercase
+	if start[0] == 'W' or start[0] == 'w':
+		w_long = abs(int(start[1])) * -1
+	else:
+		w_long = abs(int(start[1]))
+	if start[2] == 'S' or start[2] == 's':
+		s_lat = abs(int(start[3])) * -1
+	else:
+		s_lat = abs(int(start[3]))
+	return w_long, s_lat
+
+#-----------------------------------
+def metadata_featureclasses(MGCP): # (Cell, Subregion, Source) feature class names in the MGCP_Metadata dataset
+	# List and sort feature classes and give them their own variable for the later update cursors
+	ap.env.workspace = MGCP
+	featureclass = ap.ListFeatureClasses()
+	featureclass.sort()
+	if len(featureclass) != 3:
+		raise CellMetadataError("There should be 3 feature classes in the MGCP_Metadata dataset: Cell, Subregion, and Source.\nPlease repair the dataset and try again.")
+	write("\nPopulating metadata feature classes " + str(featureclass[0]) + ", " + str(featureclass[2]) + ", and " + str(featureclass[1]) + " with default values.\nIf you wish to update the default values, edit the default dictionaries in the script.\n")
+	return featureclass[0], featureclass[2], featureclass[1]
 
+#-----------------------------------
+def mgcp_dataset(MGCP): # The MGCP dataset the metadata describes. It sits next to MGCP_Metadata in the same GDB.
+	if MGCP.endswith('_Metadata'):
+		return MGCP[:-len('_Metadata')]
+	return os.path.join(os.path.dirname(MGCP), 'MGCP')
 
-''''''''' New Cell Generation '''''''''
-# Creates list of letters and numbers from TPC variable. ex: E018S07 -> ['E', '018', 'S', '07']
-start = re.findall('(\d+|[A-Za-z]+)', TPC)
-# Error handling for user input
-if len(start) != 4:
-	ap.AddError("Incorrect format for TPC coordinates. Please ignore negative coordinates. Example: E018S07")
-	sys.exit(0)
-# Edits values for correct coordinate grid quadrant
-# Sanitizes inputs for capital or lowercase
-if start[0] == 'W' or start[0] == 'w':
-	start[1] = abs(int(start[1])) * -1
-	w_long = start[1]
-	e_long = start[1] + 1
-else:
-	start[1] = abs(int(start[1]))
-	w_long = start[1]
-	e_long = start[1] + 1
-if start[2] == 'S' or start[2] == 's':
-	start[3] = abs(int(start[3])) * -1
-	s_lat = start[3]
-	n_lat = start[3] + 1
-else:
-	start[3] = abs(int(start[3]))
-	s_lat = start[3]
-	n_lat = start[3] + 1
-
-# Generates a new cell polygon if box is checked
-if new_cell:
-	if len(str(int(start[1]))) == 1:
+#-----------------------------------
+def generate_cell(TPC, w_long, s_lat): # The 1x1 degree cell polygon with its southwest corner at (w_long, s_lat), built in memory
+	if len(str(int(w_long))) == 1:
 		spacing = 1
-	if len(str(int(start[1]))) == 2:
+	if len(str(int(w_long))) == 2:
 		spacing = 2
-	if len(str(int(start[1]))) == 3:
+	if len(str(int(w_long))) == 3:
 		spacing = 3
 
 	# Creates [x,y] point variables
-	start_one = str(start[1]) + '.000000000000'
-	start_three = str(start[3]) + '.000000000000'
+	start_one = str(w_long) + '.000000000000'
+	start_three = str(s_lat) + '.000000000000'
 
 	corner = [float(start_one), float(start_three)]
 	write('\n\nParsing user input for Southwest corner.')
@@ -441,19 +388,11 @@ if new_cell:
 	if corner[0] == float(start_one):
 		write('Coordinates for Cell generation acquired.')
 	else:
-		write('TPC name format invalid. Please try again.')
-		sys.exit(0)
+		raise CellMetadataError('TPC name format invalid. Please try again.')
 
-	# wn = [ws[0], ws[1]+1]
-	# en = [ws[0]+1, ws[1]+1]
-	# es = [ws[0]+1, ws[1]]
-	# coords = [ws, wn, en, es, ws]
+	# ws, wn, en, es, ws
 	# corner = [19.000000000000, -8.000000000000]
-	ws = ap.Point(corner[0], corner[1])
-	wn = ap.Point(corner[0], corner[1]+1)
-	en = ap.Point(corner[0]+1, corner[1]+1)
-	es = ap.Point(corner[0]+1, corner[1])
-	coords = [ws, wn, en, es, ws]
+	shape = ap.Polygon(ap.Array([ap.Point(x, y) for x, y in cell_ring(corner[0], corner[1])]), ap.SpatialReference(4326))
 	write('Constructing new cell polygons based on provided coordinates:\n')
 
 	write(str([corner[0], corner[1]+1]) + '_____' + str([corner[0]+1, corner[1]+1]))
@@ -465,233 +404,279 @@ if new_cell:
 		write('      |                | \n      |                | \n      |                | \n      |                | \n      |                | \n      |                | ')
 	write(str(corner) + '_____' + str([corner[0]+1, corner[1]]))
 
-	# Create a feature class with a spatial reference of GCS WGS 1984
-	ap.CreateFeatureclass_management(MGCP, "bs_skware", "POLYGON", spatial_reference=4326)
+	write('\nConfirmation of Cell vertices at 1 degree intervals:')
+	for pnt in shape.getPart(0):
+		if pnt:
+			# Print x,y coordinates of current point
+			write("{}, {}".format(pnt.X, pnt.Y))
+		else:
+			# If pnt is None, this represents an interior ring
+			write("Interior Ring:")
+	return shape
+
+#-----------------------------------
+def metadata_dicts(TPC, w_long, s_lat, local_date, gait_date, dates, update_edition=True): # (cell, subregion, [(label, source)]) for one cell
+	# Fresh copies of the default dictionaries every time so cells in the same batch can't leak values into each other
+	ex_year = dt.strptime(gait_date, '%Y-%m-%d')
+	curr_year = ex_year.strftime("%Y")
+	write('Year of data production: {0}'.format(curr_year))
+	cell = dict(cell_default)
+	subregion = dict(subregion_default)
+
+	# Dynamic dictionary values updated per run with user values
+	write("\nUpdating metadata dictionaries based on inputs and sources...\n")
+	cell['CCDATE'] = local_date
+	cell['CEDDAT'] = local_date
+	cell['CMDATE'] = local_date
+	cell['CNEWSD'] = dates['img'][0]
+	cell['COLDSD'] = dates['img'][1]
+	cell['CELLID'] = TPC
+	cell['CCPYRT'] = u"Copyright {0} by the National Geospatial-Intelligence Agency, U.S. Government. No domestic copyright claimed under Title 17 U.S.C. All rights reserved.".format(curr_year)
+
+	#Multinational Geospatial Co-production Program (MGCP) dataset covering the 1x1 degree cell between <W> and <E> longitudes and <S> and <N> latitudes
+	#cell['CDESCR'] = b"Multinational Geospatial Co-production Program (MGCP) dataset covering the 1\xC2\xB0x1\xC2\xB0 degree cell between {0} and {1} longitudes and {2} and {3} latitudes.".format(w_long, e_long, s_lat, n_lat)
+	degree_sign = u'\N{DEGREE SIGN}'
+	cell['CDESCR'] = u"Multinational Geospatial Co-production Program (MGCP) dataset covering the 1{4}x1{4} degree cell between {0} and {1} longitudes and {2} and {3} latitudes.".format(w_long, w_long + 1, s_lat, s_lat + 1, degree_sign) # 18 and 19 longitudes and -8 and -7 latitudes # 1°x1° # b"1\xC2\xB0x1\xC2\xB0"
+
+	subregion['SCDATE'] = local_date
+	subregion['SEDDAT'] = local_date
+	subregion['SMDATE'] = local_date
+	subregion['SSVCDT'] = local_date
+	subregion['SVDATE'] = gait_date
+	subregion['SCPYRT'] ='Copyright {0} by the National Geospatial-Intelligence Agency, U.S. Government. No domestic copyright claimed under Title 17 U.S.C. All rights reserved.'.format(curr_year)
+
+	# Checkbox for update edition
+	if not update_edition:
+		subregion['STYPEU'] = 'Complete Update'
+	sources = [('Newest Imagery', dict(new_imagery, SSRCDT=dates['img'][0])),
+				('Oldest Imagery', dict(old_imagery, SSRCDT=dates['img'][1]))]
+
+	# If geonames, DVOF, or AAFIF were used in data collection
+	aafif_check = dates.get('aafif') is not None
+	dvof_check = dates.get('dvof') is not None
+	geo_check = dates.get('geo') is not None
+	if aafif_check:
+		write("AAFIF Source used. Applying dates and Subregion cell updates.")
+		sources.append(('AAFIF', dict(aafif_d, SSRCDT=dates['aafif'])))
+	if dvof_check:
+		write("DVOF Source used. Applying dates and Subregion cell updates.")
+		sources.append(('Newest DVOF', dict(new_dvof_d, SSRCDT=dates['dvof'][0])))
+		sources.append(('Oldest DVOF', dict(old_dvof_d, SSRCDT=dates['dvof'][1])))
+	if geo_check:
+		write("Geonames Source used. Applying dates and Subregion cell updates.")
+		sources.append(('Newest Geonames', dict(new_geonames_d, SSRCDT=dates['geo'])))
+		#sources.append(('Oldest Geonames', dict(old_geonames_d, SSRCDT=geo_date_old)))
+
+	if aafif_check or dvof_check or geo_check:
+		str_aafif = ' AAFIF'
+		str_dvof = ' DVOF'
+		str_geo = ' Geonames'
+		comma = ','
+		str_and = ' and'
 
-	with ap.da.InsertCursor("bs_skware", ["SHAPE@"]) as icursor:
-		icursor.insertRow([ap.Polygon(ap.Array(coords), ap.SpatialReference(4326))])
+		# XTHOR = ((1-a)*(1-b)*(c))+((1-a)*(b)*(1-c))+((a)*(1-b)*(1-c))
+		XTHOR = ((1-aafif_check)*(1-dvof_check)*(geo_check))+((1-aafif_check)*(dvof_check)*(1-geo_check))+((aafif_check)*(1-dvof_check)*(1-geo_check))
+		# DXTHOR = ((1-a)*(b)*(c))+((a)*(1-b)*(c))+((a)*(b)*(1-c))
+		DXTHOR = ((1-aafif_check)*(dvof_check)*(geo_check))+((aafif_check)*(1-dvof_check)*(geo_check))+((aafif_check)*(dvof_check)*(1-geo_check))
+		# THRAND = (a*b*c)
+		THRAND = (aafif_check*dvof_check*geo_check)
 
-	ap.Append_management('bs_skware', fc_cell, 'NO_TEST','First','')
-	ap.Delete_management(os.path.join(MGCP, 'bs_skware'))
+		ze_formula = ((DXTHOR+THRAND)*comma) + (XTHOR*str_and) + (aafif_check*str_aafif) + (((aafif_check*DXTHOR)+THRAND)*comma) + ((aafif_check*DXTHOR)*str_and) + (dvof_check*str_dvof) + ((dvof_check*geo_check)*comma) + ((dvof_check*geo_check)*str_and) + (geo_check*str_geo)
+
+		subregion['SLSTAT'] = "Initial collection using imagery{0}.".format(ze_formula)
+	return cell, subregion, sources
 
-	write('\nConfirmation of Cell vertices at 1 degree intervals:')
-	with ap.da.SearchCursor(fc_cell, ["SHAPE@"]) as ucursor:
-		for row in ucursor:
-			for part in row[0]:
-				corner = 0
-				for pnt in part:
-					if pnt:
-						# Print x,y coordinates of current point
-						write("{}, {}".format(pnt.X, pnt.Y))
-					else:
-						# If pnt is None, this represents an interior ring
-						write("Interior Ring:")
-
-
-
-''''''''' Dictionary Updates '''''''''
-# Dynamic dictionary values updated per run with user values
-write("\nUpdating metadata dictionaries based on inputs and sources...\n")
-cell_default['CCDATE'] = local_date
-cell_default['CEDDAT'] = local_date
-cell_default['CMDATE'] = local_date
-cell_default['CNEWSD'] = img_date_new
-cell_default['COLDSD'] = img_date_old
-cell_default['CELLID'] = TPC
-cell_default['CCPYRT'] = u"Copyright {0} by the National Geospatial-Intelligence Agency, U.S. Government. No domestic copyright claimed under Title 17 U.S.C. All rights reserved.".format(curr_year)
-
-#Multinational Geospatial Co-production Program (MGCP) dataset covering the 1x1 degree cell between <W> and <E> longitudes and <S> and <N> latitudes
-#cell_default['CDESCR'] = b"Multinational Geospatial Co-production Program (MGCP) dataset covering the 1\xC2\xB0x1\xC2\xB0 degree cell between {0} and {1} longitudes and {2} and {3} latitudes.".format(w_long, e_long, s_lat, n_lat)
-degree_sign = u'\N{DEGREE SIGN}'
-cell_default['CDESCR'] = u"Multinational Geospatial Co-production Program (MGCP) dataset covering the 1{4}x1{4} degree cell between {0} and {1} longitudes and {2} and {3} latitudes.".format(w_long, e_long, s_lat, n_lat, degree_sign) # 18 and 19 longitudes and -8 and -7 latitudes # 1°x1° # b"1\xC2\xB0x1\xC2\xB0"
-
-subregion_default['SCDATE'] = local_date
-subregion_default['SEDDAT'] = local_date
-subregion_default['SMDATE'] = local_date
-subregion_default['SSVCDT'] = local_date
-subregion_default['SVDATE'] = gait_date
-subregion_default['SCPYRT'] ='Copyright {0} by the National Geospatial-Intelligence Agency, U.S. Government. No domestic copyright claimed under Title 17 U.S.C. All rights reserved.'.format(curr_year)
-
-# Checkbox for update edition
-if not update_edition:
-	subregion_default['STYPEU'] = 'Complete Update'
-new_imagery['SSRCDT'] = img_date_new
-old_imagery['SSRCDT'] = img_date_old
-
-# If geonames, DVOF, or AAFIF were used in data collection
-if aafif_check:
-	write("AAFIF Source used. Applying dates and Subregion cell updates.")
-	aafif_d['SSRCDT'] = aafif_date
-if dvof_check:
-	write("DVOF Source used. Applying dates and Subregion cell updates.")
-	new_dvof_d['SSRCDT'] = dvof_date_new
-	old_dvof_d['SSRCDT'] = dvof_date_old
-if geo_check:
-	write("Geonames Source used. Applying dates and Subregion cell updates.")
-	new_geonames_d['SSRCDT'] = geo_date_new
-	#old_geonames_d['SSRCDT'] = geo_date_old
-
-if aafif_check or dvof_check or geo_check:
-	str_aafif = ' AAFIF'
-	str_dvof = ' DVOF'
-	str_geo = ' Geonames'
-	comma = ','
-	str_and = ' and'
-
-	# XTHOR = ((1-a)*(1-b)*(c))+((1-a)*(b)*(1-c))+((a)*(1-b)*(1-c))
-	XTHOR = ((1-aafif_check)*(1-dvof_check)*(geo_check))+((1-aafif_check)*(dvof_check)*(1-geo_check))+((aafif_check)*(1-dvof_check)*(1-geo_check))
-	# DXTHOR = ((1-a)*(b)*(c))+((a)*(1-b)*(c))+((a)*(b)*(1-c))
-	DXTHOR = ((1-aafif_check)*(dvof_check)*(geo_check))+((aafif_check)*(1-dvof_check)*(geo_check))+((aafif_check)*(dvof_check)*(1-geo_check))
-	# THRAND = (a*b*c)
-	THRAND = (aafif_check*dvof_check*geo_check)
-
-	ze_formula = ((DXTHOR+THRAND)*comma) + (XTHOR*str_and) + (aafif_check*str_aafif) + (((aafif_check*DXTHOR)+THRAND)*comma) + ((aafif_check*DXTHOR)*str_and) + (dvof_check*str_dvof) + ((dvof_check*geo_check)*comma) + ((dvof_check*geo_check)*str_and) + (geo_check*str_geo)
-
-	subregion_default['SLSTAT'] = "Initial collection using imagery{0}.".format(ze_formula)
-
-
-
-''''''''' Populate Secondary Metadata Tiles '''''''''
-### Cell ###
 #-----------------------------------
-# Creates list of dictionary keys
-cell_fields = cell_default.keys()
-# If a cell polygon already exists and just needs to be updated (from Create New Cell checkbox)
-# Update cursor for cell feature class with the dictionary keys as the fields
-with ap.da.UpdateCursor(fc_cell, cell_fields) as ucursor:
-	write("\nPopulating Metadata Cell feature class geometry and attributes.")
-	for row in ucursor:
-		count = 0
-		# For each field set the value equal to the value in the dictionary for the field key
-		for field in cell_fields:
-			row[count] = cell_default[field]
-			count += 1
-		ucursor.updateRow(row)
-
-# Populates the gfid field using the uuid python function
-with ap.da.UpdateCursor(fc_cell, ['gfid']) as ucursor:
-	for row in ucursor:
-		row[0] = str(uuid.uuid4())
-		ucursor.updateRow(row)
-
-### Subregion ###
+def populate_tiles(fc_cell, fc_subregion, fc_source, cell, subregion, sources, shape=None): # Writes the dictionaries into the Cell, Subregion, and Source feature classes. Returns the cell polygon.
+	# One cursor pass per feature class. The cell polygon is held in memory and handed to the Subregion and Source insert cursors
+	# along with the attributes, instead of copying it back out of the Cell feature class row by row.
+	# Every Source row needs its date. Checked before anything gets written so a cell is never left half populated.
+	undated = [label for label, source in sources if not source.get('SSRCDT')]
+	if undated:
+		raise CellMetadataError("No source date (SSRCDT) for {0}. Nothing was written.".format(", ".join(undated)))
+	### Cell ###
+	#-----------------------------------
+	# Creates list of dictionary keys
+	cell_fields = list(cell.keys())
+	values = [cell[x] for x in cell_fields]
+	if shape is not None:
+		# New cell polygon goes straight into the Cell feature class with its attributes
+		with ap.da.InsertCursor(fc_cell, ['SHAPE@', 'gfid'] + cell_fields) as icursor:
+			write("\nPopulating Metadata Cell feature class geometry and attributes.")
+			# Populates the gfid field using the uuid python function
+			icursor.insertRow([shape, str(uuid.uuid4())] + values)
+	else:
+		# If a cell polygon already exists and just needs to be updated (from Create New Cell checkbox)
+		# Update cursor for cell feature class with the dictionary keys as the fields. Picks up the existing shape on the way through.
+		with ap.da.UpdateCursor(fc_cell, ['SHAPE@', 'gfid'] + cell_fields) as ucursor:
+			write("\nPopulating Metadata Cell feature class geometry and attributes.")
+			for row in ucursor:
+				if shape is None:
+					shape = row[0]
+				ucursor.updateRow([row[0], str(uuid.uuid4())] + values)
+		if shape is None:
+			raise CellMetadataError("There is no cell polygon in {0}. Check Generate Cell Polygon to build one from the TPC.".format(fc_cell))
+
+	### Subregion ###
+	#-----------------------------------
+	# Creates list of dictionary keys
+	sub_fields = list(subregion.keys())
+	# Inserts a new feature with the cell polygon and the values in the dictionary for the field keys
+	with ap.da.InsertCursor(fc_subregion, ['SHAPE@', 'gfid'] + sub_fields) as icursor:
+		write("Populating Metadata Subregion feature class geometry and attributes.")
+		# Creates a list of all the values in the dictionary based on their associated field keys from the list of dictionary keys
+		icursor.insertRow([shape, str(uuid.uuid4())] + [subregion[x] for x in sub_fields])
+
+	### Source ###
+	#-----------------------------------
+	# Creates list of dictionary keys from the source dictionaries themselves. The module level ones don't carry SSRCDT.
+	src_fields = list(sources[0][1].keys())
+	# Inserts new features for all specified sources with the cell polygon and the values in the dictionary for the field keys
+	with ap.da.InsertCursor(fc_source, ['SHAPE@', 'gfid'] + src_fields) as icursor:
+		write("Populating Metadata Source feature class geometry and attributes.\n")
+		# Only the sources that were used made it into the list (the source feature class has the same keys regardless of source type)
+		for label, source in sources:
+			icursor.insertRow([shape, str(uuid.uuid4())] + [source[x] for x in src_fields])
+			write("Created {0} Source feature".format(label))
+	return shape
+
+# Compiled template and TRD definitions, built by the first direct XML and reused for every cell after it in this process
+xml_parts = {}
+
 #-----------------------------------
-# Creates list of dictionary keys
-sub_fields = subregion_default.keys()
-# Inserts a new feature with the values in the dictionary for the field keys
-with ap.da.InsertCursor(fc_subregion, sub_fields) as icursor:
-	write("Populating Metadata Subregion feature class geometry and attributes.")
-	# Creates a list of all the values in the dictionary based on their associated field keys from the list of dictionary keys
-	values = [subregion_default[x] for x in sub_fields]
-	icursor.insertRow(values)
-
-# Updates the shape of the subregion polygon with the shape of the previous cell polygon
-with ap.da.UpdateCursor(fc_subregion, ['SHAPE@', 'gfid']) as ucursor:
-	for row in ucursor:
-		# Populates the gfid field using the uuid python function
-		row[1] = str(uuid.uuid4())
-		with ap.da.SearchCursor(fc_cell, 'SHAPE@') as scursor:
-			for fc in scursor:
-				row[0] = fc[0]
-		ucursor.updateRow(row)
-
-### Source ###
+def cell_xml_parts(): # (CellTemplate, {F_Code: definition}) built once per process
+	if not xml_parts:
+		xml_parts['template'] = CellTemplate()
+		xml_parts['definitions'] = load_definitions()
+	return xml_parts['template'], xml_parts['definitions']
+
 #-----------------------------------
-# Creates list of dictionary keys
-src_fields = new_imagery.keys()
-# Inserts new features for all specified sources with the values in the dictionary for the field keys
-with ap.da.InsertCursor(fc_source, src_fields) as icursor:
-	write("Populating Metadata Source feature class geometry and attributes.\n")
-	# Creates lists of all the values in the dictionaries based on their associated field keys from the list of dictionary keys (the source feature class has the same keys regardless of source type)
-	img_new_vals = [new_imagery[x] for x in src_fields]
-	img_old_vals = [old_imagery[x] for x in src_fields]
-	# Only generates features if they are specified as sources from user input
-	if aafif_check:
-		aafif_vals = [aafif_d[x] for x in src_fields]
-	if dvof_check:
-		new_dvof_vals = [new_dvof_d[x] for x in src_fields]
-		old_dvof_vals = [old_dvof_d[x] for x in src_fields]
-	if geo_check:
-		new_geo_vals = [new_geonames_d[x] for x in src_fields]
-		#old_geo_vals = [old_geonames_d[x] for x in src_fields]
-
-	# Inserts the features based on the source values defined above
-	icursor.insertRow(img_new_vals)
-	write("Created Newest Imagery Source feature")
-	icursor.insertRow(img_old_vals)
-	write("Created Oldest Imagery Source feature")
-	# Only generates features if they are specified as sources from user input
-	if aafif_check:
-		icursor.insertRow(aafif_vals)
-		write("Created AAFIF Source feature")
-	if dvof_check:
-		icursor.insertRow(new_dvof_vals)
-		write("Created Newest DVOF Source feature")
-		icursor.insertRow(old_dvof_vals)
-		write("Created Oldest DVOF Source feature")
-	if geo_check:
-		icursor.insertRow(new_geo_vals)
-		write("Created Newest Geonames Source feature")
-		#icursor.insertRow(old_geo_vals)
-		#write("Created Oldest Geonames Source feature")
-
-# Updates the shapes of the source polygons with the shape of the previous cell polygon
-with ap.da.UpdateCursor(fc_source, ['SHAPE@', 'gfid']) as ucursor:
-	for row in ucursor:
-		# Populates the gfid field using the uuid python function
-		row[1] = str(uuid.uuid4())
-		with ap.da.SearchCursor(fc_cell, 'SHAPE@') as scursor:
-			for fc in scursor:
-				row[0] = fc[0]
-		ucursor.updateRow(row)
-
-
-
-''''''''' Export XML Metadata '''''''''
-try:
-	# Checks out Defense Mapping extension
-	ap.CheckOutExtension("defense")
-	write("\nExporting metadata to XML file...")
-	# Runs Export MGCP XML Metadata tool from Defense Mapping using the cell path and the export path
-	ap.ExportMetadata_defense(cell_path, export_path)
-
-	write("Replacing misattributed 'MGCP_v4_r2' with 'MGCP_v4_r5.1' in the XML output.")
-	xml_out = os.path.join(export_path, TPC + '.xml')
-	xml_mod = os.path.join(export_path, TPC + '_mod.xml')
-	if os.path.exists(xml_mod):
-		write("Modified XML file already exists. Replacing modified XML with new version.")
-		os.remove(xml_mod)
-	old_trd = 'MGCP_v4_r2'
-	current_trd = 'MGCP_v4_r5.1'
-
-	with open(xml_out, 'r') as x_out, open(xml_mod, 'a') as x_mod:
-		line_num = 0
-		values_repaired = 0
-		while True:
-			line_num +=1
-			line = x_out.readline()
-			if line == '': break
-			if old_trd in line:
-				values_repaired +=1
-				line = line.replace(old_trd, current_trd)
-				write("~ Found '{0}' tag on line {1} ~".format(old_trd, line_num))
-			x_mod.write(line)
-	write("Replaced {0} '{1}' tags with '{2}'".format(values_repaired, old_trd, current_trd))
-
-	# Remove original metadata output and rename the modified one to match what it should be.
-	os.remove(xml_out)
-	os.rename(xml_mod, xml_out)
+def write_cell_xml(MGCP, shape, xml_out, cell, subregion, sources): # Writes the cell XML straight from the dictionaries. No Defense license, no fixing afterwards.
+	mgcp_data = mgcp_dataset(MGCP)
+	if not ap.Exists(mgcp_data):
+		raise CellMetadataError("MGCP dataset must be in the GDB along with the MGCP_Metadata dataset.")
+	write("\nWriting metadata XML file...")
+	catalogue = load_catalogue()
+	template, definitions = cell_xml_parts()
+	present, counts = dataset_features(mgcp_data, catalogue)
+	features, missing = feature_entries(present, catalogue, definitions)
+	if missing:
+		ap.AddWarning("No TRD definition found for {0}. Their file descriptions fall back to the feature name.\nPut {1} next to the scripts to fill them in.".format(", ".join(sorted(set(missing))), trd_catalogue))
+	ring = [(pnt.X, pnt.Y) for pnt in shape.getPart(0) if pnt]
+	# Sources go in the lineage in the same order they were added to the Source feature class
+	template.write(xml_out, cell, subregion, [source for label, source in sources], ring, features, counts)
+	write("{0} feature types, {1} points, {2} lines, {3} areas".format(len(features), counts['P'], counts['L'], counts['A']))
+	return xml_out
+
+#-----------------------------------
+def export_cell_xml(MGCP, fc_cell, xml_out): # Export Metadata from Defense Mapping, then one buffered pass over it with the TRD rule table
+	cell_path = os.path.join(MGCP, fc_cell)
+	export_path = os.path.dirname(xml_out)
+	try:
+		# Checks out Defense Mapping extension
+		ap.CheckOutExtension("defense")
+		write("\nExporting metadata to XML file...")
+		# Runs Export MGCP XML Metadata tool from Defense Mapping using the cell path and the export path
+		ap.ExportMetadata_defense(cell_path, export_path)
+		ap.CheckInExtension("defense")
+	except:
+		# Error handling. The Metadata dataset has to be in the GDB with a local copy of the data
+		raise CellMetadataError("MGCP dataset must be in the GDB along with the MGCP_Metadata dataset.")
+
+	# One buffered pass over the export with the TRD rule table, then an atomic swap over the original
+	path, matches, error = fix_job((xml_out, trd_rules))
+	if error:
+		ap.AddError("Couldn't fix the TRD tags in {0}:\n{1}".format(xml_out, error))
+	write(summary([(path, matches, error)]))
+	return xml_out
+
+#-----------------------------------
+def populate_cell(MGCP, TPC, local_date, gait_date, dates, new_cell=True, update_edition=True, direct_xml=True): # Everything for one cell. Returns the XML path.
+	# MGCP is the MGCP_Metadata feature dataset. dates comes from source_dates().
+	ap.env.workspace = MGCP
+	ap.env.overwriteOutput = True
+	fc_cell, fc_subregion, fc_source = metadata_featureclasses(MGCP)
+	# Checks for proper format of user input dates
+	write("Validating input date fields...")
+	check_dates(local_date, gait_date, dates.get('aafif'))
+	w_long, s_lat = parse_tpc(TPC)
+	# Generates a new cell polygon if box is checked. Otherwise the one already in the Cell feature class is used.
+	shape = generate_cell(TPC, w_long, s_lat) if new_cell else None
+	cell, subregion, sources = metadata_dicts(TPC, w_long, s_lat, local_date, gait_date, dates, update_edition)
+	shape = populate_tiles(fc_cell, fc_subregion, fc_source, cell, subregion, sources, shape)
+	# Sets path for the XML metadata export as the folder containing the GDB
+	xml_out = os.path.join(os.path.dirname(os.path.dirname(MGCP)), TPC + '.xml')
+	if direct_xml:
+		return write_cell_xml(MGCP, shape, xml_out, cell, subregion, sources)
+	return export_cell_xml(MGCP, fc_cell, xml_out)
+
+
+
+''''''''' User Parameters '''''''''
+#-----------------------------------
+def main():
+	## [0] MGCP_Metadata Dataset - Feature Dataset
+	MGCP = ap.GetParameterAsText(0)
+	## [1] Generate Cell Polygon? - Boolean # Default: True
+	new_cell = ap.GetParameter(1)
+	## [2] Imagery Footprint (Original) - Shapefile
+	img_foot = ap.GetParameterAsText(2)
+	## [3] TPC Coordinates (Cell ID - i.e. E018S07) - String
+	TPC = ap.GetParameterAsText(3)
+	## [4] Edition 1 Update? - Boolean # Default: True
+	# "Leave attribute field blank for Edition 1. Populate with 'Complete Update' for Edition 2, 3, etc."
+	update_edition = ap.GetParameter(4)
+	## [5] Date the database was pulled local (Format as YYYY-MM-DD) - String
+	local_date = ap.GetParameterAsText(5) # Date TPC was pulled local for finishing YYYY-MM-DD (for latest extraction date)
+	## [6] Delivery Date (Format as YYYY-MM-DD) - String
+	gait_date = ap.GetParameterAsText(6) # Delivery date (for date of final GAIT run)
+	### Ancillary Sources
+	# AAFIF
+	## [7] Was an AAFIF source used? - Boolean # Default: False
+	aafif_check = ap.GetParameter(7) # There is absolutely too much miscellaneous nonsense with this junk. Just find the date yourself and input it.
+	## [8] Newest AAFIF Date (Format as YYYY-MM-DD) (Optional) - String
+	aafif_date = ap.GetParameterAsText(8) # YYYY-MM-DD
+	# DVOF
+	## [9] Was a DVOF source used? - Boolean # Default: False
+	dvof_check = ap.GetParameter(9) # Did you use DVOF checkbox
+	## [10] Was the DVOF source a shapefile? (Optional) - Boolean # Default: False
+	dvof_shp_check = ap.GetParameter(10) # Why can nothing ever be consistent. This is for if you only have a DVOF source shapefile (point only)
+	## [11] DVOF Point Feature Class (or shapefile if necessary) (Optional) - Feature Class
+	dvof_file = ap.GetParameterAsText(11)
+	# Geonames
+	## [12] Was a Geonames source used? - Boolean # Default: False
+	geo_check = ap.GetParameter(12) # Did you use geonames checkbox
+	## [13] Was the Geonames source a shapefile? (Optional) - Boolean # Default: False
+	geo_shp_check = ap.GetParameter(13) # Do you only have access to a Geonames shapefile in stead of a FC for some incredibly inconvenient reason?
+	## [14] Geonames Point Feature Class (or shapefile if necessary) (Optional) - Feature Class
+	geo_file = ap.GetParameterAsText(14)
+	## [15] Write the XML directly instead of with Export Metadata? (No Defense Mapping license needed) - Boolean # Default: True
+	direct_xml = ap.GetParameter(15)
+	if direct_xml is None: # Toolboxes without the parameter yet
+		direct_xml = True
+
+	try:
+		# Checks the dates before the slow source reads so a typo doesn't cost a full read of the sources
+		check_dates(local_date, gait_date, aafif_date if aafif_check else None)
+		# Dates # SANITIZE ALL THEIR STUPID INCONSISTENT INPUTS
+		dates = source_dates(img_foot, aafif_date if aafif_check else None,
+							dvof_file if dvof_check else None, dvof_shp_check,
+							geo_file if geo_check else None, geo_shp_check)
+		xml_out = populate_cell(MGCP, TPC, local_date, gait_date, dates, new_cell, update_edition, direct_xml)
+	except CellMetadataError as e:
+		ap.AddError(str(e))
+		sys.exit(0)
 
 	ap.AddWarning("\n\nXML file is located here:")
 	ap.AddWarning(xml_out)
-	ap.CheckInExtension("defense")
 	ap.AddWarning("\n\n==== Metadata construction is complete! ====\n")
-except:
-	# Error handling. The Metadata dataset has to be in the GDB with a local copy of the data
-	ap.AddError("MGCP dataset must be in the GDB along with the MGCP_Metadata dataset.")
 
 
 
+if __name__ == '__main__':
+	main()
+
+
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 #                                  Trash Pile                                  #
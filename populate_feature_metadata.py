@@ -8,8 +8,13 @@ from arcpy import AddMessage as write
 from datetime import datetime as dt
 import time
 import uuid
+from collections import Counter
 import sys
 import inspect
+import numpy as np
+from imagery_footprint import FootprintIndex, load_footprints, iter_footprint_hits
+from preflight import scan_dataset, uid_bytes, same_guid, same_value, text_lengths
+from dataset_snapshot import dataset_snapshot
 
 #            _________________________________
 #           | Takes an MGCP dataset and       |
@@ -26,10 +31,6 @@ import inspect
 
 
 
-def get_count(fc): # Returns feature count
-    results = int(ap.GetCount_management(fc).getOutput(0))
-    return results
-
 # Explicit is better than implicit
 # Lambda function works better than "if not fieldname:", which can falsely catch 0.
 populated = lambda x: x is not None and str(x).strip() != '' # Function that returns boolean of if input field is populated or empty
@@ -53,40 +54,271 @@ def debug_view(**kwargs): # Input variable to view info in script output
 			return
 
 #-----------------------------------
-def update_uid(): # Iterate through all features and update the uid field with uuid4 random values
-	uid_total = 0
-	ap.AddWarning("\nThe Global Feature Identifier field that ESRI is 100% certain always \"provides sufficient combinations within a database and cannot be duplicated\" has, in fact, made quite a few duplicates.\nSince the field is a special type (and can't be duplicated), we aren't allowed to edit the values. But by some miracle, it keeps making the \"impossible\" duplicates...\n")
-	for fc in featureclass:
-		if not get_count(fc):
+def day_ordinal(date): # Days since 0001-01-01 with the time of day as the fraction so datetimes can be compared in NumPy arrays
+	return date.toordinal() + (date.hour * 3600 + date.minute * 60 + date.second + date.microsecond / 1e6) / 86400.0
+
+#-----------------------------------
+def sdv_rule(sdv, acquisition): # Returns the formatted acquisition date if this footprint should replace the feature SDV, None to keep it
+	# Raises on a NULL SDV or a NULL acquisition date so the caller can flag the feature
+	cell_date = acquisition.strftime("%Y-%m-%d") # Assumes properly downloaded imagery footprint shapefile will have the Acquisition field as a date object
+	if 'N_A' in sdv or not populated(sdv): # If the feature SDV field contains 'N_A' cz of some stupid analyst or is not populated
+		return cell_date
+	try:
+		feat_date = dt.strptime(sdv, "%Y-%m-%d") # Parse what should be a text field in this format
+	except: # The SDV fild has some oddball value or an incorrectly formatted date. Fuck it. Overwrite it.
+		return cell_date
+	if acquisition > feat_date:
+		return cell_date
+	return None
+
+#-----------------------------------
+def fc_strategy(fc): # A point only ever overlaps the footprint that holds it, so point feature classes always use the centroid strategy
+	if snap.info(fc).shape_type == 'Point':
+		return 'Centroid'
+	return sdv_strategy
+
+#-----------------------------------
+def sdv_token(fc): # Cheapest shape token that still gives the SDV strategy what it needs
+	token = strategy_tokens[fc_strategy(fc)]
+	if token == 'SHAPE@TRUECENTROID' and snap.info(fc).shape_type == 'Point':
+		token = 'SHAPE@XY' # Same coordinates for points without working out a centroid
+	return token
+
+#-----------------------------------
+def majority_footprint(shape, dim, footprints, foot_index): # Index of the footprint the shape overlaps the most, by area for polygons and length for lines
+	# Bounding box prefilter from the index first so only the strips that can touch the feature get overlaid.
+	# A footprint that holds the whole feature counts its full measure without building the intersection.
+	ext = shape.extent
+	full = shape.area if dim == 4 else shape.length
+	best = None
+	best_measure = 0.0
+	for i in foot_index.candidates_extent(ext.XMin, ext.YMin, ext.XMax, ext.YMax):
+		fp_shape = footprints[i][1]
+		if fp_shape.disjoint(shape):
+			continue
+		if fp_shape.contains(shape):
+			measure = full
+		else:
+			piece = shape.intersect(fp_shape, dim)
+			measure = piece.area if dim == 4 else piece.length
+		if measure > 0 and measure >= best_measure: # Ties go to the later footprint, same as the centroid strategy
+			best = i
+			best_measure = measure
+	return best
+
+#-----------------------------------
+def sdv_read_savings(fc): # Times a read of the SDV shape token against a full SHAPE@ read and estimates the memory each one holds
+	token = sdv_token(fc)
+	start = time.time()
+	rows = 0
+	with ap.da.SearchCursor(fc, ['OID@', token]) as scursor:
+		for srow in scursor:
+			rows += 1
+	token_time = time.time() - start
+	start = time.time()
+	vertices = 0
+	with ap.da.SearchCursor(fc, ['OID@', 'SHAPE@']) as scursor:
+		for srow in scursor:
+			if srow[-1] is not None:
+				vertices += srow[-1].pointCount
+	shape_time = time.time() - start
+	# 16 bytes per x,y pair. Geometry objects carry more overhead than this so the full read estimate is a floor.
+	token_kb = rows * 16 / 1024.0
+	shape_kb = vertices * 16 / 1024.0
+	write("{0} read: {1} {2} values in {3:.2f} s (~{4:.0f} KB) vs SHAPE@ with {5} vertices in {6:.2f} s (~{7:.0f} KB). Saved {8:.2f} s and ~{9:.0f} KB.".format(fc, rows, token, token_time, token_kb, vertices, shape_time, shape_kb, shape_time - token_time, shape_kb - token_kb))
+	return shape_time - token_time, shape_kb - token_kb
+
+#-----------------------------------
+def flag_null_geometry(fc, oid, null_geom_list): # Checks shape for NULL geometries left over from Topology or bad data
+	ap.AddError("*** WARNING ***")
+	ap.AddError("NULL geometry found in {0} feature OID: {1}\nMake sure you have run the MGCP Finishing Tool.\nIf the problem persists, try running Repair Geometry manually and trying again.".format(fc, oid))
+	null_geom_list.append(oid)
+
+#-----------------------------------
+def flag_sdv_error(fc, oid, unknown_err_list): # If SDV is NULL or incorrect format, skip to next feature
+	ap.AddError("Encountered a problem while applying the Imagery Footprint acquisition date to {0} feature OID: {1}. Possibly a NULL value in the imagery acquisition date or NULL geometry or attribute in the feature.\nPlease check the validity of the Imagery Footprint and try again.\n**If this problem persists, you may have to manually attribute the SDV of the {0} feature. Please attribute it with the oldest Acquisition field date in the Imagery Footprint that intersects it.".format(fc, oid))
+	unknown_err_list.append(oid)
+
+#-----------------------------------
+def centroid_sdv(fc, rows, footprints, foot_index): # Centroid strategy with Geometry.contains on rows already read into memory
+	# Returns {row index: new SDV} along with the OIDs that failed or had NULL geometry
+	new_sdv = {}
+	unknown_err_list = []
+	null_geom_list = []
+	for k, row in enumerate(rows):
+		xy = row[SHAPE]
+		if xy is None or xy[0] is None:
+			flag_null_geometry(fc, row[OID], null_geom_list)
+			continue
+		centroid = ap.Point(xy[0], xy[1])
+		try:
+			for i in foot_index.candidates(centroid.X, centroid.Y): # Only the footprints whose extent holds the centroid, still in cursor order
+				acquisition, shape = footprints[i]
+				if shape.contains(centroid): # If the current feature centroid is within this imagery footprint polygon
+					cell_date = sdv_rule(row[SDV], acquisition)
+					if cell_date is not None:
+						new_sdv[k] = cell_date
+		except:
+			new_sdv.pop(k, None)
+			flag_sdv_error(fc, row[OID], unknown_err_list)
+	return new_sdv, unknown_err_list, null_geom_list
+
+#-----------------------------------
+def overlap_sdv(fc, rows, footprints, foot_index): # Majority overlap SDV strategy for line and polygon feature classes
+	dim = 4 if snap.info(fc).shape_type == 'Polygon' else 2
+	new_sdv = {}
+	unknown_err_list = []
+	null_geom_list = []
+	for k, row in enumerate(rows):
+		if row[SHAPE] is None:
+			flag_null_geometry(fc, row[OID], null_geom_list)
+			continue
+		try:
+			best = majority_footprint(row[SHAPE], dim, footprints, foot_index)
+			if best is None:
+				continue
+			cell_date = sdv_rule(row[SDV], footprints.dates[best])
+		except:
+			flag_sdv_error(fc, row[OID], unknown_err_list)
+			continue
+		if cell_date is not None:
+			new_sdv[k] = cell_date
+	return new_sdv, unknown_err_list, null_geom_list
+
+#-----------------------------------
+def numpy_sdv(fc, rows, footprints, foot_rings, foot_extents): # Batched centroid strategy for the NumPy backend
+	# Gathers every centroid in the feature class into arrays and ray casts them against the footprint rings.
+	# The footprints are still applied in cursor order with the same date rules as the ArcPy backend.
+	keep = []
+	xs = []
+	ys = []
+	null_geom_list = []
+	for k, row in enumerate(rows):
+		xy = row[SHAPE]
+		if xy is None or xy[0] is None:
+			flag_null_geometry(fc, row[OID], null_geom_list)
+			continue
+		keep.append(k)
+		xs.append(xy[0])
+		ys.append(xy[1])
+
+	# mode 0: NULL SDV, errors out if any footprint holds it
+	# mode 1: 'N_A', empty, or unparsable SDV, always overwritten
+	# mode 2: valid date, only overwritten by a newer acquisition
+	mode = np.zeros(len(keep), dtype=np.int8)
+	feat_day = np.zeros(len(keep), dtype=np.float64)
+	for j, k in enumerate(keep):
+		sdv = rows[k][SDV]
+		if sdv is None:
+			continue
+		if 'N_A' in sdv or not populated(sdv):
+			mode[j] = 1
+			continue
+		try:
+			feat_day[j] = day_ordinal(dt.strptime(sdv, "%Y-%m-%d"))
+			mode[j] = 2
+		except:
+			mode[j] = 1
+
+	match = np.full(len(keep), -1, dtype=np.int64)
+	failed = np.zeros(len(keep), dtype=bool)
+	for i, hits in iter_footprint_hits(xs, ys, foot_rings, foot_extents):
+		acquisition = footprints.dates[i]
+		try:
+			acq_day = day_ordinal(acquisition)
+		except:
+			failed[hits] = True # NULL or non-date Acquisition value in the footprint
+			continue
+		failed[hits[mode[hits] == 0]] = True
+		newer = hits[(mode[hits] == 1) | ((mode[hits] == 2) & (acq_day > feat_day[hits]))]
+		match[newer] = i
+
+	new_sdv = {}
+	unknown_err_list = []
+	for j in np.nonzero(failed | (match >= 0))[0]:
+		if failed[j]:
+			flag_sdv_error(fc, rows[keep[j]][OID], unknown_err_list)
 			continue
-		write("\nSearching {0} UIDs in {1} for bad or missing values.".format(get_count(fc), fc))
-		uid_count = 0
-		with ap.da.SearchCursor(fc, ['uid']) as scursor:
-			uid_values = [srow[0] for srow in scursor]
-		with ap.da.UpdateCursor(fc, ['uid']) as ucursor:
+		new_sdv[keep[j]] = footprints.dates[match[j]].strftime("%Y-%m-%d")
+	return new_sdv, unknown_err_list, null_geom_list
+
+#-----------------------------------
+def new_uid(seen): # uuid4 that isn't already used anywhere in the dataset
+	new = uuid.uuid4()
+	while new.bytes in seen:
+		new = uuid.uuid4()
+	return new
+
+#-----------------------------------
+def fix_uids(rows, seen, reasons): # Replaces missing, malformed, or duplicate uid values in memory and keeps gfid matching uid
+	# Returns (UIDs replaced, GFIDs that were out of sync with their uid). Only those rows end up written.
+	# seen holds every UID kept so far across all the feature classes, stored as 16 byte binaries instead of 36 character strings.
+	# The first feature to use a UID keeps it and any later feature in any feature class with the same UID gets a new one.
+	uid_count = 0
+	gfid_count = 0
+	for row in rows:
+		key = uid_bytes(row[UID])
+		if key is None:
+			reasons['missing' if not populated(row[UID]) else 'malformed'] += 1
+		elif key in seen:
+			reasons['duplicate'] += 1
+		if key is None or key in seen:
+			new = new_uid(seen)
+			key = new.bytes
+			row[UID] = str(new)
+			uid_count += 1
+		seen.add(key)
+		if not same_guid(row[GFID], row[UID]):
+			row[GFID] = '{' + str(row[UID]).upper() + '}'
+			gfid_count += 1
+	return uid_count, gfid_count
+
+#-----------------------------------
+def expected_metadata(fc): # The values fill_metadata always writes, for the preflight to compare against
+	if 'TextP' in fc:
+		expected = {'ccn' : ccn, 'sdp' : "GeoNames", 'srt' : 25}
+		if geo_used: expected['sdv'] = geo_date_new
+		return expected
+	return {'ccn' : ccn, 'sdp' : sdp, 'srt' : srt}
+
+#-----------------------------------
+def fill_metadata(fc, row): # Standard feature level metadata in memory
+	if not populated(row[ACC]):
+		row[ACC] = acc
+	row[CCN] = ccn
+	row[SDP] = sdp
+	row[SRT] = srt
+	if not populated(row[TXT]):
+		row[TXT] = txt
+	if 'TextP' in fc:
+		row[SDP] = "GeoNames"
+		row[SRT] = 25 # GeoNames
+		if geo_used: row[SDV] = geo_date_new
+
+#-----------------------------------
+def changed_fields(old, row, lengths): # Indices of the fields in row that differ from the values that were read
+	return [i for i in range(1, len(row_fields)) if not same_value(old[i], row[i], lengths.get(row_fields[i]))]
+
+#-----------------------------------
+def write_rows(fc, changed, total): # Writes the changed rows back by OID. Nothing is written for rows that didn't change.
+	if not changed:
+		return 0
+	updates = dict((row[OID], row[:len(row_fields)]) for row in changed)
+	if len(updates) * 2 > total:
+		# Most of the feature class changed. One pass over everything beats a pile of where clauses.
+		wheres = [None]
+	else:
+		oid_field = ap.AddFieldDelimiters(fc, snap.info(fc).oid_field)
+		oids = sorted(updates.keys())
+		wheres = ["{0} IN ({1})".format(oid_field, ",".join(str(o) for o in oids[i:i+1000])) for i in range(0, len(oids), 1000)]
+	written = 0
+	for where in wheres:
+		with ap.da.UpdateCursor(fc, row_fields, where) as ucursor:
 			for urow in ucursor:
-				if not populated(urow[0]):
-					urow[0] = str(uuid.uuid4())
-					uid_count += 1
-				if len(urow[0]) != 36: # 36 character random alphanumeric string
-					urow[0] = str(uuid.uuid4()) # GOTOHELL-FUCK-COCK-PISS-MOTHERFUCKER and LEONARDO-EATS-FROG-EGGS-DISGUSTINGLY are valid XD
-					uid_count += 1
-				if uid_values.count(urow[0]) > 1:
-					urow[0] = str(uuid.uuid4())
-					uid_count += 1
-				ucursor.updateRow(urow)
-			if uid_count:
-				write("Updated {0} MGCP UIDs in {1}".format(uid_count, fc))
-			uid_total += uid_count
-
-		gfid_field = 'gfid'
-		gfid_uid_expression = '!uid!'
-		write("Brute forcing the unduplicable GFID field in {0} to no longer contain duplicates...".format(fc))
-		ap.CalculateField_management(fc, gfid_field, gfid_uid_expression, "PYTHON_9.3")
-		write("Finished manually updating all the already perfect GFID values in {0}\n".format(fc))
-
-	ap.AddWarning("{0} invalid or missing UID or GFID values updated.".format(uid_total))
-	return uid_total
+				if urow[OID] in updates:
+					ucursor.updateRow(updates[urow[OID]])
+					written += 1
+	return written
 
 
 ''''''''' Parameters and Variables '''''''''
@@ -107,6 +339,19 @@ geo_used = ap.GetParameter(5) # Default: False
 geo_shp_check = ap.GetParameter(6)  # Default: False
 ## [] Geonames Point Feature Class (or shapefile if necessary) - Feature Class
 geo_file = ap.GetParameterAsText(7)
+## [8] SDV Backend - String # Default: 'ArcPy'
+# 'ArcPy' tests each centroid with Geometry.contains. 'NumPy' ray casts every centroid in a feature class at once.
+sdv_backend = ap.GetParameterAsText(8)
+if not populated(sdv_backend):
+	sdv_backend = 'ArcPy'
+## [9] Report SDV read savings? - Boolean # Default: False
+# Also reads each feature class with full SHAPE@ geometry to report the time and memory the centroid token saves
+sdv_savings = ap.GetParameter(9)
+## [10] SDV Strategy - String # Default: 'Centroid'
+# 'Centroid' takes the footprint holding the feature centroid. 'Majority Overlap' takes the footprint covering the most of the feature by area (polygons) or length (lines).
+sdv_strategy = ap.GetParameterAsText(10)
+if not populated(sdv_strategy):
+	sdv_strategy = 'Centroid'
 
 if run_fin_tool == False:
 	write("\n\n\n**********************************************************")
@@ -120,8 +365,8 @@ ap.env.workspace = MGCP
 workspace = ap.env.workspace
 ap.env.overwriteOutput = True
 ap.RefreshCatalog(MGCP)
-featureclass = ap.ListFeatureClasses()
-featureclass.sort()
+snap = dataset_snapshot(MGCP, refresh=True) # Feature classes, fields, and geometry types for the whole run from one Describe
+featureclass = list(snap.featureclass)
 error_event = 0
 
 
@@ -187,64 +432,93 @@ else:
 error_event += ap.GetMaxSeverity()
 
 
-sdv_fields = ['sdv', 'OID@', 'SHAPE@'] #Source Date Value(SDV) field and the true centroid token of each feature to find which footprint it mostly overlaps
+# One row layout for the whole fused pass. The SDV shape token gets tacked on the end per feature class.
+row_fields = ['OID@', 'sdv', 'uid', 'gfid', 'acc', 'ccn', 'sdp', 'srt', 'txt']
+OID, SDV, UID, GFID, ACC, CCN, SDP, SRT, TXT, SHAPE = range(10)
+# Shape token each SDV strategy needs. Only the centroid coordinates get read instead of materializing every vertex of the full geometry.
+strategy_tokens = {'Centroid' : 'SHAPE@TRUECENTROID',
+					'Majority Overlap' : 'SHAPE@'}
 fc_fields = ['acc', 'ccn', 'sdp', 'srt', 'txt', 'sdv']
-img_fields = ['Acquisitio', 'SHAPE@'] #Acquisition date for the imagery footprint polygons and the shape token for comparisons
+
+acc = 1 # If not already
+ccn = r"Copyright {0} by the National Geospatial-Intelligence Agency, U.S. Government. No domestic copyright claimed under Title 17 U.S.C. All rights reserved.".format(curr_year)
+sdp = "Very High Resolution Commercial Monoscopic Imagery"
+srt = 110 # Very High Resolution Commercial Monoscopic Imagery
+txt = 'N_A' # Unless populated
 
 
-''''''''' Update Spatial SDV Values '''''''''
+''''''''' Load Imagery Footprint '''''''''
 if sdv_check:
-	for fc in featureclass:
-		if not get_count(fc):
-			continue
+	# Read the imagery footprint once and index the polygons by their bounding boxes for every feature class
+	# Comes from the sidecar cache next to the shapefile unless the footprint files changed since it was written
+	write("\nLoading imagery footprint polygons...")
+	start = time.time()
+	footprints = load_footprints(img_foot) # footprints[i] = (Acquisitio, SHAPE@)
+	write("{0} imagery footprint polygons {1} in {2:.2f} s.".format(len(footprints), "loaded from cache" if footprints.cached else "read and cached", time.time() - start))
+	foot_index = FootprintIndex(footprints.extents)
+	write("Indexed {0} imagery footprint polygons.".format(len(foot_index)))
+	if sdv_strategy not in strategy_tokens:
+		ap.AddError("Unknown SDV strategy '{0}'. Use one of: {1}".format(sdv_strategy, ", ".join(sorted(strategy_tokens.keys()))))
+		sys.exit(0)
+	write("SDV strategy: {0}".format(sdv_strategy))
+	if sdv_backend == 'NumPy':
+		write("Using the NumPy SDV backend.")
+		foot_rings = footprints.rings
+
 
-		write('\n== Searching {0} features for matching footprints. =='.format(fc))
-		with ap.da.UpdateCursor(fc, sdv_fields) as ucursor: # ['sdv', 'OID@', 'SHAPE@']
-			# For each feature in the feature class, blanket update the SDV field with the oldest imagery date cz fuck accuracy, we want consistency.
-			count = 0
-			unknown_err_list = []
-			null_geom_list = []
-			for urow in ucursor: # Iterate thru each feature in the fc
-				# Checks shape for NULL geometries left over from Topology or bad data
-				if urow[-1] is None:
-					ap.AddError("*** WARNING ***")
-					ap.AddError("NULL geometry found in {0} feature OID: {1}\nMake sure you have run the MGCP Finishing Tool.\nIf the problem persists, try running Repair Geometry manually and trying again.".format(fc, oid))
-					null_geom_list.append(oid)
-					continue
-				sdv = urow[0]
-				oid = urow[1]
-				centroid = urow[-1].trueCentroid
-
-				try:
-					with ap.da.SearchCursor(img_foot, img_fields) as scursor: # ['Acquisitio', 'SHAPE@']
-						for srow in scursor: # Iterate thru each imagery footprint polygon
-							acquisition = srow[0]
-							shape = srow[-1]
-							if shape.contains(centroid): # If the current feature centroid is within this imagery footprint polygon
-								cell_date = acquisition.strftime("%Y-%m-%d") # Assumes properly downloaded imagery footprint shapefile will have the Acquisition field as a date object
-								if 'N_A' in sdv or not populated(sdv): # If the feature SDV field contains 'N_A' cz of some stupid analyst or is not populated
-									urow[0] = cell_date
-									count += 1
-								elif populated(sdv): # If instead, the SDV field is populated with (hopefully) a date
-									try:
-										feat_date = dt.strptime(sdv, "%Y-%m-%d") # Parse what should be a text field in this format
-										if acquisition > feat_date:
-											urow[0] = cell_date
-											count += 1
-									except: # The SDV fild has some oddball value or an incorrectly formatted date. Fuck it. Overwrite it.
-										urow[0] = cell_date
-										count += 1
-										continue
-				except:
-					# If SDV is NULL or incorrect format, skip to next feature
-					ap.AddError("Encountered a problem while applying the Imagery Footprint acquisition date to {0} feature OID: {1}. Possibly a NULL value in the imagery acquisition date or NULL geometry or attribute in the feature.\nPlease check the validity of the Imagery Footprint and try again.\n**If this problem persists, you may have to manually attribute the SDV of the {0} feature. Please attribute it with the oldest Acquisition field date in the Imagery Footprint that intersects it.".format(fc, oid))
-					unknown_err_list.append(oid)
-					continue
-
-				ucursor.updateRow(urow)
+''''''''' Preflight '''''''''
+# Attribute only pass over the dataset. Without the SDV update, feature classes whose UIDs, GFIDs, and
+# metadata are already right get skipped entirely below. With it every feature class gets read anyway,
+# so the scan would only be an extra read of each one.
+report = None
+if not sdv_check:
+	write("\nRunning preflight scan...")
+	report = scan_dataset(featureclass, geometry=False, metadata=expected_metadata, log=write, snapshot=snap)
+	if report.total('sdv_unpopulated') + report.total('sdv_na'):
+		ap.AddWarning("{0} features have an unpopulated or 'N_A' SDV and Update Spatial SDV is off.".format(report.total('sdv_unpopulated') + report.total('sdv_na')))
+
+
+''''''''' Update SDV, UID, and Feature Metadata '''''''''
+# Each feature class is read once. SDV, UID, GFID, and the metadata fields are all worked out in memory
+# and only the rows that actually changed get written back.
+ap.AddWarning("\nThe Global Feature Identifier field that ESRI is 100% certain always \"provides sufficient combinations within a database and cannot be duplicated\" has, in fact, made quite a few duplicates.\nSince the field is a special type (and can't be duplicated), we aren't allowed to edit the values. But by some miracle, it keeps making the \"impossible\" duplicates...\n")
+uid_total = 0
+gfid_total = 0
+seen = set()
+reasons = Counter()
+total_saved = [0.0, 0.0]
+rewritten = {} # {feature class: rows actually written back}
+for fc in featureclass:
+	if not sdv_check and not report.needs(fc, 'uid') and not report.needs(fc, 'metadata_stale'):
+		seen.update(report.uid_keys[fc]) # Later feature classes still have to see these UIDs as taken
+		rewritten[fc] = 0
+		continue
+	fields = row_fields + [sdv_token(fc)] if sdv_check else row_fields
+	with ap.da.SearchCursor(fc, fields) as scursor:
+		rows = [list(srow) for srow in scursor]
+	if not rows:
+		continue
+	before = [row[:len(row_fields)] for row in rows]
+	write('\n== Processing {0} {1} features. =='.format(len(rows), fc))
 
+	if sdv_check:
+		if sdv_savings:
+			saved_time, saved_kb = sdv_read_savings(fc)
+			total_saved[0] += saved_time
+			total_saved[1] += saved_kb
+		if fc_strategy(fc) == 'Majority Overlap':
+			new_sdv, unknown_err_list, null_geom_list = overlap_sdv(fc, rows, footprints, foot_index)
+		elif sdv_backend == 'NumPy':
+			new_sdv, unknown_err_list, null_geom_list = numpy_sdv(fc, rows, footprints, foot_rings, foot_index.extents)
+		else:
+			new_sdv, unknown_err_list, null_geom_list = centroid_sdv(fc, rows, footprints, foot_index)
+		count = 0
+		for k, cell_date in new_sdv.items():
+			if rows[k][SDV] != cell_date:
+				rows[k][SDV] = cell_date
+				count += 1
 		if count > 0:
-			write('\nUpdated {0} SDV dates in {1}.'.format(count, fc))
+			write('Updated {0} SDV dates in {1}.'.format(count, fc))
 		if len(unknown_err_list) > 0:
 			ap.AddError("\n*** WARNING ***")
 			ap.AddError("These {0} features failed to have their SDV updated. Further manual investigation may be required.\nCheck the Imagery Footprint Acquisition field and the individual feature attribute fields and geometry.".format(fc))
@@ -253,37 +527,42 @@ if sdv_check:
 			ap.AddError("\n*** WARNING ***")
 			ap.AddError("These {0} features were flagged as having NULL geometry. If Repair Geometry has not fixed them, further manual investigation may be required.".format(fc))
 			ap.AddError(null_geom_list)
-		error_event += ap.GetMaxSeverity()
 
+	uid_count, gfid_count = fix_uids(rows, seen, reasons)
+	if uid_count:
+		write("Updated {0} MGCP UIDs in {1}".format(uid_count, fc))
+	if gfid_count:
+		write("Synced {0} GFIDs with their UIDs in {1}".format(gfid_count, fc))
+	uid_total += uid_count
+	gfid_total += gfid_count
 
-''''''''' Update UFI Values '''''''''
-uid_total = 0
-uid_total = update_uid()
+	for row in rows:
+		fill_metadata(fc, row)
 
+	# Compare against what was read so a re-run over an already finished GDB writes nothing
+	lengths = text_lengths(snap.fields(fc))
+	field_counts = Counter()
+	changed = []
+	for row, old in zip(rows, before):
+		diff = changed_fields(old, row, lengths)
+		if diff:
+			changed.append(row)
+			field_counts.update(row_fields[i] for i in diff)
+	written = write_rows(fc, changed, len(rows))
+	if written:
+		snap.wrote(fc, len(rows)) # Rewritten in place so the count holds
+		write("Rewrote {0} of {1} rows in {2}. Changed fields: {3}".format(written, len(rows), fc, ", ".join("{0} {1}".format(f, field_counts[f]) for f in row_fields if field_counts[f])))
+	else:
+		write("No rows in {0} needed rewriting.".format(fc))
+	rewritten[fc] = written
+	error_event += ap.GetMaxSeverity()
 
-''''''''' Populate Feature Metadata '''''''''
-acc = 1 # If not already
-ccn = r"Copyright {0} by the National Geospatial-Intelligence Agency, U.S. Government. No domestic copyright claimed under Title 17 U.S.C. All rights reserved.".format(curr_year)
-sdp = "Very High Resolution Commercial Monoscopic Imagery"
-srt = 110 # Very High Resolution Commercial Monoscopic Imagery
-txt = 'N_A' # Unless populated
-for fc in featureclass:
-	#write("Assigning {0} metadata to {1} feature class.".format(sdp, fc))
-	# fc_fields = ['acc', 'ccn', 'sdp', 'srt', 'txt', 'sdv']
-	with ap.da.UpdateCursor(fc, fc_fields) as ucursor:
-		for urow in ucursor:
-			if not populated(urow[0]):
-				urow[0] = acc
-			urow[1] = ccn
-			urow[2] = sdp
-			urow[3] = srt
-			if not populated(urow[4]):
-				urow[4] = txt
-			if 'TextP' in fc:
-				urow[2] = "GeoNames"
-				urow[3] = 25 # GeoNames
-				if geo_used: urow[5] = geo_date_new
-			ucursor.updateRow(urow)
+if sdv_check and sdv_savings:
+	write("\nCentroid token reads saved {0:.2f} s and ~{1:.0f} KB over full geometry reads across all feature classes.".format(total_saved[0], total_saved[1]))
+write("\nChecked {0} UIDs across the dataset. Missing: {1}, Malformed: {2}, Duplicates: {3}".format(len(seen), reasons['missing'], reasons['malformed'], reasons['duplicate']))
+ap.AddWarning("{0} invalid or missing UID values updated.".format(uid_total))
+write("{0} GFID values were out of sync with their UIDs and have been updated.".format(gfid_total))
+write("Rewrote {0} rows across {1} feature classes. {2} feature classes were already up to date.".format(sum(rewritten.values()), len([fc for fc in rewritten if rewritten[fc]]), len([fc for fc in rewritten if not rewritten[fc]])))
 
 
 write("\n\n")
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# MGCP Preflight Scanner v1  #
+#         2026-10-18         #
+# ========================== #
+import json
+import uuid
+import numbers
+from collections import Counter
+
+#            _______________________________
+#           | One read only pass over the   |
+#           | whole dataset that counts     |
+#           | what the finishing and        |
+#           | metadata tools would have to  |
+#           | fix, so they can skip the     |
+#           | stages and feature classes    |
+#           | that are already clean.       |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+# Explicit is better than implicit
+# Lambda function works better than "if not fieldname:", which can falsely catch 0.
+populated = lambda x: x is not None and str(x).strip() != '' # Function that returns boolean of if input field is populated or empty
+
+# What each check counts, in report order
+checks = [('fcode_mismatch', "F_Code doesn't match FCSubtype"),
+		('unknown_subtype', "FCSubtype not in the catalogue"),
+		('multipart', "Multipart features"),
+		('null_geometry', "NULL or empty geometry"),
+		('uid_missing', "Missing UID"),
+		('uid_malformed', "Malformed UID"),
+		('uid_duplicate', "Duplicate UID"),
+		('gfid_drift', "GFID out of sync with UID"),
+		('sdv_unpopulated', "Unpopulated SDV"),
+		('sdv_na', "'N_A' SDV"),
+		('metadata_stale', "Feature metadata out of date")]
+
+# Checks that have to be clean before a finishing stage can be skipped
+stage_checks = {'fcode' : ['fcode_mismatch'],
+				'explode' : ['multipart'],
+				'repair' : ['null_geometry'],
+				'uid' : ['uid_missing', 'uid_malformed', 'uid_duplicate', 'gfid_drift']}
+
+
+
+#-----------------------------------
+def uid_bytes(value): # Returns the 16 byte binary of a 36 character UID string, or None if it is missing or malformed
+	if not populated(value) or len(value) != 36: # 36 character random alphanumeric string
+		return None
+	try:
+		return uuid.UUID(value).bytes # GOTOHELL-FUCK-COCK-PISS-MOTHERFUCKER and LEONARDO-EATS-FROG-EGGS-DISGUSTINGLY used to pass as valid XD. They have to be hex now.
+	except ValueError:
+		return None
+
+#-----------------------------------
+def same_guid(gfid, uid): # True if the GUID field holds the same value as the uid. GUID fields come back as {UPPERCASE} so compare the binaries.
+	try:
+		return uuid.UUID(gfid).bytes == uuid.UUID(uid).bytes
+	except (TypeError, ValueError, AttributeError):
+		return False
+
+#-----------------------------------
+def text_lengths(fields): # Text field widths from a list of field objects, lowercase names. A value longer than the field comes back cut off.
+	return dict((f.name.lower(), f.length) for f in fields if f.type == 'String')
+
+#-----------------------------------
+def same_value(old, new, length=None): # True if writing new over old wouldn't change what is stored. length is the text field width, if any.
+	# Shared by the preflight and populate_feature_metadata so a value the tool skips is never counted as stale here
+	if old is None or new is None:
+		return old is None and new is None
+	if isinstance(old, numbers.Number) or isinstance(new, numbers.Number):
+		try:
+			return float(old) == float(new) # srt 110 vs u'110' vs 110.0 depending on the schema
+		except (TypeError, ValueError):
+			return False
+	if length:
+		new = new[:length] # Stored cut off at the field width, so an over-long ccn or sdp would otherwise never match
+	return old == new
+
+
+#-----------------------------------
+class PreflightReport(object):
+	# counts[fc] is a Counter of the checks above plus 'features'
+	# uid_keys[fc] holds the 16 byte binaries of the UIDs in fc that were kept, so a tool that skips fc can still
+	# seed its duplicate check with them
+	def __init__(self):
+		self.counts = {}
+		self.uid_keys = {}
+		self.order = []
+
+	def add(self, fc, counts, keys):
+		self.order.append(fc)
+		self.counts[fc] = counts
+		self.uid_keys[fc] = keys
+
+	def needs(self, fc, stage): # True if fc has anything for the stage to fix. Feature classes that weren't scanned always need it.
+		if fc not in self.counts:
+			return True
+		return any(self.counts[fc][check] for check in stage_checks.get(stage, [stage]))
+
+	def total(self, check):
+		return sum(self.counts[fc][check] for fc in self.order)
+
+	def summary(self): # Lines for the geoprocessing window
+		lines = ["Preflight scanned {0} features in {1} feature classes.".format(self.total('features'), len(self.order))]
+		for check, label in checks:
+			found = [fc for fc in self.order if self.counts[fc][check]]
+			if found:
+				lines.append("   {0}: {1} in {2} feature classes".format(label, self.total(check), len(found)))
+		if len(lines) == 1:
+			lines.append("   Nothing to fix.")
+		return lines
+
+	def save(self, path): # JSON copy of the counts for the record. The UID keys stay in memory.
+		with open(path, 'w') as f:
+			json.dump(dict((fc, dict(self.counts[fc])) for fc in self.order), f, indent=1, sort_keys=True)
+
+
+#-----------------------------------
+def scan_fc(fc, seen, catalogue=None, geometry=True, metadata=None, snapshot=None): # Counts the problems in one feature class. seen holds the UIDs kept so far across the dataset.
+	import arcpy as ap
+	field_list = snapshot.fields(fc) if snapshot is not None else ap.ListFields(fc)
+	names = [f.name.lower() for f in field_list]
+	lengths = text_lengths(field_list)
+	fields = ['OID@']
+	if geometry:
+		fields.append('SHAPE@')
+	optional = [name for name in ['f_code', 'fcsubtype', 'uid', 'gfid', 'sdv'] if name in names]
+	expected = dict((k, v) for k, v in (metadata(fc) if metadata else {}).items() if k in names)
+	fill = [name for name in ['acc', 'txt'] if metadata and name in names] # Only filled in when unpopulated
+	meta = sorted(expected.keys())
+	fields += optional + meta + fill
+	at = dict((name, i) for i, name in enumerate(fields))
+	subtypes = catalogue.subtypes(fc) if catalogue is not None and 'f_code' in at and 'fcsubtype' in at else None
+
+	counts = Counter()
+	keys = []
+	with ap.da.SearchCursor(fc, fields) as scursor:
+		for srow in scursor:
+			counts['features'] += 1
+			if geometry:
+				shape = srow[at['SHAPE@']]
+				if shape is None or shape.pointCount == 0:
+					counts['null_geometry'] += 1
+				elif shape.partCount > 1:
+					counts['multipart'] += 1
+			if subtypes is not None:
+				fcode = subtypes.get(srow[at['fcsubtype']])
+				if fcode is None:
+					counts['unknown_subtype'] += 1
+				elif srow[at['f_code']] != fcode:
+					counts['fcode_mismatch'] += 1
+			if 'uid' in at:
+				uid = srow[at['uid']]
+				key = uid_bytes(uid)
+				if key is None:
+					counts['uid_missing' if not populated(uid) else 'uid_malformed'] += 1
+				elif key in seen:
+					counts['uid_duplicate'] += 1
+				else:
+					seen.add(key)
+					keys.append(key)
+					if 'gfid' in at and not same_guid(srow[at['gfid']], uid):
+						counts['gfid_drift'] += 1
+			if 'sdv' in at:
+				sdv = srow[at['sdv']]
+				if not populated(sdv):
+					counts['sdv_unpopulated'] += 1
+				elif 'N_A' in sdv:
+					counts['sdv_na'] += 1
+			if any(not same_value(srow[at[name]], expected[name], lengths.get(name)) for name in meta) or any(not populated(srow[at[name]]) for name in fill):
+				counts['metadata_stale'] += 1
+	return counts, keys
+
+#-----------------------------------
+def scan_dataset(featureclass, catalogue=None, geometry=True, metadata=None, log=None, snapshot=None): # Streams every feature class once. Returns a PreflightReport.
+	# featureclass should be in the same order the tools process them so the first UID occurrence matches theirs
+	# metadata is an optional function of fc returning {field : value the metadata tool would write}
+	# snapshot is an optional DatasetSnapshot. Its field lists get used and it picks up the row counts from the scan.
+	report = PreflightReport()
+	seen = set()
+	for fc in featureclass:
+		counts, keys = scan_fc(fc, seen, catalogue, geometry, metadata, snapshot)
+		report.add(fc, counts, keys)
+		if snapshot is not None:
+			snapshot.set_count(fc, counts['features'])
+	if log is not None:
+		for line in report.summary():
+			log(line)
+	return report
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# Run Report v1              #
+#         2026-10-18         #
+# ========================== #
+import json
+import os
+import sys
+import time
+from datetime import datetime as dt
+
+#            _______________________________
+#           | Times every stage of a tool   |
+#           | run (wall clock, CPU, memory  |
+#           | growth, rows read and         |
+#           | written) per stage and per    |
+#           | feature class, and drops it   |
+#           | as JSON next to the GDB.      |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+#-----------------------------------
+def cpu_seconds(): # User + system CPU time of this process
+	t = os.times()
+	return t[0] + t[1]
+
+#-----------------------------------
+def memory_mb(): # (current working set, peak working set so far) of this process in MB. Either is None if it can't be found.
+	if sys.platform == 'win32':
+		try:
+			import ctypes
+			from ctypes import wintypes
+			class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+				_fields_ = [('cb', wintypes.DWORD),
+							('PageFaultCount', wintypes.DWORD),
+							('PeakWorkingSetSize', ctypes.c_size_t),
+							('WorkingSetSize', ctypes.c_size_t),
+							('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+							('QuotaPagedPoolUsage', ctypes.c_size_t),
+							('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+							('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+							('PagefileUsage', ctypes.c_size_t),
+							('PeakPagefileUsage', ctypes.c_size_t)]
+			counters = PROCESS_MEMORY_COUNTERS()
+			counters.cb = ctypes.sizeof(counters)
+			process = ctypes.windll.kernel32.GetCurrentProcess()
+			if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+				return counters.WorkingSetSize / 1048576.0, counters.PeakWorkingSetSize / 1048576.0
+		except (AttributeError, OSError, ValueError):
+			pass
+		return None, None
+	try:
+		# VmRSS is the resident set right now, VmHWM its high-water mark. Both in kB.
+		found = {}
+		with open('/proc/self/status') as f:
+			for line in f:
+				if line.startswith(('VmRSS:', 'VmHWM:')):
+					found[line.split(':')[0]] = int(line.split()[1]) / 1024.0
+		return found.get('VmRSS'), found.get('VmHWM')
+	except (IOError, OSError, ValueError, IndexError):
+		pass
+	try:
+		import resource
+		peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		return None, peak / 1048576.0 if sys.platform == 'darwin' else peak / 1024.0 # Bytes on macOS, KB on Linux
+	except (ImportError, ValueError):
+		return None, None
+
+#-----------------------------------
+def snapshot(): # (wall, cpu, current memory in MB) right now
+	return time.time(), cpu_seconds(), memory_mb()[0]
+
+#-----------------------------------
+def elapsed(start, rows=None): # Metrics dict from a snapshot() up to now, plus the rows read and written
+	# Memory is the working set at the start and end of the span and the difference, so a stage that grows shows up
+	# on its own line instead of under the running high-water mark of ArcMap or the worker
+	wall, cpu, mem = snapshot()
+	metrics = {'wall_s' : round(wall - start[0], 4),
+				'cpu_s' : round(cpu - start[1], 4),
+				'mem_start_mb' : round(start[2], 1) if start[2] is not None else None,
+				'mem_end_mb' : round(mem, 1) if mem is not None else None,
+				'mem_delta_mb' : round(mem - start[2], 1) if None not in (mem, start[2]) else None}
+	metrics['rows_read'] = int(rows.get('read', 0)) if rows else 0
+	metrics['rows_written'] = int(rows.get('written', 0)) if rows else 0
+	return metrics
+
+#-----------------------------------
+def combine(first, second): # One metrics dict for a stage that ran in two processes, e.g. read on a worker and written in the parent
+	metrics = dict(first)
+	for key, value in second.items():
+		if key in ('wall_s', 'cpu_s'):
+			metrics[key] = round(metrics.get(key, 0) + value, 4)
+		elif key in ('rows_read', 'rows_written'):
+			metrics[key] = metrics.get(key, 0) + value
+		elif key == 'mem_delta_mb': # Growth in each process, added up
+			known = [v for v in (metrics.get(key), value) if v is not None]
+			metrics[key] = round(sum(known), 1) if known else None
+		elif key in ('mem_start_mb', 'mem_end_mb'):
+			metrics.pop(key, None) # Readings from two different processes don't make one span
+		else:
+			metrics[key] = value
+	return metrics
+
+#-----------------------------------
+def gdb_folder(workspace): # Folder holding the geodatabase the workspace is in. Falls back to the workspace's own folder.
+	path = os.path.abspath(workspace)
+	probe = path
+	while probe and not probe.lower().endswith('.gdb'):
+		parent = os.path.dirname(probe)
+		if parent == probe:
+			return os.path.dirname(path)
+		probe = parent
+	return os.path.dirname(probe)
+
+
+#-----------------------------------
+class RunReport(object):
+	# report = RunReport('MGCP Finishing Tool', MGCP)
+	# with report.stage('Integrate') as rows:
+	#     rows['read'] += ...
+	# report.add_fc('Populate F_Code', fc, metrics)   <- per feature class metrics, e.g. from a worker
+	# report.save()
+	def __init__(self, tool, workspace):
+		self.tool = tool
+		self.workspace = workspace
+		self.started = dt.now()
+		self.start = snapshot()
+		self.stages = []
+		self.by_name = {}
+
+	def stage(self, name):
+		return _Stage(self, name)
+
+	def record(self, name, metrics):
+		entry = self.by_name.get(name)
+		if entry is None:
+			entry = {'stage' : name, 'feature_classes' : {}}
+			self.by_name[name] = entry
+			self.stages.append(entry)
+		entry.update(metrics)
+		return entry
+
+	def add_fc(self, name, fc, metrics):
+		entry = self.by_name.get(name) or self.record(name, {})
+		entry['feature_classes'][fc] = metrics
+
+	def as_dict(self):
+		total = elapsed(self.start)
+		total['process_peak_mb'] = memory_mb()[1] # High-water mark of the whole process so far, ArcMap included. Only reported for the run.
+		for entry in self.stages: # Stage rows are the sum of its feature classes unless the stage counted its own
+			for key in ('rows_read', 'rows_written'):
+				if not entry.get(key):
+					entry[key] = sum(m.get(key, 0) for m in entry['feature_classes'].values())
+		total['rows_read'] = sum(entry.get('rows_read', 0) for entry in self.stages)
+		total['rows_written'] = sum(entry.get('rows_written', 0) for entry in self.stages)
+		return {'tool' : self.tool,
+				'workspace' : self.workspace,
+				'started' : self.started.strftime("%Y-%m-%dT%H:%M:%S"),
+				'python' : sys.version.split()[0],
+				'total' : total,
+				'stages' : self.stages}
+
+	def save(self, path=None): # Writes the JSON report next to the GDB. Returns the path.
+		if path is None:
+			name = "{0}_{1}.json".format(self.tool.replace(' ', '_'), self.started.strftime("%Y%m%d_%H%M%S"))
+			path = os.path.join(gdb_folder(self.workspace), name)
+		with open(path, 'w') as f:
+			json.dump(self.as_dict(), f, indent=1, sort_keys=True)
+		return path
+
+
+class _Stage(object):
+	# Context manager behind RunReport.stage. Hands out a dict to count rows in.
+	def __init__(self, report, name):
+		self.report = report
+		self.name = name
+		self.rows = {'read' : 0, 'written' : 0}
+
+	def __enter__(self):
+		self.start = snapshot()
+		return self.rows
+
+	def __exit__(self, kind, value, trace):
+		metrics = elapsed(self.start, self.rows)
+		if kind is not None:
+			metrics['error'] = "{0}: {1}".format(kind.__name__, value)
+		self.report.record(self.name, metrics)
+		return False
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# Utility Snapping Engine v1 #
+#         2026-10-18         #
+# ========================== #
+import math
+from collections import Counter
+import numpy as np
+from geometry_check import wkb_layout, run_xy
+from integrate_tiles import utility_ranks, meters_per_degree, where_oids
+from dataset_snapshot import dataset_snapshot
+
+#            _______________________________
+#           | NumPy stand in for Integrate  |
+#           | on the utility group. Hashes  |
+#           | every vertex into a grid the  |
+#           | size of the tolerance, only   |
+#           | looks closer at the vertices  |
+#           | that have a neighbour, and    |
+#           | snaps them toward the better  |
+#           | ranked feature. No Defense    |
+#           | license needed.               |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+#-----------------------------------
+def local_meters(x, y, geographic): # Equirectangular meters around the center of the data so the tolerance is in meters
+	if not geographic or not len(x):
+		return x, y
+	lat0 = (y.min() + y.max()) / 2.0
+	lon0 = (x.min() + x.max()) / 2.0
+	return (x - lon0) * meters_per_degree * math.cos(math.radians(lat0)), (y - lat0) * meters_per_degree
+
+#-----------------------------------
+def neighbor_pairs(x, y, tolerance): # (i, j, distance) for every pair of vertices within tolerance, i < j, from a hashed grid
+	n = len(x)
+	if n < 2:
+		return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0)
+	ix = np.floor(x / tolerance).astype(np.int64)
+	iy = np.floor(y / tolerance).astype(np.int64)
+	ix -= ix.min() - 1
+	iy -= iy.min() - 1
+	span = iy.max() + 2
+	key = ix * span + iy
+	order = np.argsort(key, kind='mergesort')
+	sorted_key = key[order]
+	found_i = []
+	found_j = []
+	for dx in (-1, 0, 1):
+		for dy in (-1, 0, 1):
+			want = key + dx * span + dy
+			lo = np.searchsorted(sorted_key, want, side='left')
+			count = np.searchsorted(sorted_key, want, side='right') - lo
+			if not count.any():
+				continue
+			i = np.repeat(np.arange(n), count)
+			j = order[np.repeat(lo, count) + np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)]
+			keep = i < j
+			found_i.append(i[keep])
+			found_j.append(j[keep])
+	i = np.concatenate(found_i)
+	j = np.concatenate(found_j)
+	dist = np.hypot(x[i] - x[j], y[i] - y[j])
+	near = dist <= tolerance
+	return i[near], j[near], dist[near]
+
+#-----------------------------------
+def snap_targets(i, j, dist, rank, feature, n): # Index of the vertex each vertex snaps to, itself if it stays put
+	# A vertex only snaps toward a better ranked vertex (lower rank number, then lower index) of another feature.
+	# Among those it takes the best rank, then the closest. Pointers are followed to the end so clusters collapse onto one spot.
+	other = feature[i] != feature[j]
+	i, j, dist = i[other], j[other], dist[other]
+	src = np.concatenate((i, j))
+	dst = np.concatenate((j, i))
+	d = np.concatenate((dist, dist))
+	better = (rank[dst] < rank[src]) | ((rank[dst] == rank[src]) & (dst < src))
+	src, dst, d = src[better], dst[better], d[better]
+	target = np.arange(n)
+	if len(src):
+		pick = np.lexsort((dst, d, rank[dst], src))
+		src, dst = src[pick], dst[pick]
+		first = np.r_[True, src[1:] != src[:-1]]
+		target[src[first]] = dst[first]
+	while True: # Pointer jumping. Every pointer goes to a strictly better vertex so this ends.
+		jumped = target[target]
+		if (jumped == target).all():
+			return target
+		target = jumped
+
+#-----------------------------------
+def read_group(group): # Reads the WKB of every feature in the group. Returns the vertex arrays and per feature bookkeeping.
+	import arcpy as ap
+	features = [] # (fc, oid, wkb, runs, first vertex)
+	xs = []
+	ys = []
+	ranks = []
+	owners = []
+	geographic = False
+	total = 0
+	for fc, rank in group:
+		if not ap.Exists(fc):
+			continue
+		geographic = geographic or dataset_snapshot(ap.env.workspace).info(fc).sr_type == 'Geographic'
+		with ap.da.SearchCursor(fc, ['OID@', 'SHAPE@WKB']) as scursor:
+			for oid, wkb in scursor:
+				if wkb is None:
+					continue
+				buf = bytes(wkb)
+				kind, runs = wkb_layout(buf)
+				features.append((fc, oid, buf, runs, total))
+				for run in runs:
+					xy = run_xy(buf, run)
+					xs.append(xy[:, 0])
+					ys.append(xy[:, 1])
+					ranks.append(np.full(len(xy), rank, dtype=np.int64))
+					owners.append(np.full(len(xy), len(features) - 1, dtype=np.int64))
+					total += len(xy)
+	cat = lambda arrays, dtype: np.concatenate(arrays).astype(dtype) if arrays else np.zeros(0, dtype)
+	return features, cat(xs, np.float64), cat(ys, np.float64), cat(ranks, np.int64), cat(owners, np.int64), geographic
+
+#-----------------------------------
+def snap_vertices(x, y, rank, feature, tolerance, geographic=False): # (new x, new y, moved mask). Runs without arcpy.
+	mx, my = local_meters(x, y, geographic)
+	i, j, dist = neighbor_pairs(mx, my, tolerance)
+	target = snap_targets(i, j, dist, rank, feature, len(x))
+	nx = x[target]
+	ny = y[target]
+	moved = (nx != x) | (ny != y)
+	return nx, ny, moved
+
+#-----------------------------------
+def snap_utilities(tolerance=0.03, group=utility_ranks, write=True): # Snaps the utility group in the current workspace. Returns a Counter of what happened.
+	import arcpy as ap
+	stats = Counter()
+	features, x, y, rank, feature, geographic = read_group(group)
+	stats['vertices'] = len(x)
+	if not len(x):
+		return stats
+	nx, ny, moved = snap_vertices(x, y, rank, feature, tolerance, geographic)
+	stats['moved'] = int(moved.sum())
+	if not stats['moved']:
+		return stats
+
+	# Patch the new coordinates straight into each moved feature's WKB so Z, M, parts, and rings stay as they were
+	changed = {}
+	for f in np.unique(feature[moved]):
+		fc, oid, buf, runs, first = features[f]
+		buf = bytearray(buf)
+		pos = first
+		for run in runs:
+			xy = run_xy(buf, run)
+			xy[:, 0] = nx[pos:pos + len(xy)]
+			xy[:, 1] = ny[pos:pos + len(xy)]
+			pos += len(xy)
+		changed.setdefault(fc, {})[oid] = buf
+		stats['moved ' + fc] += int(moved[first:pos].sum())
+	if write:
+		for fc, shapes in changed.items():
+			with ap.da.UpdateCursor(fc, ['OID@', 'SHAPE@WKB'], where_oids(fc, shapes.keys())) as ucursor:
+				for urow in ucursor:
+					if urow[0] in shapes:
+						urow[1] = shapes[urow[0]]
+						ucursor.updateRow(urow)
+						stats['features'] += 1
+	return stats
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# ========================== #
+# MGCP XML Post-Fixer v1     #
+#         2026-10-18         #
+# ========================== #
+import os
+import re
+import sys
+import json
+import glob
+import shutil
+import tempfile
+import traceback
+import multiprocessing
+from collections import Counter
+
+#            _______________________________
+#           | Cleans up the cell XML that   |
+#           | Export Metadata spits out.    |
+#           | Reads each file once, runs a  |
+#           | table of string and regex     |
+#           | rewrites over it, and swaps   |
+#           | the fixed copy in atomically. |
+#           | Takes one XML or a whole      |
+#           | folder of them.               |
+#      _    /‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾
+#   __(.)< ‾
+#~~~\___)~~~
+
+
+
+# (kind, pattern, replacement, label). kind is 'string' for a plain replace or 'regex' for re.sub.
+# Export Metadata still stamps the TRD as MGCP_v4_r2 no matter what the data is.
+trd_rules = [('string', 'MGCP_v4_r2', 'MGCP_v4_r5.1', "misattributed 'MGCP_v4_r2' tags")]
+
+
+
+#-----------------------------------
+def load_rules(path): # Rule table from a JSON list of [kind, pattern, replacement, label]
+	with open(path, 'r') as f:
+		return [tuple(rule) for rule in json.load(f)]
+
+#-----------------------------------
+def compile_rules(rules): # [(label, function(text) -> (new text, matches))] in table order
+	compiled = []
+	for kind, pattern, replacement, label in rules:
+		if kind == 'string':
+			compiled.append((label, lambda text, p=pattern, r=replacement: (text.replace(p, r), text.count(p))))
+		elif kind == 'regex':
+			compiled.append((label, lambda text, p=re.compile(pattern), r=replacement: p.subn(r, text)))
+		else:
+			raise ValueError("Unknown rule kind '{0}' for {1}. Use 'string' or 'regex'.".format(kind, label))
+	return compiled
+
+#-----------------------------------
+def atomic_replace(src, dst): # Moves src over dst in one step so dst is never missing or half written
+	if hasattr(os, 'replace'): # Python 3
+		os.replace(src, dst)
+	elif sys.platform == 'win32': # Python 2 on Windows. os.rename won't overwrite there.
+		import ctypes
+		MOVEFILE_REPLACE_EXISTING = 0x1
+		MOVEFILE_WRITE_THROUGH = 0x8
+		if not ctypes.windll.kernel32.MoveFileExW(unicode(src), unicode(dst), MOVEFILE_REPLACE_EXISTING | MOVEFILE_WRITE_THROUGH):
+			raise ctypes.WinError()
+	else:
+		os.rename(src, dst) # Already atomic on POSIX
+
+#-----------------------------------
+def fix_text(text, compiled): # Runs every rule over text. Returns (new text, Counter of matches per label).
+	matches = Counter()
+	for label, rewrite in compiled:
+		text, count = rewrite(text)
+		if count:
+			matches[label] += count
+	return text, matches
+
+#-----------------------------------
+def fix_file(path, rules=trd_rules): # Fixes one XML in a single buffered read and write. Returns Counter of matches per label. Untouched if nothing matched.
+	compiled = compile_rules(rules)
+	with open(path, 'rb') as f:
+		raw = f.read()
+	text, matches = fix_text(raw.decode('utf-8'), compiled) # Any BOM comes along as a character and goes back out as written
+	if not matches:
+		return matches
+	folder = os.path.dirname(os.path.abspath(path))
+	handle, tmp = tempfile.mkstemp(prefix='.xml_fix_', suffix='.tmp', dir=folder) # Same folder so the replace never crosses drives
+	try:
+		with os.fdopen(handle, 'wb') as f:
+			f.write(text.encode('utf-8'))
+			f.flush()
+			os.fsync(f.fileno())
+		shutil.copymode(path, tmp) # mkstemp makes the file 0600. Keep the original's permissions.
+		atomic_replace(tmp, path)
+	except Exception:
+		if os.path.exists(tmp):
+			os.remove(tmp)
+		raise
+	return matches
+
+#-----------------------------------
+def fix_job(job): # Worker. job = (path, rules). Returns (path, Counter of matches, error or None).
+	path, rules = job
+	try:
+		return path, fix_file(path, rules), None
+	except Exception:
+		return path, Counter(), traceback.format_exc()
+
+#-----------------------------------
+def xml_paths(target): # The XMLs to fix. A folder gives every .xml directly in it.
+	if os.path.isdir(target):
+		return sorted(glob.glob(os.path.join(target, '*.xml')))
+	return [target]
+
+#-----------------------------------
+def fix_paths(target, rules=trd_rules, workers=1, executable=None): # Fixes one XML or a folder of them. Returns [(path, Counter of matches, error or None)].
+	jobs = [(path, rules) for path in xml_paths(target)]
+	if workers > 1 and len(jobs) > 1:
+		if executable:
+			multiprocessing.set_executable(executable)
+		pool = multiprocessing.Pool(min(workers, len(jobs)))
+		try:
+			return pool.map(fix_job, jobs)
+		finally:
+			pool.close()
+			pool.join()
+	return [fix_job(job) for job in jobs]
+
+#-----------------------------------
+def summary(results, rules=trd_rules): # One message for the whole run instead of one per match
+	totals = Counter()
+	for path, matches, error in results:
+		totals.update(matches)
+	fixed = len([1 for path, matches, error in results if matches])
+	failed = [path for path, matches, error in results if error]
+	found = ", ".join("{0} {1}".format(totals[label], label) for kind, pattern, replacement, label in rules if totals[label])
+	line = "Fixed {0} of {1} XML files: {2}".format(fixed, len(results), found if found else "nothing to fix")
+	if failed:
+		line += "\n{0} files could not be fixed: {1}".format(len(failed), ", ".join(os.path.basename(path) for path in failed))
+	return line
+
+
+
+if __name__ == '__main__':
+	# python xml_fixer.py <cell XML or folder of them> [workers] [rules.json]
+	target = sys.argv[1]
+	workers = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+	rules = load_rules(sys.argv[3]) if len(sys.argv) > 3 else trd_rules
+	results = fix_paths(target, rules, workers)
+	print(summary(results, rules))
+	for path, matches, error in results:
+		if error:
+			print("{0}:\n{1}".format(path, error))